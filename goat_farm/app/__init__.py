@@ -1,16 +1,28 @@
 from flask import Flask
 from app.routes import all_blueprints
+from app.cli import all_commands
 from app.extensions import db ,migrate,jwt,bcrypt,cors
-from app import models
+from app import models, rollups, pedigree, offspring, jobs, versions, sync
+from app.cache import cache
+from app.config import engine_options
+from app.instrumentation import init_metrics
+from app.json_provider import make_json_provider
 
 def create_app(config_class="app.config.Config"):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    # Worker processes (flask jobs worker) rebuild the app from the same config
+    app.config.setdefault("CONFIG_CLASS", config_class if isinstance(config_class, str) else
+                          f"{config_class.__module__}.{config_class.__qualname__}")
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
+    app.json = make_json_provider(app)
 
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     bcrypt.init_app(app)
+    cache.init_app(app)
+    init_metrics(app)
     # Initialize CORS (configurable allowed origins)
     cors.init_app(app, resources={r"/*": {"origins": app.config.get("CORS_ORIGINS", "*")}})
 
@@ -18,5 +30,9 @@ def create_app(config_class="app.config.Config"):
     for bp in all_blueprints:
         app.register_blueprint(bp)  
 
+    # Register CLI command groups (flask ledger ...)
+    for command in all_commands:
+        app.cli.add_command(command)
+
     return app
 
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func
+
+from app.extensions import db
+
+MAX_WINDOWS = 20
+# 100 years; larger day counts would push the cutoff past date.min
+MAX_WINDOW_DAYS = 36500
+
+
+def parse_windows(value):
+    """Parse ?windows=7,30,90 into sorted, de-duplicated day counts."""
+    if not value:
+        return []
+    try:
+        windows = sorted({int(part) for part in value.split(",") if part.strip()})
+    except ValueError:
+        raise ValueError("windows must be a comma-separated list of day counts")
+    if any(days < 1 for days in windows):
+        raise ValueError("windows must be positive day counts")
+    if windows and windows[-1] > MAX_WINDOW_DAYS:
+        raise ValueError(f"windows must be at most {MAX_WINDOW_DAYS} days")
+    if len(windows) > MAX_WINDOWS:
+        raise ValueError(f"At most {MAX_WINDOWS} windows are allowed")
+    return windows
+
+
+def window_cutoffs(windows, today=None):
+    """Named cutoff dates: the 30-day and year-to-date windows plus one per requested day count."""
+    today = today or datetime.utcnow().date()
+    cutoffs = {
+        "last_30_days": today - timedelta(days=30),
+        "year_to_date": today.replace(month=1, day=1),
+    }
+    for days in windows:
+        cutoffs[str(days)] = today - timedelta(days=days)
+    return cutoffs
+
+
+def windowed_sums(value, date_column, cutoffs):
+    """
+    Sum `value` over every window in one table scan using conditional
+    aggregation (SUM(CASE WHEN date >= cutoff ...)). Returns the sums keyed
+    like `cutoffs`, plus "lifetime" for the unconditional total.
+    """
+    names = list(cutoffs)
+    columns = [func.sum(value)] + [
+        func.sum(case((date_column >= cutoffs[name], value), else_=0)) for name in names
+    ]
+    row = db.session.query(*columns).one()
+
+    sums = {"lifetime": row[0] or 0.0}
+    for index, name in enumerate(names, start=1):
+        sums[name] = row[index] or 0.0
+    return sums
@@ -0,0 +1,144 @@
+"""
+Mating recommendations: rank the active bucks for each doe.
+
+Each candidate is scored on three things:
+- predicted offspring inbreeding, which is the doe x buck kinship read from
+  the cached herd pedigree, where the active doe x buck block is memoized
+  per build (see app.pedigree);
+- past success rate from resolved Breeding records (Completed vs Failed),
+  smoothed towards BREEDING_PRIOR_SUCCESS for bucks with little history;
+- workload, the buck's matings inside the last BREEDING_WORKLOAD_DAYS.
+
+Bucks whose offspring would exceed BREEDING_MAX_INBREEDING are still listed,
+flagged, and always ranked after the acceptable ones.
+"""
+import heapq
+from datetime import date, timedelta
+
+from flask import current_app
+from sqlalchemy import case, func, select
+
+from app.extensions import db
+from app.models import Animal, Breeding
+from app.pedigree import load_pedigree
+
+SUCCESS_STATUSES = ("Completed",)
+FAILED_STATUSES = ("Failed",)
+# Larger than any attainable score spread, so over-limit bucks rank last
+OVER_LIMIT_PENALTY = 1000.0
+
+
+def active_animals(sex, ids=None):
+    query = (
+        select(Animal.id, Animal.tag_id)
+        .where(Animal.status == "Active", func.lower(Animal.sex) == sex)
+        .order_by(Animal.id)
+    )
+    if ids is not None:
+        query = query.where(Animal.id.in_(ids))
+    return db.session.execute(query).all()
+
+
+def buck_history(buck_ids, since):
+    """(successes, failures, recent matings) per buck in one grouped query."""
+    if not buck_ids:
+        return {}
+    rows = db.session.execute(
+        select(
+            Breeding.buck_id,
+            func.sum(case((Breeding.status.in_(SUCCESS_STATUSES), 1), else_=0)),
+            func.sum(case((Breeding.status.in_(FAILED_STATUSES), 1), else_=0)),
+            func.sum(case((Breeding.mating_date >= since, 1), else_=0)),
+        )
+        .where(Breeding.buck_id.in_(buck_ids))
+        .group_by(Breeding.buck_id)
+    ).all()
+    return {buck_id: (successes, failures, recent) for buck_id, successes, failures, recent in rows}
+
+
+def recommend_bucks(doe_ids=None, limit=5):
+    """
+    Rank candidate bucks for each doe (every active doe when doe_ids is None).
+    Returns (recommendations, unknown doe ids).
+    """
+    config = current_app.config
+    max_inbreeding = config.get("BREEDING_MAX_INBREEDING", 0.0625)
+    prior = config.get("BREEDING_PRIOR_SUCCESS", 0.5)
+    prior_weight = config.get("BREEDING_PRIOR_WEIGHT", 2)
+    weights = config.get("BREEDING_SCORE_WEIGHTS", {"inbreeding": 4.0, "success": 1.0, "workload": 0.5})
+    since = date.today() - timedelta(days=config.get("BREEDING_WORKLOAD_DAYS", 30))
+
+    does = active_animals("doe", doe_ids)
+    unknown = sorted(set(doe_ids) - {doe_id for doe_id, _ in does}) if doe_ids is not None else []
+    bucks = active_animals("buck")
+    history = buck_history([buck_id for buck_id, _ in bucks], since)
+    pedigree = load_pedigree()
+
+    # Everything that doesn't depend on the doe is computed once per buck
+    candidates, bases = [], []
+    busiest = max((recent for _, _, recent in history.values()), default=0) or 1
+    for buck_id, tag_id in bucks:
+        if buck_id not in pedigree:
+            continue
+        successes, failures, recent = history.get(buck_id, (0, 0, 0))
+        success_rate = (successes + prior * prior_weight) / (successes + failures + prior_weight)
+        candidates.append((buck_id, tag_id, success_rate, recent))
+        bases.append(weights["success"] * success_rate - weights["workload"] * recent / busiest)
+    # Ties go to the lower buck id
+    order = [-buck_id for buck_id, _, _, _ in candidates]
+    w_inbreeding = weights["inbreeding"]
+
+    # Kinship is symmetric, so compute relationship columns for whichever side is smaller:
+    # one per doe for a handful of does, else the doe x buck block (memoized per pedigree build).
+    # Either way only related bucks are kept: {candidate index: kinship > 0}.
+    if len(does) < len(candidates):
+        buck_rows = [pedigree.index[buck_id] for buck_id, _, _, _ in candidates]
+
+        def related_bucks(doe_id):
+            column = pedigree.kinship_column(doe_id)
+            return {k: column[j] for k, j in enumerate(buck_rows) if column[j]}
+    else:
+        doe_rows = [doe_id for doe_id, _ in does if doe_id in pedigree]
+        position = {doe_id: i for i, doe_id in enumerate(doe_rows)}
+        block = pedigree.related_block(doe_rows, [buck_id for buck_id, _, _, _ in candidates])
+
+        def related_bucks(doe_id):
+            return dict(zip(*block[position[doe_id]]))
+
+    # An unrelated buck scores exactly its base, so walking bucks best base first finds
+    # the top unrelated ones without scoring every pair
+    by_base = sorted(range(len(candidates)), key=lambda k: (bases[k], order[k]), reverse=True)
+
+    recommendations = []
+    for doe_id, doe_tag_id in does:
+        if doe_id not in pedigree:
+            continue
+        related = related_bucks(doe_id)
+        # Over-limit pairings sink below every acceptable one; only the top few become dicts
+        ranking = [
+            (bases[k] - w_inbreeding * value - (OVER_LIMIT_PENALTY if value > max_inbreeding else 0.0), order[k], k)
+            for k, value in related.items()
+        ]
+        unrelated = 0
+        for k in by_base:
+            if unrelated == limit:
+                break
+            if k not in related:
+                ranking.append((bases[k], order[k], k))
+                unrelated += 1
+        best = heapq.nlargest(limit, ranking)
+        bucks_for_doe = []
+        for _, _, k in best:
+            buck_id, tag_id, success_rate, recent = candidates[k]
+            inbreeding = related.get(k, 0.0)
+            bucks_for_doe.append({
+                "buck_id": buck_id,
+                "buck_tag_id": tag_id,
+                "predicted_inbreeding": inbreeding,
+                "exceeds_inbreeding_limit": inbreeding > max_inbreeding,
+                "success_rate": success_rate,
+                "recent_matings": recent,
+                "score": bases[k] - w_inbreeding * inbreeding,
+            })
+        recommendations.append({"doe_id": doe_id, "doe_tag_id": doe_tag_id, "bucks": bucks_for_doe})
+    return recommendations, unknown
@@ -0,0 +1,261 @@
+import csv
+import io
+import json
+from datetime import date
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.models import Animal
+from app.offspring import reconcile_offspring_counts
+from app.versions import bump_versions
+
+# Columns a bulk row may set directly; parents can also be referenced by tag via mother_tag_id/father_tag_id
+ANIMAL_IMPORT_FIELDS = (
+    "tag_id", "breed", "sex", "birth_date", "weight", "health_status", "notes",
+    "category", "image_url", "status", "acquisition_date", "acquisition_price",
+    "source", "mother_id", "father_id",
+)
+REQUIRED_FIELDS = ("tag_id", "breed", "sex")
+MAX_LENGTHS = {"tag_id": 50, "breed": 50, "sex": 10, "health_status": 100, "category": 50,
+               "image_url": 200, "status": 20, "source": 100}
+DATE_FIELDS = ("birth_date", "acquisition_date")
+FLOAT_FIELDS = ("weight", "acquisition_price")
+ID_FIELDS = ("mother_id", "father_id")
+DEFAULTS = {"health_status": "Healthy", "status": "Active", "offspring_count": 0}
+
+
+class BulkImportError(ValueError):
+    """Raised when the upload as a whole cannot be read."""
+
+
+def read_rows(request):
+    """Read animal rows from a JSON array, NDJSON or CSV body, or a multipart 'file' upload."""
+    upload = request.files.get("file")
+    if upload is not None:
+        text = upload.stream.read().decode("utf-8-sig")
+        filename = (upload.filename or "").lower()
+        if filename.endswith(".csv") or upload.mimetype == "text/csv":
+            kind = "csv"
+        elif filename.endswith((".ndjson", ".jsonl")) or upload.mimetype == "application/x-ndjson":
+            kind = "ndjson"
+        else:
+            kind = "json"
+    else:
+        text = request.get_data(as_text=True)
+        kind = {"text/csv": "csv", "application/x-ndjson": "ndjson"}.get(request.mimetype, "json")
+
+    try:
+        if kind == "csv":
+            # Empty CSV cells mean "not provided"
+            return [
+                {key: value for key, value in row.items() if key and value not in (None, "")}
+                for row in csv.DictReader(io.StringIO(text))
+            ]
+        if kind == "ndjson":
+            return [json.loads(line) for line in text.splitlines() if line.strip()]
+        payload = json.loads(text)
+    except (ValueError, csv.Error) as e:
+        raise BulkImportError(f"Could not parse {kind} upload: {e}")
+
+    if isinstance(payload, dict):
+        payload = payload.get("animals")
+    if not isinstance(payload, list):
+        raise BulkImportError("Expected a JSON array of animals")
+    return payload
+
+
+def validate_row(raw):
+    """Coerce one input row into insert values. Returns (values, parent tags, errors)."""
+    if not isinstance(raw, dict):
+        return None, {}, ["Row must be an object"]
+
+    values = {field: None for field in ANIMAL_IMPORT_FIELDS}
+    values.update(DEFAULTS)
+    errors = []
+
+    for field in ANIMAL_IMPORT_FIELDS:
+        value = raw.get(field)
+        if value is None:
+            continue
+        try:
+            if field in DATE_FIELDS:
+                value = date.fromisoformat(str(value))
+            elif field in FLOAT_FIELDS:
+                value = float(value)
+            elif field in ID_FIELDS:
+                value = int(value)
+            else:
+                value = str(value).strip()
+        except (ValueError, TypeError):
+            errors.append(f"Invalid {field}: {value!r}")
+            continue
+        if field in MAX_LENGTHS and len(value) > MAX_LENGTHS[field]:
+            errors.append(f"{field} is longer than {MAX_LENGTHS[field]} characters")
+        values[field] = value
+
+    for field in REQUIRED_FIELDS:
+        if not values.get(field):
+            errors.append(f"{field} is required")
+
+    parent_tags = {}
+    for parent in ("mother", "father"):
+        tag = raw.get(f"{parent}_tag_id")
+        if tag not in (None, ""):
+            if values[f"{parent}_id"] is not None:
+                errors.append(f"Give either {parent}_id or {parent}_tag_id, not both")
+            parent_tags[parent] = str(tag).strip()
+
+    return values, parent_tags, errors
+
+
+def _existing_tag_ids(tags):
+    tags = list(tags)
+    found = {}
+    for start in range(0, len(tags), 1000):
+        rows = db.session.execute(
+            select(Animal.tag_id, Animal.id).where(Animal.tag_id.in_(tags[start:start + 1000]))
+        )
+        found.update(dict(rows.all()))
+    return found
+
+
+def _existing_ids(ids):
+    ids = list(ids)
+    found = set()
+    for start in range(0, len(ids), 1000):
+        found.update(db.session.execute(
+            select(Animal.id).where(Animal.id.in_(ids[start:start + 1000]))
+        ).scalars())
+    return found
+
+
+def import_animals(raw_rows, chunk_size=1000):
+    """
+    Validate and insert animals in chunks, one transaction per chunk.
+
+    Parents referenced by tag are resolved against the batch itself and the
+    existing herd, so a file may list kids before their dams. Links to parents
+    inside the batch are written in a second executemany pass once every row
+    has an id. Returns a report with a per-row error list (rows are 1-based).
+    A row stored without a parent link has an error and counts as failed.
+    """
+    errors = {}
+    rows = []  # (row number, values, parent tags)
+    batch_tags = set()
+
+    for number, raw in enumerate(raw_rows, start=1):
+        values, parent_tags, row_errors = validate_row(raw)
+        tag = values.get("tag_id") if values else None
+        if tag and tag in batch_tags:
+            row_errors.append(f"Duplicate tag_id {tag} in upload")
+        if row_errors:
+            errors[number] = {"row": number, "tag_id": tag, "errors": row_errors}
+            continue
+        batch_tags.add(tag)
+        rows.append((number, values, parent_tags))
+
+    # One pass over the herd for every tag the upload mentions, and one for raw parent ids
+    referenced_tags = batch_tags | {tag for _, _, parents in rows for tag in parents.values()}
+    existing_tags = _existing_tag_ids(referenced_tags)
+    existing_ids = _existing_ids({values[f] for _, values, _ in rows for f in ID_FIELDS if values[f]})
+
+    valid = []
+    for number, values, parent_tags in rows:
+        row_errors = []
+        if values["tag_id"] in existing_tags:
+            row_errors.append(f"tag_id {values['tag_id']} already exists")
+        for parent in ("mother", "father"):
+            parent_id = values[f"{parent}_id"]
+            if parent_id is not None and parent_id not in existing_ids:
+                row_errors.append(f"{parent}_id {parent_id} not found")
+            tag = parent_tags.get(parent)
+            if tag is None:
+                continue
+            if tag in existing_tags:
+                # Already in the herd: link directly and skip the second pass
+                values[f"{parent}_id"] = existing_tags[tag]
+                del parent_tags[parent]
+            elif tag not in batch_tags:
+                row_errors.append(f"{parent}_tag_id {tag} not found in upload or herd")
+        if row_errors:
+            errors[number] = {"row": number, "tag_id": values["tag_id"], "errors": row_errors}
+        else:
+            valid.append((number, values, parent_tags))
+
+    # Phase 1: insert the animals themselves
+    animals = Animal.__table__
+    insert = animals.insert().returning(animals.c.id, animals.c.tag_id)
+    inserted = {}  # tag_id -> id
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        try:
+            result = db.session.execute(insert, [values for _, values, _ in chunk])
+            chunk_ids = dict((tag, animal_id) for animal_id, tag in result)
+            bump_versions("animals")
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            message = f"Chunk rolled back: {e.__class__.__name__}"
+            for number, values, _ in chunk:
+                errors[number] = {"row": number, "tag_id": values["tag_id"], "errors": [message]}
+            continue
+        inserted.update(chunk_ids)
+
+    def add_error(number, values, message):
+        errors.setdefault(number, {"row": number, "tag_id": values["tag_id"], "errors": []})["errors"].append(message)
+
+    # Phase 2: link kids to parents that were created by this same upload
+    links = []  # (row number, values, link params)
+    for number, values, parent_tags in valid:
+        animal_id = inserted.get(values["tag_id"])
+        if animal_id is None:
+            continue
+        link = {"b_id": animal_id, "b_mother_id": values["mother_id"], "b_father_id": values["father_id"]}
+        for parent, tag in parent_tags.items():
+            if tag in inserted:
+                link[f"b_{parent}_id"] = inserted[tag]
+            else:
+                add_error(number, values, f"Imported without {parent}: {tag} failed to import")
+        if parent_tags:
+            links.append((number, values, link))
+
+    update = (
+        animals.update()
+        .where(animals.c.id == bindparam("b_id"))
+        .values(mother_id=bindparam("b_mother_id"), father_id=bindparam("b_father_id"))
+    )
+    linked = []
+    for start in range(0, len(links), chunk_size):
+        chunk = links[start:start + chunk_size]
+        try:
+            db.session.execute(update, [link for _, _, link in chunk])
+            bump_versions("animals")
+            db.session.commit()
+        except SQLAlchemyError as e:
+            # The animals themselves were committed in phase 1; only their parent links are lost
+            db.session.rollback()
+            for number, values, _ in chunk:
+                add_error(number, values, f"Imported without parents: links rolled back: {e.__class__.__name__}")
+            continue
+        linked.extend(link for _, _, link in chunk)
+
+    # Core inserts skip the ORM counter hooks, so recount the parents this upload touched
+    parent_ids = {
+        parent_id
+        for values in [values for _, values, _ in valid] + linked
+        for parent_id in (values.get("mother_id"), values.get("father_id"),
+                          values.get("b_mother_id"), values.get("b_father_id"))
+        if parent_id is not None
+    }
+    if parent_ids:
+        reconcile_offspring_counts(parent_ids)
+
+    return {
+        "received": len(raw_rows),
+        "inserted": len(raw_rows) - len(errors),
+        "failed": len(errors),
+        "written": len(inserted),
+        "errors": [errors[number] for number in sorted(errors)]
+    }
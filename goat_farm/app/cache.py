@@ -0,0 +1,215 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.models import Animal, Expense, Sale, Treatment
+
+
+class LRUBackend:
+    """In-process LRU cache with per-entry TTLs. Each worker process has its own copy."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_counter(self, key):
+        return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared cache on any redis-py compatible client (get/setex/incr/delete)."""
+
+    def __init__(self, client, prefix="goatfarm:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.setex(self.prefix + key, ttl, json.dumps(value))
+
+    def get_counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class Cache:
+    """
+    Response cache for read-mostly endpoints.
+
+    Every cached view depends on one or more tags (table names). A write to a
+    tagged model bumps the tag's generation once its transaction commits, and
+    because generations are part of the cache key, stale entries are simply
+    never read again. TTLs bound staleness for writes the ORM never sees
+    (other processes with the LRU backend, raw SQL).
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.default_ttl = 30
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        backend = app.config.get("CACHE_BACKEND", "lru")
+        self.default_ttl = app.config.get("CACHE_DEFAULT_TTL", 30)
+        if backend == "redis":
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CACHE_BACKEND='redis' requires the redis package")
+            self.backend = RedisBackend(redis.Redis.from_url(app.config["CACHE_REDIS_URL"]))
+        elif backend == "lru":
+            self.backend = LRUBackend(app.config.get("CACHE_MAX_ENTRIES", 1024))
+        elif backend in (None, "none"):
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND {backend!r}")
+        self.hits = self.misses = self.invalidations = 0
+
+    def _key(self, tags):
+        generations = ":".join(str(self.backend.get_counter(f"tag:{tag}")) for tag in tags)
+        return f"view:{request.endpoint}:{request.query_string.decode()}:{generations}"
+
+    def cached(self, *tags, ttl=None):
+        """Cache a view's 200 responses until ttl expires or a tagged table changes."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.backend is None:
+                    return view(*args, **kwargs)
+
+                key = self._key(tags)
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self.hits += 1
+                    response = Response(entry["body"], status=entry["status"], mimetype=entry["mimetype"])
+                    response.headers["X-Cache"] = "HIT"
+                    return response
+
+                self.misses += 1
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    self.backend.set(key, {
+                        "body": response.get_data(as_text=True),
+                        "status": response.status_code,
+                        "mimetype": response.mimetype
+                    }, ttl or self.default_ttl)
+                response.headers["X-Cache"] = "MISS"
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, *tags):
+        if self.backend is None:
+            return
+        for tag in tags:
+            self.backend.incr(f"tag:{tag}")
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "entries": len(self.backend) if isinstance(self.backend, LRUBackend) else None
+        }
+
+
+cache = Cache()
+
+# Which cache tag a write to each model invalidates
+CACHE_TAGS = {
+    Sale: "sales",
+    Expense: "expenses",
+    Animal: "animals",
+}
+
+
+def _mark_changed(session, tag):
+    if session is not None:
+        session.info.setdefault("cache_tags", set()).add(tag)
+
+
+def _register_invalidation(model, tag):
+    def mark(mapper, connection, target):
+        _mark_changed(object_session(target), tag)
+
+    for name in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, name, mark)
+
+
+for _model, _tag in CACHE_TAGS.items():
+    _register_invalidation(_model, _tag)
+
+
+# add_treatment_expense writes expenses through Core, so the Expense events above never see them
+@event.listens_for(Treatment, "after_insert")
+def mark_treatment_expense_changed(mapper, connection, target):
+    if target.cost and target.cost > 0:
+        _mark_changed(object_session(target), "expenses")
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_tags(session):
+    tags = session.info.pop("cache_tags", None)
+    if tags:
+        cache.invalidate(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_rolled_back_tags(session):
+    session.info.pop("cache_tags", None)
@@ -0,0 +1,130 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.ledger import rebuild_cost_totals, verify_cost_totals
+from app.jobs import prune_expired_artifacts, requeue_stale_jobs, run_worker_pool, work
+from app.offspring import reconcile_offspring_counts, verify_offspring_counts
+from app.reminders import deliver_reminders, run_scheduler, scan_due_treatments
+from app.rollups import rebuild_sales_rollups
+from app.sync import prune_sync_history
+
+ledger_cli = AppGroup("ledger", help="Maintain the per-animal cost ledger.")
+rollups_cli = AppGroup("rollups", help="Maintain the daily/monthly/yearly sales rollups.")
+reminders_cli = AppGroup("reminders", help="Scan for due treatments and send reminders.")
+jobs_cli = AppGroup("jobs", help="Run and maintain the background job queue.")
+offspring_cli = AppGroup("offspring", help="Maintain the stored offspring_count/sired_count counters.")
+sync_cli = AppGroup("sync", help="Maintain the offline sync history.")
+
+
+@ledger_cli.command("rebuild")
+@click.option("--verify-only", is_flag=True, help="Report drift without rewriting the ledger.")
+def rebuild_ledger(verify_only):
+    """Backfill animal_cost_totals from animals and expenses, then verify it."""
+    if not verify_only:
+        count = rebuild_cost_totals()
+        click.echo(f"Rebuilt cost ledger for {count} animal(s).")
+
+    mismatches = verify_cost_totals()
+    for row in mismatches:
+        click.echo(
+            f"Animal {row['animal_id']}: ledger={row['stored_total']} expenses={row['expected_total']}",
+            err=True
+        )
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} ledger row(s) out of date.")
+    click.echo("Cost ledger verified.")
+
+
+@rollups_cli.command("rebuild")
+def rebuild_rollups():
+    """Recompute sales_rollups from the sales and expenses tables."""
+    count = rebuild_sales_rollups()
+    click.echo(f"Rebuilt {count} sales rollup row(s).")
+
+
+@offspring_cli.command("reconcile")
+@click.option("--verify-only", is_flag=True, help="Report drift without rewriting the counters.")
+def reconcile_offspring(verify_only):
+    """Recount every animal's children and fix counters that drifted."""
+    if verify_only:
+        mismatches = verify_offspring_counts()
+        for row in mismatches:
+            click.echo(
+                f"Animal {row['animal_id']}: offspring={row['offspring_count']} (expected {row['expected_offspring']}), "
+                f"sired={row['sired_count']} (expected {row['expected_sired']})",
+                err=True
+            )
+        if mismatches:
+            raise click.ClickException(f"{len(mismatches)} animal(s) with drifted counters.")
+        click.echo("Offspring counters verified.")
+        return
+
+    count = reconcile_offspring_counts()
+    click.echo(f"Fixed offspring counters for {count} animal(s).")
+
+
+@reminders_cli.command("scan")
+@click.option("--horizon", type=int, default=None, help="Days ahead to materialize (default REMINDER_HORIZON_DAYS).")
+def scan_reminders(horizon):
+    """Materialize reminders for treatments coming due."""
+    counts = scan_due_treatments(horizon_days=horizon)
+    click.echo(f"Created {counts['created']} reminder(s), cancelled {counts['cancelled']}.")
+
+
+@reminders_cli.command("deliver")
+def deliver_pending_reminders():
+    """Send every pending reminder through the configured notifier."""
+    sent, failed = deliver_reminders()
+    click.echo(f"Sent {sent} reminder(s), {failed} failed.")
+    if failed:
+        raise click.ClickException(f"{failed} reminder(s) could not be sent.")
+
+
+@reminders_cli.command("run")
+@click.option("--interval", type=int, default=None, help="Seconds between passes (default REMINDER_INTERVAL_SECONDS).")
+@click.option("--once", is_flag=True, help="Run a single scan + deliver pass and exit.")
+def run_reminder_worker(interval, once):
+    """Standalone worker: scan and deliver reminders on a fixed interval."""
+    interval = interval or current_app.config.get("REMINDER_INTERVAL_SECONDS", 300)
+    try:
+        run_scheduler(interval, once=once, log=click.echo)
+    except KeyboardInterrupt:
+        click.echo("Reminder worker stopped.")
+
+
+@jobs_cli.command("worker")
+@click.option("--processes", type=int, default=None, help="Worker processes (default JOB_WORKER_PROCESSES).")
+@click.option("--until-empty", is_flag=True, help="Exit once the queue is empty (single process).")
+def run_job_worker(processes, until_empty):
+    """Claim and run queued jobs."""
+    processes = processes or current_app.config.get("JOB_WORKER_PROCESSES", 2)
+    if until_empty or processes == 1:
+        done = work(until_empty=until_empty)
+        click.echo(f"Ran {done} job(s).")
+        return
+    click.echo(f"Starting {processes} job worker process(es).")
+    try:
+        run_worker_pool(processes, current_app.config["CONFIG_CLASS"])
+    except KeyboardInterrupt:
+        click.echo("Job workers stopped.")
+
+
+@jobs_cli.command("prune")
+def prune_jobs():
+    """Requeue jobs with expired leases and delete expired artifacts."""
+    requeued, failed = requeue_stale_jobs()
+    pruned = prune_expired_artifacts()
+    click.echo(f"Requeued {requeued} job(s), failed {failed}, pruned {pruned} artifact(s).")
+
+
+@sync_cli.command("prune")
+@click.option("--days", type=int, default=None, help="Keep this many days (default SYNC_TOMBSTONE_RETENTION_DAYS).")
+def prune_sync(days):
+    """Delete sync tombstones and receipts older than the retention window."""
+    deleted = prune_sync_history(days)
+    click.echo(f"Pruned {deleted} sync history row(s).")
+
+
+# Keep a list of all CLI command groups here
+all_commands = [ledger_cli, rollups_cli, offspring_cli, reminders_cli, jobs_cli, sync_cli]
@@ -0,0 +1,54 @@
+from sqlalchemy import String
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement, literal_column
+
+# Bucket keys are plain strings so every dialect groups, orders and serializes them the same way
+DATE_BUCKET_FORMATS = {
+    # grain: (Postgres to_char format, SQLite strftime format)
+    "day": ("YYYY-MM-DD", "%Y-%m-%d"),
+    # Weeks are keyed by their Monday
+    "week": ("YYYY-MM-DD", "%Y-%m-%d"),
+    "month": ("YYYY-MM", "%Y-%m"),
+    "year": ("YYYY", "%Y"),
+}
+# strftime modifiers that move a date to the start of its bucket (day/month/year only need the format)
+SQLITE_BUCKET_MODIFIERS = {"week": ", 'weekday 0', '-6 days'"}
+
+
+class date_bucket(FunctionElement):
+    """
+    Dialect-aware date bucketing: date_bucket(Sale.sale_date, "month") renders
+    to_char(date_trunc(...)) on Postgres and strftime(...) on SQLite, yielding
+    "2025-10" either way.
+    """
+    type = String()
+    name = "date_bucket"
+    inherit_cache = True
+
+    def __init__(self, expr, grain):
+        if grain not in DATE_BUCKET_FORMATS:
+            raise ValueError(f"Invalid grain {grain!r}. Allowed: {list(DATE_BUCKET_FORMATS)}")
+        self.grain = grain
+        super().__init__(expr, literal_column(f"'{grain}'"))
+
+    @property
+    def expr(self):
+        return list(self.clauses)[0]
+
+
+@compiles(date_bucket)
+@compiles(date_bucket, "postgresql")
+def _compile_postgresql(element, compiler, **kw):
+    pg_format, _ = DATE_BUCKET_FORMATS[element.grain]
+    return "to_char(date_trunc('%s', %s), '%s')" % (
+        element.grain, compiler.process(element.expr, **kw), pg_format
+    )
+
+
+@compiles(date_bucket, "sqlite")
+def _compile_sqlite(element, compiler, **kw):
+    _, sqlite_format = DATE_BUCKET_FORMATS[element.grain]
+    return "strftime('%s', %s%s)" % (
+        sqlite_format, compiler.process(element.expr, **kw), SQLITE_BUCKET_MODIFIERS.get(element.grain, "")
+    )
+
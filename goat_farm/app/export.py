@@ -0,0 +1,150 @@
+"""
+Streaming table exports (CSV, and Parquet when pyarrow is installed).
+
+Rows are read with yield_per (a server-side cursor on Postgres) and written a
+chunk at a time, so memory stays flat however large the table is. Only plain
+column tuples are fetched; no ORM objects are built.
+"""
+import csv
+import io
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric, select
+
+from app.extensions import db
+from app.models import Animal, Expense, Sale, Treatment
+
+# entity: (model, column the ?from=/?to= range filters on)
+EXPORT_SPECS = {
+    "sales": (Sale, "sale_date"),
+    "expenses": (Expense, "date"),
+    "animals": (Animal, "acquisition_date"),
+    "treatments": (Treatment, "treatment_date"),
+}
+EXPORT_FORMATS = ("csv", "parquet")
+
+
+class ExportError(ValueError):
+    """Raised for an unknown entity or an unusable date range."""
+
+
+def parse_date_range(args):
+    try:
+        start = date.fromisoformat(args["from"]) if args.get("from") else None
+        end = date.fromisoformat(args["to"]) if args.get("to") else None
+    except ValueError:
+        raise ExportError("Invalid date format. Please use YYYY-MM-DD.")
+    if start and end and start > end:
+        raise ExportError("from must not be after to")
+    return start, end
+
+
+def export_query(entity, start=None, end=None):
+    """SELECT every column of the entity's table, filtered on its date column and ordered by id."""
+    if entity not in EXPORT_SPECS:
+        raise ExportError(f"Unknown entity {entity!r}. Allowed: {list(EXPORT_SPECS)}")
+    model, date_column = EXPORT_SPECS[entity]
+    table = model.__table__
+    query = select(*table.columns).order_by(table.c.id)
+    if start is not None:
+        query = query.where(table.c[date_column] >= start)
+    if end is not None:
+        query = query.where(table.c[date_column] <= end)
+    return query
+
+
+def iter_chunks(query, chunk_size=None):
+    """Yield lists of row tuples, chunk_size at a time, from a streaming cursor."""
+    chunk_size = chunk_size or current_app.config.get("EXPORT_CHUNK_SIZE", 5000)
+    result = db.session.execute(query.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield partition
+
+
+def _csv_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(query, chunk_size=None):
+    """Generate the CSV document: a header line, then one string per chunk of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in query.selected_columns])
+    yield buffer.getvalue()
+
+    for chunk in iter_chunks(query, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _arrow_schema(pa, columns):
+    def arrow_type(column):
+        if isinstance(column.type, Boolean):
+            return pa.bool_()
+        if isinstance(column.type, Integer):
+            return pa.int64()
+        if isinstance(column.type, (Float, Numeric)):
+            return pa.float64()
+        if isinstance(column.type, DateTime):
+            return pa.timestamp("us")
+        if isinstance(column.type, Date):
+            return pa.date32()
+        return pa.string()
+    return pa.schema([pa.field(column.name, arrow_type(column)) for column in columns])
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def stream_parquet(query, chunk_size=None):
+    """Generate a Parquet file one row group per chunk. Requires pyarrow."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = list(query.selected_columns)
+    schema = _arrow_schema(pa, columns)
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for chunk in iter_chunks(query, chunk_size):
+            data = {column.name: [row[i] for row in chunk] for i, column in enumerate(columns)}
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,325 @@
+"""
+Per-request timing and SQL instrumentation, exported in Prometheus text format.
+
+Flask's request_started/request_finished signals bracket every request, and
+the engine's before/after_cursor_execute events time each statement the
+request runs. Per endpoint (the view name, so label cardinality stays
+bounded) we keep a latency histogram, a queries-per-request histogram and
+counters for database time, rows and slow queries. Statements slower than
+SLOW_QUERY_MS are also kept as samples (SQL text only, never parameters).
+
+The same hooks catch N+1 patterns: a SELECT of the same shape (whitespace
+and IN-lists normalized) executed N_PLUS_ONE_THRESHOLD times in one request
+is reported with the route and the app frames that issued it. With
+N_PLUS_ONE_MODE = "log" it goes to the app logger, with "raise" (the
+TestingConfig default) the request raises RepeatedQueryError so the test
+that made it fails. Views that repeat a query on purpose can opt out with
+allow_repeated_queries().
+
+Each app gets its own Instrumentation (settings and counters) in
+app.extensions["metrics"]; `metrics` is the current app's. Each process keeps
+its own numbers, so scrape every worker, or run one worker per scrape target.
+"""
+import os
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request, request_finished, request_started
+from sqlalchemy import event
+from werkzeug.local import LocalProxy
+
+from app.extensions import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+N_PLUS_ONE_MODES = ("off", "log", "raise")
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_IN_LIST = re.compile(r"\bIN\s*\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+))*\s*\)",
+                      re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_READ = re.compile(r"\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+class RepeatedQueryError(RuntimeError):
+    """Raised at the end of a request that ran the same SELECT too often (N_PLUS_ONE_MODE = "raise")."""
+
+
+def statement_shape(statement):
+    """Normalize a statement so executions differing only in bound values or IN-list length compare equal."""
+    return _WHITESPACE.sub(" ", _IN_LIST.sub("IN (?)", statement)).strip()
+
+
+def _app_stack(limit=8):
+    """The innermost frames of this app's own code (not libraries, not this module)."""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(APP_DIR) and not frame.filename.endswith("instrumentation.py")
+    ]
+    return traceback.format_list(frames[-limit:])
+
+
+def allow_repeated_queries(view):
+    """Exempt a view from N+1 detection, for ones that repeat a query by design (batched loops)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        stats = g.get("_request_stats")
+        if stats is not None:
+            stats.shapes = None
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class Histogram:
+    """Cumulative-bucket histogram, Prometheus style."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestStats:
+    """What one request did: kept on flask.g while it runs."""
+
+    __slots__ = ("started", "queries", "query_seconds", "rows", "shapes", "repeated")
+
+    def __init__(self, track_shapes=False):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.rows = 0
+        # SELECT shape -> executions, and (shape, stack) for those that reached the threshold
+        self.shapes = {} if track_shapes else None
+        self.repeated = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _bound(value):
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+class Instrumentation:
+    """Collects request and SQL metrics for the one app it is initialized with."""
+
+    def __init__(self):
+        self.enabled = False
+        self.server_timing = False
+        self.slow_query_seconds = 0.2
+        self.slow_query_samples_kept = 50
+        self.n_plus_one_mode = "off"
+        self.n_plus_one_threshold = 10
+        self._lock = threading.Lock()
+        self.reset()
+
+    def init_app(self, app):
+        if "metrics" in app.extensions:
+            raise RuntimeError("Instrumentation is already initialized for this app")
+        app.extensions["metrics"] = self
+        self.enabled = app.config.get("METRICS_ENABLED", True)
+        self.server_timing = app.config.get("METRICS_SERVER_TIMING", False)
+        self.slow_query_seconds = app.config.get("SLOW_QUERY_MS", 200) / 1000
+        self.slow_query_samples_kept = app.config.get("SLOW_QUERY_SAMPLES", 50)
+        self.log_slow_queries = app.config.get("SLOW_QUERY_LOG", False)
+        self.n_plus_one_mode = app.config.get("N_PLUS_ONE_MODE", "off")
+        if self.n_plus_one_mode not in N_PLUS_ONE_MODES:
+            raise ValueError(f"Unknown N_PLUS_ONE_MODE {self.n_plus_one_mode!r}. Allowed: {N_PLUS_ONE_MODES}")
+        self.n_plus_one_threshold = app.config.get("N_PLUS_ONE_THRESHOLD", 10)
+        self.slow_queries = deque(maxlen=self.slow_query_samples_kept)
+        if not self.enabled:
+            return
+
+        request_started.connect(self._request_started, app)
+        request_finished.connect(self._request_finished, app)
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def reset(self):
+        with self._lock:
+            self.latency = {}
+            self.requests = {}
+            self.queries_per_request = {}
+            self.query_seconds = {}
+            self.rows = {}
+            self.slow_counts = {}
+            self.repeated_counts = {}
+            self.slow_queries = deque(maxlen=self.slow_query_samples_kept)
+
+    # Flask signals
+    def _request_started(self, sender, **extra):
+        g._request_stats = RequestStats(track_shapes=self.n_plus_one_mode != "off")
+
+    def _request_finished(self, sender, response, **extra):
+        stats = g.pop("_request_stats", None)
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - stats.started
+        endpoint = request.endpoint or "unmatched"
+        with self._lock:
+            key = (endpoint, request.method)
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(elapsed)
+            status_key = (endpoint, request.method, response.status_code)
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            self.queries_per_request.setdefault(endpoint, Histogram(QUERY_COUNT_BUCKETS)).observe(stats.queries)
+            self.query_seconds[endpoint] = self.query_seconds.get(endpoint, 0.0) + stats.query_seconds
+            self.rows[endpoint] = self.rows.get(endpoint, 0) + stats.rows
+            if stats.repeated:
+                self.repeated_counts[endpoint] = self.repeated_counts.get(endpoint, 0) + len(stats.repeated)
+
+        if self.server_timing:
+            # Streamed responses are timed up to the first byte
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={stats.query_seconds * 1000:.1f};desc="{stats.queries} queries", '
+                f"app;dur={elapsed * 1000:.1f}"
+            )
+
+        if stats.repeated:
+            report = "\n\n".join(
+                f"{stats.shapes[shape]}x in {request.method} {request.path} ({endpoint}): {shape}\n"
+                f"first reached the threshold at:\n{''.join(stack)}"
+                for shape, stack in stats.repeated
+            )
+            if self.n_plus_one_mode == "raise":
+                raise RepeatedQueryError(f"Repeated queries (possible N+1):\n{report}")
+            sender.logger.warning("Repeated queries (possible N+1):\n%s", report)
+
+    # Engine events; statements outside a request (CLI, workers, heartbeat thread) are not recorded
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._instrumentation_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_instrumentation_started", None)
+        if started is None or not has_app_context():
+            return
+        stats = g.get("_request_stats")
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats.queries += 1
+        stats.query_seconds += elapsed
+        # DB-API rowcount: rows changed by DML; rows returned by SELECT where the driver reports
+        # it (psycopg2 does, sqlite3 doesn't)
+        if cursor.rowcount > 0:
+            stats.rows += cursor.rowcount
+
+        if stats.shapes is not None and _READ.match(statement):
+            shape = statement_shape(statement)
+            count = stats.shapes[shape] = stats.shapes.get(shape, 0) + 1
+            if count == self.n_plus_one_threshold:
+                stats.repeated.append((shape, _app_stack()))
+
+        if elapsed >= self.slow_query_seconds:
+            endpoint = request.endpoint or "unmatched"
+            if self.log_slow_queries:
+                current_app.logger.warning(
+                    "Slow query (%.1fms) in %s %s:\n%s\nfrom:\n%s",
+                    elapsed * 1000, request.method, request.path, statement, "".join(_app_stack())
+                )
+            with self._lock:
+                self.slow_counts[endpoint] = self.slow_counts.get(endpoint, 0) + 1
+                self.slow_queries.append({
+                    "endpoint": endpoint,
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "statement": statement[:2000],
+                    "at": datetime.now().isoformat(timespec="seconds"),
+                })
+
+    def slow_query_samples(self):
+        with self._lock:
+            return list(reversed(self.slow_queries))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                "# HELP goatfarm_http_requests_total Requests served, by endpoint, method and status.",
+                "# TYPE goatfarm_http_requests_total counter",
+            ]
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                labels = _labels(endpoint=endpoint, method=method, status=status)
+                lines.append(f"goatfarm_http_requests_total{labels} {count}")
+
+            lines += [
+                "# HELP goatfarm_http_request_duration_seconds Time to build the response, by endpoint.",
+                "# TYPE goatfarm_http_request_duration_seconds histogram",
+            ]
+            for (endpoint, method), histogram in sorted(self.latency.items()):
+                lines += self._histogram_lines("goatfarm_http_request_duration_seconds", histogram,
+                                               endpoint=endpoint, method=method)
+
+            lines += [
+                "# HELP goatfarm_db_queries_per_request SQL statements executed per request, by endpoint.",
+                "# TYPE goatfarm_db_queries_per_request histogram",
+            ]
+            for endpoint, histogram in sorted(self.queries_per_request.items()):
+                lines += self._histogram_lines("goatfarm_db_queries_per_request", histogram, endpoint=endpoint)
+
+            for name, help_text, values in (
+                ("goatfarm_db_query_seconds_total", "Time spent executing SQL, by endpoint.", self.query_seconds),
+                ("goatfarm_db_rows_total", "Rows returned or changed as reported by the driver, by endpoint.",
+                 self.rows),
+                ("goatfarm_db_slow_queries_total", "Statements slower than SLOW_QUERY_MS, by endpoint.",
+                 self.slow_counts),
+                ("goatfarm_db_repeated_queries_total",
+                 "SELECT shapes run N_PLUS_ONE_THRESHOLD+ times in one request (possible N+1), by endpoint.",
+                 self.repeated_counts),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                lines += [f"{name}{_labels(endpoint=endpoint)} {value}" for endpoint, value in sorted(values.items())]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(name, histogram, **labels):
+        lines = [
+            f"{name}_bucket{_labels(**labels, le=_bound(bound))} {count}"
+            for bound, count in histogram.cumulative()
+        ]
+        lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+        return lines
+
+
+def init_metrics(app):
+    """Give app its own Instrumentation, so a second app (tests, CLI) never touches the first one's."""
+    instrumentation = Instrumentation()
+    instrumentation.init_app(app)
+    return instrumentation
+
+
+# The current app's Instrumentation
+metrics = LocalProxy(lambda: current_app.extensions["metrics"])
@@ -0,0 +1,303 @@
+"""
+Database-backed job queue for heavy reports and exports.
+
+Jobs are rows in the `jobs` table; no broker is needed. Workers claim the
+next queued job with a conditional UPDATE (status = 'queued' -> 'running'),
+which is atomic on every database, so several worker processes can share
+the queue. A running job that stops heartbeating for JOB_LEASE_SECONDS is
+put back in the queue (or failed once it runs out of attempts).
+
+Results are written as artifacts under JOB_ARTIFACT_DIR and kept until
+expires_at. Submitting the same kind and params while a fresh artifact (or
+an unfinished job) exists returns that job instead of queueing another.
+A partial unique index on queued/running jobs settles concurrent submits.
+
+Handlers are registered with @job_handler(kind). The report handlers
+re-dispatch an existing endpoint inside the worker, so a report is computed
+the same way whether it runs inline or out-of-band.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import Job
+
+JOB_HANDLERS = {}
+
+
+class JobError(ValueError):
+    """Raised when a job cannot be submitted (unknown kind, bad params)."""
+
+
+def job_handler(kind):
+    """Register fn(params) -> (body bytes or str, mimetype, file extension) as the handler for kind."""
+    def decorator(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def dispatch_view(path, query=None, headers=None):
+    """Run an endpoint of this app inside the worker and return its body and mimetype."""
+    app = current_app._get_current_object()
+    with app.test_request_context(path, query_string=query or {}, headers=headers or {}):
+        response = app.full_dispatch_request()
+        body = response.get_data()
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}: {body[:200]!r}")
+    return body, response.mimetype
+
+
+def _report(kind, path, headers=None, extension="json", allowed_params=()):
+    @job_handler(kind)
+    def run(params):
+        unknown = set(params) - set(allowed_params)
+        if unknown:
+            raise JobError(f"Unknown params for {kind}: {sorted(unknown)}")
+        body, mimetype = dispatch_view(path, {k: str(v) for k, v in params.items()}, headers)
+        return body, mimetype, extension
+    run.allowed_params = allowed_params
+    return run
+
+
+_report("sales_stats_daily", "/sales/stats/daily", allowed_params=("fresh",))
+_report("sales_stats_monthly", "/sales/stats/monthly", allowed_params=("fresh",))
+_report("sales_stats_yearly", "/sales/stats/yearly", allowed_params=("fresh",))
+_report("animals_export", "/animals/archive", headers={"Accept": "application/x-ndjson"},
+        extension="ndjson", allowed_params=("status", "include"))
+
+
+def params_hash(kind, params):
+    canonical = json.dumps([kind, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _live_job(kind, digest):
+    """The newest queued/running job, or fresh artifact, for this kind and params hash."""
+    return (
+        Job.query
+        .filter(Job.kind == kind, Job.params_hash == digest)
+        .filter(or_(
+            Job.status.in_(("queued", "running")),
+            and_(Job.status == "succeeded", Job.expires_at > datetime.now())
+        ))
+        .order_by(Job.id.desc())
+        .first()
+    )
+
+
+def submit_job(kind, params=None, priority=100):
+    """Queue a job, or return the live job/artifact for the same kind and params. Returns (job, created)."""
+    if kind not in JOB_HANDLERS:
+        raise JobError(f"Unknown job kind {kind!r}. Allowed: {sorted(JOB_HANDLERS)}")
+    params = params or {}
+    if not isinstance(params, dict):
+        raise JobError("params must be an object")
+    allowed = getattr(JOB_HANDLERS[kind], "allowed_params", None)
+    if allowed is not None and set(params) - set(allowed):
+        raise JobError(f"Unknown params for {kind}: {sorted(set(params) - set(allowed))}. Allowed: {list(allowed)}")
+
+    digest = params_hash(kind, params)
+    existing = _live_job(kind, digest)
+    if existing is not None:
+        return existing, False
+
+    job = Job(
+        kind=kind,
+        params=json.dumps(params, sort_keys=True),
+        params_hash=digest,
+        priority=priority,
+        max_attempts=current_app.config.get("JOB_MAX_ATTEMPTS", 3)
+    )
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent submit queued the same job first (uq_jobs_active_kind_params_hash)
+        db.session.rollback()
+        existing = _live_job(kind, digest)
+        if existing is None:
+            raise
+        return existing, False
+    return job, True
+
+
+def claim_next_job(worker_id):
+    """Atomically move the next queued job to running. Returns the job or None."""
+    jobs = Job.__table__
+    while True:
+        job_id = db.session.execute(
+            select(jobs.c.id).where(jobs.c.status == "queued").order_by(jobs.c.priority, jobs.c.id).limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.commit()
+            return None
+        now = datetime.now()
+        claimed = db.session.execute(
+            jobs.update()
+            .where(jobs.c.id == job_id, jobs.c.status == "queued")
+            .values(status="running", worker_id=worker_id, started_at=now, heartbeat_at=now,
+                    attempts=jobs.c.attempts + 1)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id, populate_existing=True)
+        # Another worker got there first; try the next one
+
+
+def artifact_dir():
+    path = current_app.config.get("JOB_ARTIFACT_DIR") or os.path.join(current_app.instance_path, "job_artifacts")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class Heartbeat:
+    """Refresh a running job's heartbeat_at from a side thread so long jobs keep their lease."""
+
+    def __init__(self, job_id, interval):
+        self.engine = db.engine
+        self.job_id = job_id
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._beat, daemon=True)
+
+    def _beat(self):
+        jobs = Job.__table__
+        while not self.stopped.wait(self.interval):
+            with self.engine.begin() as connection:
+                connection.execute(
+                    jobs.update().where(jobs.c.id == self.job_id, jobs.c.status == "running")
+                    .values(heartbeat_at=datetime.now())
+                )
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+def run_job(job):
+    """Execute a claimed job and store its artifact. Never raises; failures are recorded on the job."""
+    lease = current_app.config.get("JOB_LEASE_SECONDS", 600)
+    try:
+        with Heartbeat(job.id, max(lease / 3, 1)):
+            body, mimetype, extension = JOB_HANDLERS[job.kind](json.loads(job.params))
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        path = os.path.join(artifact_dir(), f"job-{job.id}.{extension}")
+        with open(path, "wb") as artifact:
+            artifact.write(body)
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job.id)
+        job.error = f"{e.__class__.__name__}: {e}"
+        # Bad params never succeed; anything else is retried until attempts run out
+        retry = not isinstance(e, JobError) and job.attempts < job.max_attempts
+        job.status = "queued" if retry else "failed"
+        job.finished_at = None if retry else datetime.now()
+    else:
+        ttl = current_app.config.get("JOB_RESULT_TTL", 3600)
+        job.status = "succeeded"
+        job.error = None
+        job.result_path = path
+        job.result_mimetype = mimetype
+        job.result_size = len(body)
+        job.finished_at = datetime.now()
+        job.expires_at = job.finished_at + timedelta(seconds=ttl)
+    db.session.commit()
+    return job
+
+
+def requeue_stale_jobs():
+    """Put back jobs whose worker stopped heartbeating; fail them once attempts run out."""
+    jobs = Job.__table__
+    cutoff = datetime.now() - timedelta(seconds=current_app.config.get("JOB_LEASE_SECONDS", 600))
+    stale = and_(jobs.c.status == "running", jobs.c.heartbeat_at < cutoff)
+    requeued = db.session.execute(
+        jobs.update().where(stale, jobs.c.attempts < jobs.c.max_attempts)
+        .values(status="queued", worker_id=None, error="Worker lease expired")
+    ).rowcount
+    failed = db.session.execute(
+        jobs.update().where(stale)
+        .values(status="failed", finished_at=datetime.now(), error="Worker lease expired")
+    ).rowcount
+    db.session.commit()
+    return requeued, failed
+
+
+def prune_expired_artifacts():
+    """Delete artifact files past expires_at. The job rows stay as history."""
+    expired = Job.query.filter(Job.status == "succeeded", Job.expires_at <= datetime.now(),
+                               Job.result_path.isnot(None)).all()
+    for job in expired:
+        try:
+            os.remove(job.result_path)
+        except FileNotFoundError:
+            pass
+        job.result_path = None
+    db.session.commit()
+    return len(expired)
+
+
+def work(worker_id=None, poll_interval=None, max_jobs=None, until_empty=False):
+    """Worker loop: claim and run jobs until stopped (or the queue is empty with until_empty)."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    poll_interval = poll_interval or current_app.config.get("JOB_POLL_INTERVAL", 2)
+    done = 0
+    last_maintenance = 0.0
+    while max_jobs is None or done < max_jobs:
+        if time.monotonic() - last_maintenance > 60:
+            requeue_stale_jobs()
+            prune_expired_artifacts()
+            last_maintenance = time.monotonic()
+
+        job = claim_next_job(worker_id)
+        if job is None:
+            if until_empty:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        done += 1
+    return done
+
+
+def _worker_process(config_class, worker_id, poll_interval):
+    from app import create_app
+
+    app = create_app(config_class)
+    with app.app_context():
+        work(worker_id, poll_interval)
+
+
+def run_worker_pool(processes, config_class, poll_interval=None):
+    """Start `processes` worker processes, each with its own app and connection pool, and wait on them."""
+    context = multiprocessing.get_context("spawn")
+    hostname = socket.gethostname()
+    pool = [
+        context.Process(target=_worker_process, args=(config_class, f"{hostname}:worker-{n}", poll_interval),
+                        daemon=True)
+        for n in range(processes)
+    ]
+    for process in pool:
+        process.start()
+    try:
+        for process in pool:
+            process.join()
+    finally:
+        for process in pool:
+            if process.is_alive():
+                process.terminate()
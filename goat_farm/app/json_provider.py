@@ -0,0 +1,73 @@
+"""
+JSON providers for app.json (jsonify, NDJSON streaming, request.get_json).
+
+JSON_PROVIDER picks one: "orjson" (fast, C), "stdlib" (Flask's provider) or
+"auto", which uses orjson when it is installed. Both write dates and
+datetimes as ISO 8601 and Decimals as strings, so responses look the same
+whichever is active. orjson output is compact and not key-sorted.
+"""
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+JSON_PROVIDERS = ("auto", "orjson", "stdlib")
+
+
+def _default(o):
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's provider, with ISO dates instead of HTTP dates."""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(JSONProvider):
+    """orjson-backed provider: dates, datetimes, UUIDs and dataclasses are handled in C."""
+
+    def __init__(self, app):
+        import orjson
+
+        super().__init__(app)
+        self._orjson = orjson
+        self._option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return self._orjson.dumps(obj, default=_default, option=self._option).decode()
+
+    def loads(self, s, **kwargs):
+        return self._orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self._orjson.dumps(obj, default=_default, option=self._option | self._orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype="application/json")
+
+
+def orjson_available():
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def make_json_provider(app):
+    kind = app.config.get("JSON_PROVIDER", "auto")
+    if kind not in JSON_PROVIDERS:
+        raise ValueError(f"Unknown JSON_PROVIDER {kind!r}. Allowed: {list(JSON_PROVIDERS)}")
+    if kind == "orjson" or (kind == "auto" and orjson_available()):
+        return OrjsonProvider(app)
+    return StdlibJSONProvider(app)
@@ -0,0 +1,84 @@
+from sqlalchemy import func, or_, select
+
+from app.extensions import db
+from app.models import Animal, AnimalCostTotal, Expense, refresh_cost_total
+from app.versions import bump_versions
+
+
+def get_cost_total(animal_id):
+    """Return the ledger row for an animal, building it on first use."""
+    cost_total = db.session.get(AnimalCostTotal, animal_id)
+    if cost_total is None:
+        refresh_cost_total(db.session.connection(), animal_id)
+        cost_total = db.session.get(AnimalCostTotal, animal_id)
+    return cost_total
+
+
+def _expected_cost_totals():
+    expense_totals = (
+        select(
+            Expense.animal_id.label("animal_id"),
+            func.sum(Expense.amount).label("expense_total"),
+            func.max(Expense.date).label("last_expense_date")
+        )
+        .where(Expense.animal_id.isnot(None))
+        .group_by(Expense.animal_id)
+    ).subquery()
+
+    return (
+        select(
+            Animal.id.label("animal_id"),
+            Animal.acquisition_price.label("acquisition_price"),
+            func.coalesce(expense_totals.c.expense_total, 0.0).label("expense_total"),
+            expense_totals.c.last_expense_date.label("last_expense_date")
+        )
+        .outerjoin(expense_totals, expense_totals.c.animal_id == Animal.id)
+    )
+
+
+def rebuild_cost_totals():
+    """Truncate and backfill the ledger with one INSERT ... SELECT. Returns the row count."""
+    ledger = AnimalCostTotal.__table__
+    expected = _expected_cost_totals()
+
+    db.session.execute(ledger.delete())
+    db.session.execute(
+        ledger.insert().from_select(
+            ["animal_id", "acquisition_price", "expense_total", "last_expense_date"],
+            expected
+        )
+    )
+    bump_versions("expenses")
+    db.session.commit()
+    return db.session.query(func.count(AnimalCostTotal.animal_id)).scalar()
+
+
+def verify_cost_totals(tolerance=0.005):
+    """List animals whose ledger row is missing or disagrees with the expenses table."""
+    expected = _expected_cost_totals().subquery()
+    ledger = AnimalCostTotal.__table__
+
+    mismatches = db.session.execute(
+        select(
+            expected.c.animal_id,
+            expected.c.expense_total.label("expected_total"),
+            ledger.c.expense_total.label("stored_total")
+        )
+        .outerjoin(ledger, ledger.c.animal_id == expected.c.animal_id)
+        .where(or_(
+            ledger.c.animal_id.is_(None),
+            func.abs(ledger.c.expense_total - expected.c.expense_total) > tolerance,
+            ledger.c.acquisition_price.is_distinct_from(expected.c.acquisition_price),
+            ledger.c.last_expense_date.is_distinct_from(expected.c.last_expense_date)
+        ))
+        .order_by(expected.c.animal_id)
+    ).all()
+
+    return [
+        {
+            "animal_id": row.animal_id,
+            "expected_total": row.expected_total,
+            "stored_total": row.stored_total
+        }
+        for row in mismatches
+    ]
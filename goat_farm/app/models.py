@@ -1,10 +1,45 @@
+import json
 from datetime import date,timedelta
 from app.extensions import db
-from sqlalchemy import event
+from sqlalchemy import event, case, func, inspect, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+# SQLite's CURRENT_TIMESTAMP stores 'YYYY-MM-DD HH:MM:SS'. Bind datetimes in that same
+# format, or a keyset cursor (?order=updated_at, /sync tokens) never equals a stored value
+# and rows sharing its second are skipped.
+Timestamp = db.DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
+# Nested sections Animal.to_dict can embed (?include=treatments,sale)
+ANIMAL_INCLUDES = ("treatments", "sale")
+
+# Treatment types the API accepts; "Other" takes a custom_type instead
+ALLOWED_TREATMENT_TYPES = [
+    "Vaccination",
+    "Deworming",
+    "Antibiotic",
+    "Check-up",
+    "Surgery",
+    "Vitamin Supplement",
+    "Other"
+]
 
 
 class Animal(db.Model):
     __tablename__ = "animals"
+    __table_args__ = (
+        db.Index("ix_animals_status_id", "status", "id"),
+        # Active-herd listing (/animals/get) only ever touches this slice of the table
+        db.Index("ix_animals_active_id", "id",
+                 postgresql_where=db.text("status = 'Active'"), sqlite_where=db.text("status = 'Active'")),
+        db.Index("ix_animals_category", "category"),
+        db.Index("ix_animals_mother_id", "mother_id"),
+        db.Index("ix_animals_father_id", "father_id"),
+        # Delta sync and ?order=updated_at page on (updated_at, id)
+        db.Index("ix_animals_updated_at_id", "updated_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tag_id = db.Column(db.String(50), unique=True, nullable=False)
@@ -17,12 +52,14 @@ class Animal(db.Model):
     category = db.Column(db.String(50), nullable=True)  # Kid, Doe, Buck,dairy, meat, breeding, etc.
     image_url = db.Column(db.String(200), nullable=True)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
-    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+    updated_at = db.Column(Timestamp, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
     status= db.Column(db.String(20), default="Active")  # Active, Sold, Deceased, etc.
     acquisition_date = db.Column(db.Date, nullable=True)
     acquisition_price = db.Column(db.Float, nullable=True)
     source = db.Column(db.String(100), nullable=True) 
+    # Maintained by app/offspring.py: every child, and the children sired
     offspring_count = db.Column(db.Integer, default=0)
+    sired_count = db.Column(db.Integer, default=0)
 
     mother_id = db.Column(db.Integer, db.ForeignKey("animals.id"), nullable=True)
     father_id = db.Column(db.Integer, db.ForeignKey("animals.id"), nullable=True)
@@ -54,8 +91,9 @@ class Animal(db.Model):
     def __repr__(self):
         return f"<Animal {self.tag_id} - {self.breed}>"
     
-    def to_dict(self):
-        return {
+    def to_dict(self, include=ANIMAL_INCLUDES):
+        # include picks the nested sections to embed
+        data = {
             "id": self.id,
             "tag_id": self.tag_id,
             "breed": self.breed,
@@ -72,17 +110,26 @@ class Animal(db.Model):
             "father_id": self.father_id,
             "created_at": self.created_at,
             "updated_at": self.updated_at,  
-            "treatments": [t.to_dict() for t in self.treatments],
-            "sale": self.sale.to_dict() if self.sale else None,
             "acquisition_date": self.acquisition_date,
             "acquisition_price": self.acquisition_price,
             "source": self.source,
-            "offspring_count": len(self.offspring) if self.offspring else 0
         }
+        if "treatments" in include:
+            data["treatments"] = [t.to_dict() for t in self.treatments]
+        if "sale" in include:
+            data["sale"] = self.sale.to_dict() if self.sale else None
+        data["offspring_count"] = self.offspring_count or 0
+        data["sired_count"] = self.sired_count or 0
+        return data
 
 
 class Treatment(db.Model):
     __tablename__ = "treatments"
+    __table_args__ = (
+        db.Index("ix_treatments_animal_id", "animal_id"),
+        db.Index("ix_treatments_next_due_date", "next_due_date"),
+        db.Index("ix_treatments_updated_at_id", "updated_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     animal_id = db.Column(db.Integer, db.ForeignKey("animals.id"), nullable=False)
@@ -94,6 +141,8 @@ class Treatment(db.Model):
     notes = db.Column(db.Text, nullable=True)  #Extra details, context, instructions
     outcome = db.Column(db.String(100), nullable=True)  # e.g. Recovered, Ongoing, etc.
     cost = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    updated_at = db.Column(Timestamp, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
 
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
@@ -117,11 +166,157 @@ class Treatment(db.Model):
             "notes": self.notes,
             "outcome": self.outcome,
             "cost": self.cost,
-            "treated_by": self.user_id
+            "treated_by": self.user_id,
+            "updated_at": self.updated_at
         }
     
+class Reminder(db.Model):
+    """
+    Materialized treatment reminders, filled by the scheduler in app/reminders.py.
+    One row per animal, treatment type and due date, so re-scanning is idempotent.
+    """
+    __tablename__ = "reminders"
+    __table_args__ = (
+        db.UniqueConstraint("animal_id", "treatment_type", "due_date", name="uq_reminders_animal_type_due"),
+        db.Index("ix_reminders_status_due_date", "status", "due_date"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    treatment_id = db.Column(db.Integer, db.ForeignKey("treatments.id", ondelete="SET NULL"), nullable=True)
+    animal_id = db.Column(db.Integer, db.ForeignKey("animals.id", ondelete="CASCADE"), nullable=False)
+    treatment_type = db.Column(db.String(50), nullable=False)
+    due_date = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending, sent, cancelled, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Reminder {self.treatment_type} for Animal {self.animal_id} due {self.due_date}>"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "treatment_id": self.treatment_id,
+            "animal_id": self.animal_id,
+            "treatment_type": self.treatment_type,
+            "due_date": self.due_date.isoformat(),
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "created_at": self.created_at,
+            "sent_at": self.sent_at,
+        }
+
+class Job(db.Model):
+    """
+    Background job queue (see app/jobs.py). Workers claim queued rows with a
+    conditional UPDATE, so any number of worker processes can share the table.
+    At most one queued or running job exists per kind and params.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        db.Index("ix_jobs_status_priority_id", "status", "priority", "id"),
+        db.Index("ix_jobs_kind_params_hash", "kind", "params_hash"),
+        db.Index(
+            "uq_jobs_active_kind_params_hash", "kind", "params_hash", unique=True,
+            postgresql_where=db.text("status IN ('queued', 'running')"),
+            sqlite_where=db.text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False, default="{}")  # JSON
+    params_hash = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    priority = db.Column(db.Integer, nullable=False, default=100)  # lower runs first
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    worker_id = db.Column(db.String(100), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    result_path = db.Column(db.String(500), nullable=True)
+    result_mimetype = db.Column(db.String(100), nullable=True)
+    result_size = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.kind} - {self.status}>"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": json.loads(self.params or "{}"),
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "result_mimetype": self.result_mimetype,
+            "result_size": self.result_size,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "expires_at": self.expires_at,
+        }
+
+class TableVersion(db.Model):
+    """
+    Change counter per table, bumped in the same transaction as every write to
+    it (see app/versions.py). ETags and Last-Modified for list endpoints are
+    built from these rows, so every worker process agrees on them.
+    """
+    __tablename__ = "table_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True)  # UTC
+
+    def __repr__(self):
+        return f"<TableVersion {self.name} v{self.version}>"
+
+class SyncTombstone(db.Model):
+    """
+    One row per deleted animal, treatment or expense, so /sync can tell
+    offline clients what to drop. Pruned after SYNC_TOMBSTONE_RETENTION_DAYS.
+    """
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        db.Index("ix_sync_tombstones_deleted_at_id", "deleted_at", "id"),
+        db.Index("ix_sync_tombstones_table_row", "table_name", "row_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(Timestamp, nullable=False, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f"<SyncTombstone {self.table_name} {self.row_id}>"
+
+
+class SyncReceipt(db.Model):
+    """Rows created by POST /sync, keyed by device, the device's id and table so a retried batch does not create them twice."""
+    __tablename__ = "sync_receipts"
+
+    device_id = db.Column(db.String(64), primary_key=True)
+    client_id = db.Column(db.String(64), primary_key=True)
+    table_name = db.Column(db.String(50), primary_key=True)
+    row_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f"<SyncReceipt {self.client_id} -> {self.table_name} {self.row_id}>"
+
 class Sale(db.Model):
     __tablename__ = "sales"
+    __table_args__ = (
+        db.Index("ix_sales_sale_date", "sale_date"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     animal_id = db.Column(db.Integer, db.ForeignKey("animals.id"), unique=True, nullable=False)  # one-to-one
@@ -190,9 +385,16 @@ def add_treatment_expense(mapper, connection, target):
                 notes=f"{target.treatment_type} ({target.medication})"
             )   
         )
+        # Core inserts bypass the Expense ORM events, so keep the cost ledger in step here
+        add_expense_to_cost_total(connection, target.animal_id, target.cost, target.treatment_date)
 
 class Expense(db.Model):
     __tablename__ = "expenses"
+    __table_args__ = (
+        db.Index("ix_expenses_animal_id_date", "animal_id", "date"),
+        db.Index("ix_expenses_date", "date"),
+        db.Index("ix_expenses_updated_at_id", "updated_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     expense_type = db.Column(db.String(50), nullable=False)  # Feed, Vet, Staff, etc.
@@ -208,7 +410,7 @@ class Expense(db.Model):
     # user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
 
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
-    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+    updated_at = db.Column(Timestamp, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
     def __repr__(self):
         return f"<Expense {self.expense_type} - {self.amount}>"
@@ -227,13 +429,179 @@ class Expense(db.Model):
 
 
 
+class AnimalCostTotal(db.Model):
+    """
+    Materialized per-animal cost ledger (acquisition price + running expense
+    total), kept current by the hooks below so sales and profit reports never
+    re-aggregate the expenses table. Rebuild with `flask ledger rebuild`.
+    """
+    __tablename__ = "animal_cost_totals"
+
+    animal_id = db.Column(db.Integer, db.ForeignKey("animals.id", ondelete="CASCADE"), primary_key=True)
+    acquisition_price = db.Column(db.Float, nullable=True)
+    expense_total = db.Column(db.Float, nullable=False, default=0.0)
+    last_expense_date = db.Column(db.Date, nullable=True)
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+    @property
+    def total_cost(self):
+        return (self.acquisition_price or 0.0) + (self.expense_total or 0.0)
+
+    def __repr__(self):
+        return f"<AnimalCostTotal Animal {self.animal_id} - {self.total_cost}>"
+
+    def to_dict(self):
+        return {
+            "animal_id": self.animal_id,
+            "acquisition_price": self.acquisition_price,
+            "expense_total": self.expense_total,
+            "total_cost": self.total_cost,
+            "last_expense_date": self.last_expense_date,
+            "updated_at": self.updated_at
+        }
+
+
+def dialect_insert(connection, table):
+    """
+    INSERT with on_conflict_do_update for the connection's backend (PostgreSQL or
+    SQLite), or None on other backends, where callers UPDATE and then INSERT.
+    """
+    insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(connection.dialect.name)
+    return insert(table) if insert is not None else None
+
+
+def refresh_cost_total(connection, animal_id):
+    """Recompute one animal's ledger row from the animals and expenses tables."""
+    animals = Animal.__table__
+    expenses = Expense.__table__
+    ledger = AnimalCostTotal.__table__
+
+    acquisition_price = connection.execute(
+        select(animals.c.acquisition_price).where(animals.c.id == animal_id)
+    ).scalar()
+    expense_total, last_expense_date = connection.execute(
+        select(func.coalesce(func.sum(expenses.c.amount), 0.0), func.max(expenses.c.date))
+        .where(expenses.c.animal_id == animal_id)
+    ).one()
+
+    values = dict(
+        acquisition_price=acquisition_price,
+        expense_total=expense_total,
+        last_expense_date=last_expense_date,
+        updated_at=func.current_timestamp()
+    )
+    insert = dialect_insert(connection, ledger)
+    if insert is None:
+        result = connection.execute(ledger.update().where(ledger.c.animal_id == animal_id).values(**values))
+        if result.rowcount == 0:
+            connection.execute(ledger.insert().values(animal_id=animal_id, **values))
+        return
+    # One statement, so two writers creating the same animal's row cannot both insert it
+    insert = insert.values(animal_id=animal_id, **values)
+    connection.execute(insert.on_conflict_do_update(index_elements=[ledger.c.animal_id], set_=values))
+
+
+def add_expense_to_cost_total(connection, animal_id, amount, expense_date):
+    """Incrementally add a new expense to the animal's ledger row."""
+    if not animal_id:
+        return
+    ledger = AnimalCostTotal.__table__
+    values = dict(expense_total=ledger.c.expense_total + (amount or 0.0), updated_at=func.current_timestamp())
+    if expense_date is not None:
+        values["last_expense_date"] = case(
+            (or_(ledger.c.last_expense_date.is_(None), ledger.c.last_expense_date < expense_date), expense_date),
+            else_=ledger.c.last_expense_date
+        )
+    result = connection.execute(ledger.update().where(ledger.c.animal_id == animal_id).values(**values))
+    if result.rowcount == 0:
+        # No ledger row yet (e.g. created before the ledger existed): build it from scratch
+        refresh_cost_total(connection, animal_id)
+
+
+@event.listens_for(Animal, "after_insert")
+def create_cost_total(mapper, connection, target):
+    connection.execute(
+        AnimalCostTotal.__table__.insert().values(
+            animal_id=target.id,
+            acquisition_price=target.acquisition_price,
+            expense_total=0.0
+        )
+    )
+
+
+@event.listens_for(Animal, "after_update")
+def update_cost_total_acquisition(mapper, connection, target):
+    if inspect(target).attrs.acquisition_price.history.has_changes():
+        refresh_cost_total(connection, target.id)
+
+
+@event.listens_for(Animal, "before_delete")
+def delete_cost_total(mapper, connection, target):
+    ledger = AnimalCostTotal.__table__
+    connection.execute(ledger.delete().where(ledger.c.animal_id == target.id))
+
+
+@event.listens_for(Expense, "after_insert")
+def add_expense_cost(mapper, connection, target):
+    add_expense_to_cost_total(connection, target.animal_id, target.amount, target.date)
+
+
+@event.listens_for(Expense, "after_update")
+def update_expense_cost(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in ("amount", "date", "animal_id")):
+        return
+    # An edit can move the expense between animals, so refresh both sides
+    animal_ids = set(state.attrs.animal_id.history.deleted or ()) | {target.animal_id}
+    for animal_id in animal_ids:
+        if animal_id:
+            refresh_cost_total(connection, animal_id)
+
+
+@event.listens_for(Expense, "after_delete")
+def delete_expense_cost(mapper, connection, target):
+    if target.animal_id:
+        refresh_cost_total(connection, target.animal_id)
+
+
+class SalesRollup(db.Model):
+    """
+    Pre-aggregated sales totals per day, month and year. Kept current by the
+    listeners in app/rollups.py; rebuild with `flask rollups rebuild`.
+    """
+    __tablename__ = "sales_rollups"
+
+    grain = db.Column(db.String(5), primary_key=True)  # day, month, year
+    period = db.Column(db.String(10), primary_key=True)  # 2025-10-10, 2025-10, 2025
+    period_start = db.Column(db.Date, nullable=False)
+    total_sales = db.Column(db.Integer, nullable=False, default=0)
+    total_revenue = db.Column(db.Float, nullable=False, default=0.0)
+    total_expenses = db.Column(db.Float, nullable=False, default=0.0)  # expenses of the animals sold
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+    @property
+    def total_profit(self):
+        return (self.total_revenue or 0.0) - (self.total_expenses or 0.0)
+
+    def __repr__(self):
+        return f"<SalesRollup {self.grain} {self.period} - {self.total_revenue}>"
+
+
 class Breeding(db.Model):
     __tablename__ = "breeding_records"
+    __table_args__ = (
+        db.Index("ix_breeding_records_doe_id", "doe_id"),
+        db.Index("ix_breeding_records_buck_id", "buck_id"),
+        db.Index("ix_breeding_records_expected_kidding_date", "expected_kidding_date"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     mating_date = db.Column(db.Date, nullable=False, default=date.today)
     expected_kidding_date = db.Column(db.Date, nullable=True)
     status = db.Column(db.String(50), nullable=False, default="Pending") # e.g., Pending, Confirmed, Completed, Failed
+    # Filled in by the kidding outcome
+    kidding_date = db.Column(db.Date, nullable=True)
+    kids_born = db.Column(db.Integer, nullable=True)
 
     '''Status in this model answers the following questions:
     -"Which of my does are pregnant right now?"
@@ -251,6 +619,7 @@ class Breeding(db.Model):
     buck = db.relationship("Animal", foreign_keys=[buck_id], backref="matings_as_buck")
 
     def to_dict(self):
+        # doe/buck should be eager-loaded (serializers.breeding_load_options) so listings don't load them per row
         return {
             "id": self.id,
             "doe_id": self.doe_id,
@@ -260,6 +629,8 @@ class Breeding(db.Model):
             "mating_date": self.mating_date.isoformat(),
             "expected_kidding_date": self.expected_kidding_date.isoformat() if self.expected_kidding_date else None,
             "status": self.status,
+            "kidding_date": self.kidding_date.isoformat() if self.kidding_date else None,
+            "kids_born": self.kids_born,
         }
 
 class User(db.Model):
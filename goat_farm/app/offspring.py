@@ -0,0 +1,145 @@
+"""
+Stored offspring counters on animals.
+
+offspring_count counts every child an animal is recorded as a parent of
+(dam or sire); sired_count counts the sire side alone. Both are adjusted by
+the listeners below whenever an animal is inserted, deleted or has its
+parents changed through the ORM, which also covers kids added by the kidding
+outcome endpoint. Core writes (bulk import) call reconcile_offspring_counts
+for the parents they touched; `flask offspring reconcile` repairs drift.
+"""
+from sqlalchemy import event, func, inspect, or_, select
+
+from app.extensions import db
+from app.models import Animal
+from app.versions import bump_versions
+
+
+def _parent_deltas(mother_id, father_id, sign):
+    """(parent id, offspring delta, sired delta) for one child. A parent listed twice counts once."""
+    deltas = {}
+    for parent_id in (mother_id, father_id):
+        if parent_id is not None:
+            deltas[parent_id] = [sign, 0]
+    if father_id is not None:
+        deltas[father_id][1] = sign
+    return deltas
+
+
+def apply_offspring_deltas(connection, deltas):
+    animals = Animal.__table__
+    for parent_id, (offspring_delta, sired_delta) in deltas.items():
+        if not offspring_delta and not sired_delta:
+            continue
+        connection.execute(
+            animals.update()
+            .where(animals.c.id == parent_id)
+            .values(
+                offspring_count=func.coalesce(animals.c.offspring_count, 0) + offspring_delta,
+                sired_count=func.coalesce(animals.c.sired_count, 0) + sired_delta
+            )
+        )
+
+
+# Load the old parent on assignment so after_update can always tell which parent lost a child
+@event.listens_for(Animal.mother_id, "set", active_history=True)
+@event.listens_for(Animal.father_id, "set", active_history=True)
+def keep_previous_parent(target, value, oldvalue, initiator):
+    return value
+
+
+@event.listens_for(Animal, "after_insert")
+def count_new_offspring(mapper, connection, target):
+    apply_offspring_deltas(connection, _parent_deltas(target.mother_id, target.father_id, 1))
+
+
+@event.listens_for(Animal, "after_update")
+def move_offspring(mapper, connection, target):
+    state = inspect(target)
+    mother, father = state.attrs.mother_id.history, state.attrs.father_id.history
+    if not mother.has_changes() and not father.has_changes():
+        return
+
+    def previous(history, current):
+        # Changed from NULL leaves deleted empty
+        return history.deleted[0] if history.deleted else (None if history.added else current)
+
+    deltas = _parent_deltas(previous(mother, target.mother_id), previous(father, target.father_id), -1)
+    for parent_id, (offspring_delta, sired_delta) in _parent_deltas(target.mother_id, target.father_id, 1).items():
+        old = deltas.setdefault(parent_id, [0, 0])
+        old[0] += offspring_delta
+        old[1] += sired_delta
+    apply_offspring_deltas(connection, deltas)
+
+
+@event.listens_for(Animal, "after_delete")
+def forget_offspring(mapper, connection, target):
+    apply_offspring_deltas(connection, _parent_deltas(target.mother_id, target.father_id, -1))
+
+
+def _expected_counts():
+    animals = Animal.__table__
+    child = animals.alias("child")
+    offspring = (
+        select(func.count())
+        .where(or_(child.c.mother_id == animals.c.id, child.c.father_id == animals.c.id))
+        .scalar_subquery()
+    )
+    sired = select(func.count()).where(child.c.father_id == animals.c.id).scalar_subquery()
+    return offspring, sired
+
+
+def _drifted(offspring, sired):
+    animals = Animal.__table__
+    return or_(
+        func.coalesce(animals.c.offspring_count, -1) != offspring,
+        func.coalesce(animals.c.sired_count, -1) != sired
+    )
+
+
+def reconcile_offspring_counts(animal_ids=None):
+    """Recount children for the given animals (or the whole herd); only drifted rows are written."""
+    animals = Animal.__table__
+    offspring, sired = _expected_counts()
+    update = animals.update().where(_drifted(offspring, sired)).values(offspring_count=offspring, sired_count=sired)
+
+    if animal_ids is None:
+        result = db.session.execute(update)
+        if result.rowcount:
+            bump_versions("animals")
+        db.session.commit()
+        return result.rowcount
+
+    animal_ids = list(animal_ids)
+    changed = 0
+    for start in range(0, len(animal_ids), 1000):
+        result = db.session.execute(update.where(animals.c.id.in_(animal_ids[start:start + 1000])))
+        changed += result.rowcount
+    if changed:
+        bump_versions("animals")
+    db.session.commit()
+    return changed
+
+
+def verify_offspring_counts():
+    """List animals whose stored counters disagree with the animals table."""
+    animals = Animal.__table__
+    offspring, sired = _expected_counts()
+    rows = db.session.execute(
+        select(
+            animals.c.id, animals.c.offspring_count, animals.c.sired_count,
+            offspring.label("expected_offspring"), sired.label("expected_sired")
+        )
+        .where(_drifted(offspring, sired))
+        .order_by(animals.c.id)
+    ).all()
+    return [
+        {
+            "animal_id": row.id,
+            "offspring_count": row.offspring_count,
+            "expected_offspring": row.expected_offspring,
+            "sired_count": row.sired_count,
+            "expected_sired": row.expected_sired
+        }
+        for row in rows
+    ]
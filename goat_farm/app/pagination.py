@@ -0,0 +1,176 @@
+import base64
+import json
+from datetime import date, datetime
+from itertools import islice
+from urllib.parse import urlencode
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import and_, or_
+
+from app.serializers import parse_fields, project
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Columns a listing can be keyset-ordered by. Anything but "id" pages on (column, id)
+# so rows sharing a value are neither skipped nor repeated.
+KEYSET_ORDERS = ("id", "updated_at")
+
+
+class PaginationError(ValueError):
+    """Raised when limit/after/order query params are invalid."""
+
+
+def encode_cursor(order, row):
+    if order != "id":
+        value = getattr(row, order)
+        payload = [order, value.isoformat() if value is not None else None, row.id]
+    else:
+        payload = [order, row.id]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, order):
+    """Decode a cursor into the last id, or (raw ISO value, last id) for non-id orders."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+    if not isinstance(payload, list) or not payload or payload[0] != order:
+        raise PaginationError("Cursor does not match the requested order")
+
+    try:
+        if order != "id":
+            if payload[1] is not None and not isinstance(payload[1], str):
+                raise ValueError
+            return payload[1], int(payload[2])
+        return int(payload[1])
+    except (IndexError, ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+
+def parse_page_args(orders=KEYSET_ORDERS, default_order="id"):
+    """Read limit/after/order from the query string, applying config defaults."""
+    default_limit = current_app.config.get("PAGE_SIZE", 100)
+    max_limit = current_app.config.get("MAX_PAGE_SIZE", 1000)
+
+    order = request.args.get("order", default_order)
+    if order not in orders:
+        raise PaginationError(f"Invalid order. Allowed: {list(orders)}")
+
+    limit = request.args.get("limit", default_limit)
+    try:
+        limit = int(limit)
+    except (ValueError, TypeError):
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    limit = min(limit, max_limit)
+
+    after = request.args.get("after")
+    cursor = decode_cursor(after, order) if after else None
+    return limit, cursor, order
+
+
+def _cursor_value(column, raw):
+    if raw is None:
+        return None
+    try:
+        if column.type.python_type is date:
+            return date.fromisoformat(raw)
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        raise PaginationError("Invalid cursor")
+
+
+def apply_keyset(query, model, order, cursor):
+    """Order the query for keyset paging and skip everything up to the cursor."""
+    if order != "id":
+        column = getattr(model, order)
+        query = query.order_by(column.asc(), model.id.asc())
+        if cursor is not None:
+            raw, last_id = cursor
+            value = _cursor_value(column, raw)
+            if value is None:
+                query = query.filter(and_(column.is_(None), model.id > last_id))
+            else:
+                query = query.filter(or_(
+                    column > value,
+                    and_(column == value, model.id > last_id),
+                ))
+        return query
+
+    query = query.order_by(model.id.asc())
+    if cursor is not None:
+        query = query.filter(model.id > cursor)
+    return query
+
+
+def wants_ndjson():
+    best = request.accept_mimetypes.best_match([NDJSON_MIMETYPE, "application/json"])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_ndjson(query, serialize_many, chunk_size=None):
+    """
+    Stream one JSON document per line, fetching rows through a server-side
+    cursor and serializing them a chunk at a time.
+    """
+    chunk_size = chunk_size or current_app.config.get("STREAM_CHUNK_SIZE", 500)
+    dumps = current_app.json.dumps
+
+    def generate():
+        rows = iter(query.yield_per(chunk_size))
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield "".join(dumps(item) + "\n" for item in serialize_many(chunk))
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def paginated_response(query, model, serialize_many, orders=KEYSET_ORDERS, default_order="id"):
+    """
+    Serve a listing either as one keyset page (JSON array, next cursor in the
+    X-Next-Cursor and Link headers) or, when the client asks for
+    application/x-ndjson, as an unbounded stream starting after the cursor.
+    ?fields=a,b selects just those columns and skips building ORM objects.
+    """
+    try:
+        limit, cursor, order = parse_page_args(orders, default_order)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        fields = parse_fields(request.args.get("fields"), model)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if fields:
+        # Cursors are built from id and the order column, so those are always selected
+        query, serialize_many = project(query, model, fields, keys=("id", order))
+
+    try:
+        query = apply_keyset(query, model, order, cursor)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if wants_ndjson():
+        if "limit" in request.args:
+            query = query.limit(limit)
+        return stream_ndjson(query, serialize_many)
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    response = jsonify(serialize_many(rows))
+    if has_more:
+        next_cursor = encode_cursor(order, rows[-1])
+        response.headers["X-Next-Cursor"] = next_cursor
+        args = request.args.to_dict()
+        args.update(after=next_cursor, limit=limit)
+        response.headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response, 200
@@ -0,0 +1,364 @@
+"""
+Pedigree engine: recursive-CTE ancestry queries plus an in-memory, array-backed
+herd pedigree for inbreeding and kinship.
+
+Animals are stored in topological order (parents before offspring) with the
+parents as integer indices into the same arrays (-1 = unknown), so every walk
+is a loop over plain arrays instead of ORM relationships.
+
+- Inbreeding coefficients: Meuwissen & Luo (1992).
+- Kinship columns: Colleau (2002) indirect method, A[:, j] = T D T' e_j, which
+  is O(n) per column. Evaluating every doe x buck pair costs one column per
+  animal on the smaller side, not one recursion per pair.
+"""
+import heapq
+import time
+from array import array
+from collections import OrderedDict, deque
+
+from flask import current_app
+from sqlalchemy import event, func, inspect, literal, or_, select
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db
+from app.models import Animal
+
+
+def ancestors_query(animal_id, generations):
+    """Every ancestor up to `generations` back, in one recursive CTE. Generation 0 is the animal itself."""
+    pedigree = (
+        select(Animal.id, Animal.mother_id, Animal.father_id, literal(0).label("generation"))
+        .where(Animal.id == animal_id)
+        .cte("pedigree", recursive=True)
+    )
+    parent = db.aliased(Animal)
+    pedigree = pedigree.union_all(
+        select(parent.id, parent.mother_id, parent.father_id, (pedigree.c.generation + 1).label("generation"))
+        .join(pedigree, or_(parent.id == pedigree.c.mother_id, parent.id == pedigree.c.father_id))
+        .where(pedigree.c.generation < generations)
+    )
+    # An inbred animal reaches some ancestors by more than one path; keep the nearest
+    return (
+        select(pedigree.c.id, func.min(pedigree.c.generation).label("generation"))
+        .group_by(pedigree.c.id)
+        .order_by("generation", pedigree.c.id)
+    )
+
+
+def descendants_query(animal_id, generations):
+    """Every descendant up to `generations` down, in one recursive CTE."""
+    lineage = (
+        select(Animal.id, literal(0).label("generation"))
+        .where(Animal.id == animal_id)
+        .cte("lineage", recursive=True)
+    )
+    child = db.aliased(Animal)
+    lineage = lineage.union_all(
+        select(child.id, (lineage.c.generation + 1).label("generation"))
+        .join(lineage, or_(child.mother_id == lineage.c.id, child.father_id == lineage.c.id))
+        .where(lineage.c.generation < generations)
+    )
+    return (
+        select(lineage.c.id, func.min(lineage.c.generation).label("generation"))
+        .group_by(lineage.c.id)
+        .order_by("generation", lineage.c.id)
+    )
+
+
+class Pedigree:
+    """Array-backed herd pedigree. Build with Pedigree.from_rows((id, mother_id, father_id), ...)."""
+
+    # Kinship columns (one full-herd array each) are memoized per build, so they go away with it
+    # when the herd changes. Herd-wide runs use related_block instead, which stays small.
+    KINSHIP_COLUMN_CACHE = 256
+
+    def __init__(self, ids, dam, sire):
+        self.ids = ids
+        self.dam = dam
+        self.sire = sire
+        self.index = {animal_id: i for i, animal_id in enumerate(ids)}
+        self._inbreeding = None
+        self._d = None
+        self._children = None
+        self._kinship_columns = OrderedDict()
+        self._related_block = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        rows = list(rows)
+        parents = {animal_id: (mother_id, father_id) for animal_id, mother_id, father_id in rows}
+
+        # Kahn's algorithm so parents always get a lower index than their offspring
+        children = {animal_id: [] for animal_id in parents}
+        pending = {}
+        for animal_id, (mother_id, father_id) in parents.items():
+            known = {p for p in (mother_id, father_id) if p in parents and p != animal_id}
+            pending[animal_id] = len(known)
+            for parent in known:
+                children[parent].append(animal_id)
+
+        queue = deque(sorted(animal_id for animal_id, count in pending.items() if count == 0))
+        order = []
+        while queue:
+            animal_id = queue.popleft()
+            order.append(animal_id)
+            for child in children[animal_id]:
+                pending[child] -= 1
+                if pending[child] == 0:
+                    queue.append(child)
+
+        placed = set(order)
+        # Anything left sits on a parent cycle (bad data); keep it, without the looping links
+        order.extend(sorted(animal_id for animal_id in parents if animal_id not in placed))
+
+        index = {animal_id: i for i, animal_id in enumerate(order)}
+        dam, sire = array("l"), array("l")
+        for i, animal_id in enumerate(order):
+            mother_id, father_id = parents[animal_id]
+            mother, father = index.get(mother_id, -1), index.get(father_id, -1)
+            dam.append(mother if mother < i else -1)
+            sire.append(father if father < i else -1)
+        return cls(array("l", order), dam, sire)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, animal_id):
+        return animal_id in self.index
+
+    def _compute_inbreeding(self):
+        n = len(self.ids)
+        dam, sire = self.dam, self.sire
+        inbreeding = array("d", bytes(8 * n))
+        d = array("d", bytes(8 * n))
+
+        for i in range(n):
+            s, m = sire[i], dam[i]
+            if s >= 0 and m >= 0:
+                d[i] = 0.5 - 0.25 * (inbreeding[s] + inbreeding[m])
+            elif s >= 0 or m >= 0:
+                d[i] = 0.75 - 0.25 * inbreeding[s if s >= 0 else m]
+            else:
+                d[i] = 1.0
+                continue
+            if s < 0 or m < 0:
+                continue
+
+            # F_i = sum_j L_ij^2 D_j - 1 over i and its ancestors, visited youngest first
+            contributions = {i: 1.0}
+            heap = [-i]
+            f = -1.0
+            while heap:
+                j = -heapq.heappop(heap)
+                lj = contributions.pop(j)
+                f += lj * lj * d[j]
+                for parent in (sire[j], dam[j]):
+                    if parent >= 0:
+                        if parent not in contributions:
+                            contributions[parent] = 0.0
+                            heapq.heappush(heap, -parent)
+                        contributions[parent] += 0.5 * lj
+            inbreeding[i] = f
+
+        self._inbreeding, self._d = inbreeding, d
+
+    def inbreeding(self, animal_id=None):
+        """Wright's inbreeding coefficient for one animal, or the whole array when animal_id is None."""
+        if self._inbreeding is None:
+            self._compute_inbreeding()
+        if animal_id is None:
+            return self._inbreeding
+        return self._inbreeding[self.index[animal_id]]
+
+    def _relationship_column(self, j):
+        """
+        Column j of the numerator relationship matrix A (= 2 x kinship), via A e_j = T D T' e_j,
+        as {index: value}; indices left out are zero.
+        """
+        if self._d is None:
+            self._compute_inbreeding()
+        if self._children is None:
+            self._children = [[] for _ in self.ids]
+            for i, (s, m) in enumerate(zip(self.sire, self.dam)):
+                for parent in (s, m):
+                    if parent >= 0:
+                        self._children[parent].append(i)
+        dam, sire, d, children = self.dam, self.sire, self._d, self._children
+
+        # u = T' e_j: only j and its ancestors are non-zero, walked youngest first
+        u = {j: 1.0}
+        heap = [-j]
+        while heap:
+            k = -heapq.heappop(heap)
+            half = 0.5 * u[k]
+            for parent in (sire[k], dam[k]):
+                if parent >= 0:
+                    if parent not in u:
+                        u[parent] = 0.0
+                        heapq.heappush(heap, -parent)
+                    u[parent] += half
+
+        # x = T (D u): oldest first, over those ancestors and their descendants only
+        x = {}
+        heap = list(u)
+        heapq.heapify(heap)
+        seen = set(heap)
+        while heap:
+            i = heapq.heappop(heap)
+            value = d[i] * u[i] if i in u else 0.0
+            s, m = sire[i], dam[i]
+            if s in x:
+                value += 0.5 * x[s]
+            if m in x:
+                value += 0.5 * x[m]
+            x[i] = value
+            for child in children[i]:
+                if child not in seen:
+                    seen.add(child)
+                    heapq.heappush(heap, child)
+        return x
+
+    def kinship(self, a_id, b_id):
+        """Coefficient of kinship between two animals (= inbreeding of their offspring)."""
+        column = self._relationship_column(self.index[b_id])
+        return 0.5 * column.get(self.index[a_id], 0.0)
+
+    def kinship_column(self, animal_id):
+        """Kinship of animal_id with every animal (indexed like self.ids), memoized per build."""
+        column = self._kinship_columns.get(animal_id)
+        if column is None:
+            column = array("d", bytes(8 * len(self.ids)))
+            for i, value in self._relationship_column(self.index[animal_id]).items():
+                column[i] = 0.5 * value
+            self._kinship_columns[animal_id] = column
+            if len(self._kinship_columns) > self.KINSHIP_COLUMN_CACHE:
+                self._kinship_columns.popitem(last=False)
+        else:
+            self._kinship_columns.move_to_end(animal_id)
+        return column
+
+    def related_block(self, row_ids, column_ids):
+        """
+        The non-zero kinships of every (row, column) pair: for each row id, in order,
+        (column positions, kinships) as an array('l') and an array('d'). Unrelated
+        pairs, most of a herd, are left out. The last block asked for is memoized
+        per build.
+        """
+        key = (tuple(row_ids), tuple(column_ids))
+        if self._related_block is None or self._related_block[0] != key:
+            row_at = {self.index[animal_id]: r for r, animal_id in enumerate(key[0])}
+            positions = [array("l") for _ in key[0]]
+            values = [array("d") for _ in key[0]]
+            for j, animal_id in enumerate(key[1]):
+                for i, value in self._relationship_column(self.index[animal_id]).items():
+                    r = row_at.get(i)
+                    if r is not None and value:
+                        positions[r].append(j)
+                        values[r].append(0.5 * value)
+            self._related_block = (key, list(zip(positions, values)))
+        return self._related_block[1]
+
+    def kinship_matrix(self, row_ids, column_ids):
+        """
+        Kinship for every (row, column) pair as a list of rows. Runs one
+        relationship column per animal on the smaller side.
+        """
+        row_ids, column_ids = list(row_ids), list(column_ids)
+        transpose = len(row_ids) < len(column_ids)
+        outer, inner = (row_ids, column_ids) if transpose else (column_ids, row_ids)
+
+        inner_index = [self.index[animal_id] for animal_id in inner]
+        vectors = []
+        for animal_id in outer:
+            column = self._relationship_column(self.index[animal_id])
+            vectors.append([0.5 * column.get(i, 0.0) for i in inner_index])
+
+        if transpose:
+            return vectors
+        return [list(row) for row in zip(*vectors)]
+
+
+# Process-wide pedigree cache. Parent links changing through the ORM bump the
+# version on commit; PEDIGREE_CACHE_TTL bounds staleness from other processes.
+_cache = {"version": 0, "built_version": None, "built_at": 0.0, "engine": None, "pedigree": None}
+
+
+def invalidate_pedigree():
+    _cache["version"] += 1
+
+
+def load_pedigree():
+    """The whole herd's pedigree, rebuilt with a single query when stale."""
+    ttl = current_app.config.get("PEDIGREE_CACHE_TTL", 300)
+    fresh = time.monotonic() - _cache["built_at"] < ttl
+    stale = _cache["built_version"] != _cache["version"] or _cache["engine"] is not db.engine
+    if _cache["pedigree"] is None or stale or not fresh:
+        version = _cache["version"]
+        rows = db.session.execute(select(Animal.id, Animal.mother_id, Animal.father_id)).all()
+        _cache.update(pedigree=Pedigree.from_rows(rows), built_version=version,
+                      built_at=time.monotonic(), engine=db.engine)
+    return _cache["pedigree"]
+
+
+def _mark_pedigree_changed(target):
+    session = object_session(target)
+    if session is not None:
+        session.info["pedigree_changed"] = True
+
+
+@event.listens_for(Animal, "after_insert")
+@event.listens_for(Animal, "after_delete")
+def mark_pedigree_changed(mapper, connection, target):
+    _mark_pedigree_changed(target)
+
+
+@event.listens_for(Animal, "after_update")
+def mark_parent_links_changed(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.mother_id.history.has_changes() or state.attrs.father_id.history.has_changes():
+        _mark_pedigree_changed(target)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_pedigree(session):
+    if session.info.pop("pedigree_changed", False):
+        invalidate_pedigree()
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_rolled_back_pedigree(session):
+    session.info.pop("pedigree_changed", None)
+
+
+def parse_generations(value):
+    maximum = current_app.config.get("PEDIGREE_MAX_GENERATIONS", 20)
+    try:
+        generations = int(value) if value not in (None, "") else 3
+    except ValueError:
+        raise ValueError("generations must be an integer")
+    if not 1 <= generations <= maximum:
+        raise ValueError(f"generations must be between 1 and {maximum}")
+    return generations
+
+
+def lineage(query):
+    """Run an ancestors/descendants query and attach each animal's pedigree fields and inbreeding."""
+    found = query.subquery()
+    rows = db.session.execute(
+        select(Animal.id, Animal.tag_id, Animal.sex, Animal.mother_id, Animal.father_id, found.c.generation)
+        .join(found, found.c.id == Animal.id)
+        .order_by(found.c.generation, Animal.id)
+    ).all()
+    pedigree = load_pedigree()
+    return [
+        {
+            "id": row.id,
+            "tag_id": row.tag_id,
+            "sex": row.sex,
+            "mother_id": row.mother_id,
+            "father_id": row.father_id,
+            "generation": row.generation,
+            "inbreeding_coefficient": pedigree.inbreeding(row.id) if row.id in pedigree else 0.0
+        }
+        for row in rows
+    ]
@@ -0,0 +1,231 @@
+"""
+Treatment reminders.
+
+The scheduler walks the next_due_date index a window at a time, materializing
+one `reminders` row per animal, treatment type and due date. Only the latest
+treatment of each type counts: a booster recorded after the first dose
+supersedes the first dose's due date. Pending reminders whose treatment was
+superseded, rescheduled or deleted are cancelled on the next scan.
+
+Delivery goes through a notifier. The built-in ones write to stdout or append
+JSON lines to a file, so the whole loop runs offline; anything with a
+send(reminders) method can be plugged in. A reminder whose sends keep failing
+is marked failed after REMINDER_MAX_ATTEMPTS tries.
+
+Run it as a standalone worker with `flask reminders run`, or trigger single
+passes with `flask reminders scan` / `flask reminders deliver` from cron.
+"""
+import json
+import re
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, exists, func, literal, not_, or_, select
+
+from app.extensions import db
+from app.models import Animal, Reminder, Treatment
+
+WITHIN_UNITS = {"d": 1, "w": 7}
+
+
+def parse_within(value, default=7, maximum=366):
+    """Parse ?within=7d / 2w / 10 (days) into a number of days."""
+    if value in (None, ""):
+        return default
+    match = re.fullmatch(r"\s*(\d+)\s*([dw]?)\s*", str(value).lower())
+    if not match:
+        raise ValueError("within must look like 7d, 2w or a number of days")
+    days = int(match.group(1)) * WITHIN_UNITS.get(match.group(2) or "d")
+    if not 0 <= days <= maximum:
+        raise ValueError(f"within must be at most {maximum} days")
+    return days
+
+
+def superseded(treatment):
+    """True when the animal has a later treatment of the same type than `treatment`."""
+    newer = db.aliased(Treatment)
+    treated_on = func.coalesce(treatment.treatment_date, date.min)
+    newer_treated_on = func.coalesce(newer.treatment_date, date.min)
+    return exists().where(
+        newer.animal_id == treatment.animal_id,
+        newer.treatment_type == treatment.treatment_type,
+        or_(newer_treated_on > treated_on, and_(newer_treated_on == treated_on, newer.id > treatment.id))
+    )
+
+
+def animal_active(animal_id):
+    # EXISTS rather than a join, so the planner drives the query from the due-date range
+    return exists().where(Animal.id == animal_id, Animal.status == "Active")
+
+
+def due_treatments_query(start, end):
+    """Current (not superseded) treatments of active animals due between start and end inclusive."""
+    query = Treatment.query.filter(animal_active(Treatment.animal_id), not_(superseded(Treatment)))
+    if start is not None:
+        query = query.filter(Treatment.next_due_date >= start)
+    return query.filter(Treatment.next_due_date <= end)
+
+
+def scan_due_treatments(today=None, horizon_days=None, window_days=None):
+    """
+    Materialize reminders for everything due up to horizon_days ahead (overdue
+    included), one INSERT ... SELECT per due-date window. Returns counts.
+    """
+    config = current_app.config
+    today = today or date.today()
+    horizon_days = config.get("REMINDER_HORIZON_DAYS", 7) if horizon_days is None else horizon_days
+    window_days = window_days or config.get("REMINDER_SCAN_WINDOW_DAYS", 7)
+    lookback_days = config.get("REMINDER_LOOKBACK_DAYS", 30)
+
+    reminders = Reminder.__table__
+    treatment = db.aliased(Treatment)
+    created = 0
+    start = today - timedelta(days=lookback_days)
+    end = today + timedelta(days=horizon_days)
+    while start <= end:
+        window_end = min(start + timedelta(days=window_days - 1), end)
+        candidates = (
+            select(
+                treatment.id, treatment.animal_id, treatment.treatment_type, treatment.next_due_date,
+                literal("pending"), literal(0)
+            )
+            .where(
+                treatment.next_due_date.between(start, window_end),
+                animal_active(treatment.animal_id),
+                not_(superseded(treatment)),
+                ~exists().where(
+                    reminders.c.animal_id == treatment.animal_id,
+                    reminders.c.treatment_type == treatment.treatment_type,
+                    reminders.c.due_date == treatment.next_due_date
+                )
+            )
+        )
+        result = db.session.execute(reminders.insert().from_select(
+            ["treatment_id", "animal_id", "treatment_type", "due_date", "status", "attempts"], candidates
+        ))
+        created += result.rowcount
+        start = window_end + timedelta(days=1)
+
+    cancelled = cancel_stale_reminders()
+    db.session.commit()
+    return {"created": created, "cancelled": cancelled}
+
+
+def cancel_stale_reminders():
+    """Cancel pending reminders whose treatment was superseded, rescheduled, deleted or whose animal left."""
+    reminders = Reminder.__table__
+    source = db.aliased(Treatment)
+    still_due = exists().where(
+        source.id == reminders.c.treatment_id,
+        source.next_due_date == reminders.c.due_date,
+        not_(superseded(source))
+    )
+    result = db.session.execute(
+        reminders.update()
+        .where(reminders.c.status == "pending", or_(~still_due, ~animal_active(reminders.c.animal_id)))
+        .values(status="cancelled")
+    )
+    return result.rowcount
+
+
+class StdoutNotifier:
+    """Print one line per reminder. The default, so the scheduler works with nothing configured."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, reminders):
+        for reminder in reminders:
+            self.stream.write(
+                f"[reminder] {reminder['treatment_type']} due {reminder['due_date']} "
+                f"for animal {reminder['tag_id']} (#{reminder['animal_id']})\n"
+            )
+        self.stream.flush()
+
+
+class FileNotifier:
+    """Append reminders to a file as JSON lines, for anything that tails it."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, reminders):
+        with open(self.path, "a", encoding="utf-8") as sink:
+            for reminder in reminders:
+                sink.write(json.dumps(reminder, default=str) + "\n")
+
+
+def get_notifier(app=None):
+    config = (app or current_app).config
+    kind = config.get("REMINDER_NOTIFIER", "stdout")
+    if kind == "stdout":
+        return StdoutNotifier()
+    if kind == "file":
+        return FileNotifier(config["REMINDER_NOTIFY_FILE"])
+    raise ValueError(f"Unknown REMINDER_NOTIFIER {kind!r}")
+
+
+def deliver_reminders(notifier=None, batch_size=None, max_attempts=None):
+    """
+    Send pending reminders in batches of batch_size, in creation order. A
+    reminder whose max_attempts-th send fails is marked failed rather than left
+    pending. Returns (sent, failed) sends.
+    """
+    config = current_app.config
+    notifier = notifier or get_notifier()
+    batch_size = batch_size or config.get("REMINDER_BATCH_SIZE", 500)
+    max_attempts = max_attempts or config.get("REMINDER_MAX_ATTEMPTS", 5)
+    # Also retires reminders left pending by an earlier, higher REMINDER_MAX_ATTEMPTS
+    db.session.execute(
+        Reminder.__table__.update()
+        .where(Reminder.status == "pending", Reminder.attempts >= max_attempts)
+        .values(status="failed")
+    )
+
+    sent = failed = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.session.query(Reminder, Animal.tag_id)
+            .join(Animal, Animal.id == Reminder.animal_id)
+            .filter(Reminder.status == "pending", Reminder.attempts < max_attempts, Reminder.id > last_id)
+            .order_by(Reminder.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0].id
+        payload = [dict(reminder.to_dict(), tag_id=tag_id) for reminder, tag_id in batch]
+        try:
+            notifier.send(payload)
+        except Exception as e:
+            for reminder, _ in batch:
+                reminder.attempts += 1
+                reminder.last_error = f"{e.__class__.__name__}: {e}"
+                if reminder.attempts >= max_attempts:
+                    reminder.status = "failed"
+            failed += len(batch)
+        else:
+            now = datetime.now()
+            for reminder, _ in batch:
+                reminder.status = "sent"
+                reminder.sent_at = now
+                reminder.attempts += 1
+            sent += len(batch)
+        db.session.commit()
+    return sent, failed
+
+
+def run_scheduler(interval, once=False, notifier=None, log=print):
+    """Scan and deliver every `interval` seconds until interrupted."""
+    while True:
+        counts = scan_due_treatments()
+        sent, failed = deliver_reminders(notifier)
+        log(f"Reminders: {counts['created']} created, {counts['cancelled']} cancelled, "
+            f"{sent} sent, {failed} failed.")
+        if once:
+            return
+        time.sleep(interval)
@@ -0,0 +1,219 @@
+from datetime import date
+
+from sqlalchemy import event, func, inspect, select
+
+from app.extensions import db
+from app.models import AnimalCostTotal, Expense, Sale, SalesRollup, Treatment, dialect_insert
+from app.versions import bump_versions
+
+ROLLUP_GRAINS = ("day", "month", "year")
+
+
+def rollup_periods(sale_date):
+    """Map a sale date to its (period key, period start) for every grain."""
+    return {
+        "day": (sale_date.isoformat(), sale_date),
+        "month": (sale_date.strftime("%Y-%m"), sale_date.replace(day=1)),
+        "year": (str(sale_date.year), date(sale_date.year, 1, 1)),
+    }
+
+
+def apply_rollup_delta(connection, sale_date, sales=0, revenue=0.0, expenses=0.0):
+    """Add (or, with negative values, remove) a sale's contribution to its day/month/year rows."""
+    if sale_date is None or not (sales or revenue or expenses):
+        return
+    rollups = SalesRollup.__table__
+    for grain, (period, period_start) in rollup_periods(sale_date).items():
+        insert = dialect_insert(connection, rollups)
+        if insert is None:
+            result = connection.execute(
+                rollups.update()
+                .where(rollups.c.grain == grain, rollups.c.period == period)
+                .values(
+                    total_sales=rollups.c.total_sales + sales,
+                    total_revenue=rollups.c.total_revenue + revenue,
+                    total_expenses=rollups.c.total_expenses + expenses,
+                    updated_at=func.current_timestamp()
+                )
+            )
+            if result.rowcount == 0:
+                connection.execute(rollups.insert().values(
+                    grain=grain,
+                    period=period,
+                    period_start=period_start,
+                    total_sales=sales,
+                    total_revenue=revenue,
+                    total_expenses=expenses
+                ))
+            continue
+        # A single upsert: concurrent first sales of a period must not both INSERT its row
+        insert = insert.values(
+            grain=grain,
+            period=period,
+            period_start=period_start,
+            total_sales=sales,
+            total_revenue=revenue,
+            total_expenses=expenses
+        )
+        connection.execute(insert.on_conflict_do_update(
+            index_elements=[rollups.c.grain, rollups.c.period],
+            set_={
+                "total_sales": rollups.c.total_sales + insert.excluded.total_sales,
+                "total_revenue": rollups.c.total_revenue + insert.excluded.total_revenue,
+                "total_expenses": rollups.c.total_expenses + insert.excluded.total_expenses,
+                "updated_at": func.current_timestamp(),
+            }
+        ))
+
+def animal_expense_total(connection, animal_id):
+    if not animal_id:
+        return 0.0
+    ledger = AnimalCostTotal.__table__
+    total = connection.execute(
+        select(ledger.c.expense_total).where(ledger.c.animal_id == animal_id)
+    ).scalar()
+    if total is None:
+        expenses = Expense.__table__
+        total = connection.execute(
+            select(func.coalesce(func.sum(expenses.c.amount), 0.0)).where(expenses.c.animal_id == animal_id)
+        ).scalar()
+    return total or 0.0
+
+
+def apply_expense_delta(connection, animal_id, amount):
+    """Expenses count against the period in which their animal was sold (if it was)."""
+    if not animal_id or not amount:
+        return
+    sales = Sale.__table__
+    sale_date = connection.execute(
+        select(sales.c.sale_date).where(sales.c.animal_id == animal_id)
+    ).scalar()
+    apply_rollup_delta(connection, sale_date, expenses=amount)
+
+
+def _previous_value(state, name):
+    history = state.attrs[name].history
+    return history.deleted[0] if history.deleted else getattr(state.object, name)
+
+
+@event.listens_for(Sale, "after_insert")
+def add_sale_to_rollups(mapper, connection, target):
+    apply_rollup_delta(
+        connection, target.sale_date,
+        sales=1,
+        revenue=target.price or 0.0,
+        expenses=animal_expense_total(connection, target.animal_id)
+    )
+
+
+@event.listens_for(Sale, "after_update")
+def update_sale_rollups(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in ("price", "sale_date", "animal_id")):
+        return
+    old_animal_id = _previous_value(state, "animal_id")
+    apply_rollup_delta(
+        connection, _previous_value(state, "sale_date"),
+        sales=-1,
+        revenue=-(_previous_value(state, "price") or 0.0),
+        expenses=-animal_expense_total(connection, old_animal_id)
+    )
+    add_sale_to_rollups(mapper, connection, target)
+
+
+@event.listens_for(Sale, "after_delete")
+def remove_sale_from_rollups(mapper, connection, target):
+    apply_rollup_delta(
+        connection, target.sale_date,
+        sales=-1,
+        revenue=-(target.price or 0.0),
+        expenses=-animal_expense_total(connection, target.animal_id)
+    )
+
+
+@event.listens_for(Expense, "after_insert")
+def add_expense_to_rollups(mapper, connection, target):
+    apply_expense_delta(connection, target.animal_id, target.amount)
+
+
+@event.listens_for(Expense, "after_update")
+def update_expense_rollups(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in ("amount", "animal_id")):
+        return
+    apply_expense_delta(connection, _previous_value(state, "animal_id"), -(_previous_value(state, "amount") or 0.0))
+    apply_expense_delta(connection, target.animal_id, target.amount)
+
+
+@event.listens_for(Expense, "after_delete")
+def remove_expense_from_rollups(mapper, connection, target):
+    apply_expense_delta(connection, target.animal_id, -(target.amount or 0.0))
+
+
+# add_treatment_expense inserts its Expense row through Core, which skips the Expense events above
+@event.listens_for(Treatment, "after_insert")
+def add_treatment_expense_to_rollups(mapper, connection, target):
+    if target.cost and target.cost > 0:
+        apply_expense_delta(connection, target.animal_id, target.cost)
+
+
+def daily_sales_totals():
+    """
+    Per-day sales count, revenue and the sold animals' expenses, computed from
+    the raw tables. Expenses are summed per animal before joining so a sale is
+    never multiplied by its animal's expense rows.
+    """
+    animal_expenses = (
+        select(Expense.animal_id.label("animal_id"), func.sum(Expense.amount).label("total_expenses"))
+        .where(Expense.animal_id.isnot(None))
+        .group_by(Expense.animal_id)
+    ).subquery()
+
+    return (
+        db.session.query(
+            Sale.sale_date.label("sale_date"),
+            func.count(Sale.id).label("total_sales"),
+            func.sum(Sale.price).label("total_revenue"),
+            func.sum(func.coalesce(animal_expenses.c.total_expenses, 0)).label("total_expenses")
+        )
+        .outerjoin(animal_expenses, animal_expenses.c.animal_id == Sale.animal_id)
+        .group_by(Sale.sale_date)
+    )
+
+
+def rebuild_sales_rollups():
+    """Recompute every rollup row from sales and expenses. Returns the number of rows written."""
+    totals = {}
+    for day in daily_sales_totals():
+        if day.sale_date is None:
+            continue
+        for grain, (period, period_start) in rollup_periods(day.sale_date).items():
+            row = totals.setdefault((grain, period), {
+                "grain": grain,
+                "period": period,
+                "period_start": period_start,
+                "total_sales": 0,
+                "total_revenue": 0.0,
+                "total_expenses": 0.0,
+            })
+            row["total_sales"] += day.total_sales
+            row["total_revenue"] += day.total_revenue or 0.0
+            row["total_expenses"] += day.total_expenses or 0.0
+
+    rollups = SalesRollup.__table__
+    db.session.execute(rollups.delete())
+    if totals:
+        db.session.execute(rollups.insert(), list(totals.values()))
+    bump_versions("sales")
+    db.session.commit()
+    return len(totals)
+
+
+def get_rollups(grain, descending=False):
+    order = SalesRollup.period_start.desc() if descending else SalesRollup.period_start.asc()
+    return (
+        SalesRollup.query
+        .filter(SalesRollup.grain == grain, SalesRollup.total_sales > 0)
+        .order_by(order)
+        .all()
+    )
@@ -4,6 +4,11 @@ from .treatment_routes import treatments_bp
 from .sales_routes import sales_bp
 from .expense_routes import expense_bp
 from .auth_routes import auth_bp
+from .search_routes import search_bp
+from .breeding_routes import breeding_bp
+from .job_routes import jobs_bp
+from .export_routes import export_bp
+from .sync_routes import sync_bp
 
 # Keep a list of all blueprints here
-all_blueprints = [main, animals_bp, treatments_bp, sales_bp, expense_bp, auth_bp]
+all_blueprints = [main, animals_bp, treatments_bp, sales_bp, expense_bp, auth_bp, search_bp, breeding_bp, jobs_bp, export_bp, sync_bp]
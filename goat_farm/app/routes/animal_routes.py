@@ -1,14 +1,29 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from app.models import Animal
 from datetime import date
 from app.extensions import db
+from app.pagination import paginated_response
+from app.serializers import animal_load_options, parse_include, serialize_animals, serialize_listing
+from app.cache import cache
+from app.bulk_import import BulkImportError, import_animals, read_rows
+from app.versions import conditional
+from app.pedigree import (
+    ancestors_query, descendants_query, invalidate_pedigree, lineage, load_pedigree, parse_generations
+)
 
 animals_bp = Blueprint("animal", __name__, url_prefix="/animals")
 
+
 @animals_bp.route("/get", methods=["GET"])
+@conditional("animals", "treatments", "sales")
 def get_animals():
-    animals = Animal.query.filter(Animal.status == "Active").all()
-    return jsonify([animal.to_dict() for animal in animals]), 200
+    try:
+        include = parse_include(request.args.get("include"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = Animal.query.filter(Animal.status == "Active").options(*animal_load_options(include))
+    return paginated_response(query, Animal, lambda animals: serialize_animals(animals, include))
 
 
 @animals_bp.route("/<int:animal_id>", methods=["GET"])
@@ -18,6 +33,49 @@ def get_animal(animal_id):
         return jsonify({"message": "Animal is not active"}), 404
     return jsonify(animal.to_dict()), 200
 
+@animals_bp.route("/<int:animal_id>/pedigree", methods=["GET"])
+def get_pedigree(animal_id):
+    Animal.query.get_or_404(animal_id)
+    try:
+        generations = parse_generations(request.args.get("generations"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    ancestors = lineage(ancestors_query(animal_id, generations))
+    return jsonify({
+        "animal_id": animal_id,
+        "generations": generations,
+        "inbreeding_coefficient": ancestors[0]["inbreeding_coefficient"],
+        "ancestors": ancestors[1:]
+    }), 200
+
+@animals_bp.route("/<int:animal_id>/descendants", methods=["GET"])
+def get_descendants(animal_id):
+    Animal.query.get_or_404(animal_id)
+    try:
+        generations = parse_generations(request.args.get("generations"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    descendants = lineage(descendants_query(animal_id, generations))
+    return jsonify({"animal_id": animal_id, "generations": generations, "descendants": descendants[1:]}), 200
+
+@animals_bp.route("/kinship", methods=["GET"])
+def get_kinship():
+    # ?ids=1,2,3 -> square matrix of kinship coefficients (the inbreeding a mating would produce)
+    try:
+        ids = [int(part) for part in request.args.get("ids", "").split(",") if part.strip()]
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of integers"}), 400
+    if not 1 <= len(ids) <= 500:
+        return jsonify({"error": "Give between 1 and 500 ids"}), 400
+
+    pedigree = load_pedigree()
+    missing = [animal_id for animal_id in ids if animal_id not in pedigree]
+    if missing:
+        return jsonify({"error": f"Animals not found: {missing}"}), 404
+    return jsonify({"ids": ids, "kinship": pedigree.kinship_matrix(ids, ids)}), 200
+
 @animals_bp.route("/add", methods=["POST"])
 def add_animal():
     data = request.get_json()
@@ -35,7 +93,6 @@ def add_animal():
         acquisition_date=date.fromisoformat(data["acquisition_date"]) if "acquisition_date" in data else None,
         acquisition_price=data.get("acquisition_price"),
         source=data.get("source"),
-        offspring_count= data.get("offspring_count", 0),
         mother_id=data.get("mother_id"),
         father_id=data.get("father_id"),
         created_at=data.get("created_at"),
@@ -45,6 +102,34 @@ def add_animal():
     db.session.commit()
     return jsonify(new_animal.to_dict(), {"message": "Animal added successfully"}), 201
 
+@animals_bp.route("/bulk", methods=["POST"])
+def bulk_add_animals():
+    # Accepts a JSON array, NDJSON or CSV body (or a multipart "file" upload).
+    # Parents can be referenced by mother_tag_id/father_tag_id within the same upload.
+    try:
+        rows = read_rows(request)
+    except BulkImportError as e:
+        return jsonify({"error": str(e)}), 400
+
+    max_rows = current_app.config.get("BULK_IMPORT_MAX_ROWS", 100000)
+    if len(rows) > max_rows:
+        return jsonify({"error": f"At most {max_rows} rows per upload"}), 413
+
+    try:
+        chunk_size = int(request.args.get("chunk_size", current_app.config.get("BULK_IMPORT_CHUNK_SIZE", 1000)))
+    except ValueError:
+        return jsonify({"error": "chunk_size must be an integer"}), 400
+    if chunk_size < 1:
+        return jsonify({"error": "chunk_size must be positive"}), 400
+
+    report = import_animals(rows, chunk_size=chunk_size)
+    if report["written"]:
+        # Rows go in through Core executemany, which the cache's ORM hooks never see
+        cache.invalidate("animals")
+        invalidate_pedigree()
+    status = 201 if report["written"] else 400
+    return jsonify(report), status
+
 @animals_bp.route("/<int:animal_id>/update", methods=["PATCH"])
 def update_animal(animal_id):
     data = request.get_json()
@@ -68,27 +153,44 @@ def update_animal(animal_id):
 
 # This route is for handling archiving (soft delete)
 @animals_bp.route("/archive", methods=["GET"])
+@conditional("animals", "treatments", "sales")
 def get_archived_animals():
     status_filter = request.args.get("status") #means that if status is provided in the query params(url), we filter by it
-    query = Animal.query
+    try:
+        include = parse_include(request.args.get("include"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = Animal.query.options(*animal_load_options(include))
     if status_filter:
         query = query.filter_by(status=status_filter)
-    animals = query.all()
-    return jsonify([animal.to_dict() for animal in animals]), 200
+    return paginated_response(query, Animal, lambda animals: serialize_animals(animals, include))
 
 @animals_bp.route("/deceased", methods=["GET"])
+@conditional("animals", "treatments", "sales")
 def get_deceased_animals():
     status_filter = request.args.get("status")
+    try:
+        include = parse_include(request.args.get("include"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    query = Animal.query.options(*animal_load_options(include))
     if status_filter:
-        animals = Animal.query.filter_by(status=status_filter).all()
+        query = query.filter_by(status=status_filter)
     else:
         # Default: show only active animals
-        animals = Animal.query.filter(Animal.status != "Deceased").all()
+        query = query.filter(Animal.status != "Deceased")
 
-    return jsonify([animal.to_dict() for animal in animals]), 200
+    try:
+        animals = serialize_listing(query, Animal, lambda rows: serialize_animals(rows, include))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(animals), 200
 
 @animals_bp.route("/total/animals", methods=["GET"])
+@conditional("animals")
+@cache.cached("animals")
 def get_total_animals():
     total = Animal.query.count()
 
@@ -1,9 +1,48 @@
 from flask import Blueprint, request, jsonify
 from app.models import db, Animal, Breeding
 from datetime import date, timedelta
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app.breeding import recommend_bucks
+from app.date_buckets import date_bucket
+from app.pagination import paginated_response
+from app.serializers import breeding_load_options
+from app.versions import conditional
 
 breeding_bp = Blueprint("breeding", __name__, url_prefix="/breeding")
 
+BREEDING_STATUSES = ("Pending", "Confirmed", "Completed", "Failed")
+# Goats have a gestation period of approximately 150 days
+GESTATION_DAYS = 150
+CALENDAR_GRAINS = ("week", "month")
+
+
+@breeding_bp.route("/get", methods=["GET"])
+@conditional("breeding_records", "animals")
+def get_breeding_records():
+    # Optional filters: ?status=, ?doe_id=, ?buck_id=
+    if request.args.get("order", "id") != "id":
+        return jsonify({"error": "Breeding records can only be ordered by id"}), 400
+
+    query = Breeding.query.options(*breeding_load_options())
+    status = request.args.get("status")
+    if status:
+        query = query.filter(Breeding.status == status)
+    for field in ("doe_id", "buck_id"):
+        value = request.args.get(field)
+        if value:
+            try:
+                query = query.filter(getattr(Breeding, field) == int(value))
+            except ValueError:
+                return jsonify({"error": f"{field} must be an integer"}), 400
+    return paginated_response(query, Breeding, lambda records: [record.to_dict() for record in records])
+
+
+@breeding_bp.route("/<int:breeding_id>", methods=["GET"])
+def get_breeding_record(breeding_id):
+    record = Breeding.query.options(*breeding_load_options()).get_or_404(breeding_id)
+    return jsonify(record.to_dict()), 200
+
 @breeding_bp.route("/add", methods=["POST"])
 def add_breeding_record():
     data = request.get_json()
@@ -33,8 +72,7 @@ def add_breeding_record():
     except (ValueError, TypeError):
         return jsonify({"error": "Invalid date format. Please use YYYY-MM-DD."}), 400
 
-    # Goats have a gestation period of approximately 150 days
-    expected_kidding_date = mating_date + timedelta(days=150)
+    expected_kidding_date = mating_date + timedelta(days=GESTATION_DAYS)
 
     new_breeding_record = Breeding(
         doe_id=doe_id,
@@ -50,4 +88,161 @@ def add_breeding_record():
     return jsonify({
         "message": "Breeding record created successfully.",
         "record": new_breeding_record.to_dict()
-    }), 201
\ No newline at end of file
+    }), 201
+
+@breeding_bp.route("/<int:breeding_id>/update", methods=["PATCH"])
+def update_breeding_record(breeding_id):
+    data = request.get_json() or {}
+    record = Breeding.query.options(*breeding_load_options()).get_or_404(breeding_id)
+
+    status = data.get("status", record.status)
+    if status not in BREEDING_STATUSES:
+        return jsonify({"error": f"Invalid status. Allowed: {list(BREEDING_STATUSES)}"}), 400
+
+    try:
+        if "mating_date" in data:
+            record.mating_date = date.fromisoformat(data["mating_date"])
+            # Keep the due date in step unless the caller sets one explicitly
+            if "expected_kidding_date" not in data:
+                record.expected_kidding_date = record.mating_date + timedelta(days=GESTATION_DAYS)
+        if "expected_kidding_date" in data:
+            record.expected_kidding_date = (
+                date.fromisoformat(data["expected_kidding_date"]) if data["expected_kidding_date"] else None
+            )
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid date format. Please use YYYY-MM-DD."}), 400
+    record.status = status
+
+    db.session.commit()
+    return jsonify({"message": "Breeding record updated successfully.", "record": record.to_dict()}), 200
+
+
+@breeding_bp.route("/<int:breeding_id>/kidding", methods=["POST"])
+def record_kidding_outcome(breeding_id):
+    """
+    Record how a pregnancy ended. Body: {"kidding_date": "YYYY-MM-DD", "kids": [{"tag_id", "sex", ...}]}.
+    Each kid is added to the herd with the doe and buck as parents; no kids marks the mating Failed.
+    """
+    data = request.get_json() or {}
+    record = Breeding.query.options(*breeding_load_options()).get_or_404(breeding_id)
+    if record.status in ("Completed", "Failed"):
+        return jsonify({"error": f"Kidding outcome already recorded ({record.status})."}), 409
+
+    try:
+        kidding_date = date.fromisoformat(data["kidding_date"]) if data.get("kidding_date") else date.today()
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid date format. Please use YYYY-MM-DD."}), 400
+
+    kids = data.get("kids", [])
+    if not isinstance(kids, list):
+        return jsonify({"error": "kids must be a list."}), 400
+    for kid in kids:
+        if not isinstance(kid, dict) or not kid.get("tag_id") or not kid.get("sex"):
+            return jsonify({"error": "Every kid needs a tag_id and sex."}), 400
+
+    doe_breed = db.session.query(Animal.breed).filter(Animal.id == record.doe_id).scalar()
+    new_kids = [
+        Animal(
+            tag_id=kid["tag_id"],
+            breed=kid.get("breed", doe_breed),
+            sex=kid["sex"],
+            birth_date=kidding_date,
+            weight=kid.get("weight"),
+            health_status=kid.get("health_status", "Healthy"),
+            notes=kid.get("notes", ""),
+            category=kid.get("category", ""),
+            source="Born on farm",
+            mother_id=record.doe_id,
+            father_id=record.buck_id
+        )
+        for kid in kids
+    ]
+    db.session.add_all(new_kids)
+    record.kidding_date = kidding_date
+    record.kids_born = len(new_kids)
+    record.status = "Completed" if new_kids else "Failed"
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "A kid's tag_id is already in use."}), 400
+
+    return jsonify({
+        "message": "Kidding outcome recorded.",
+        "record": record.to_dict(),
+        "kids": [kid.to_dict(include=()) for kid in new_kids]
+    }), 201
+
+
+@breeding_bp.route("/calendar", methods=["GET"])
+@conditional("breeding_records")
+def get_kidding_calendar():
+    """
+    Expected kiddings per week (keyed by Monday) or month, from one grouped query.
+    ?grain=week|month, ?from=/?to= (default: today to 180 days out), ?status= (default: open pregnancies).
+    """
+    grain = request.args.get("grain", "month")
+    if grain not in CALENDAR_GRAINS:
+        return jsonify({"error": f"Invalid grain. Allowed: {list(CALENDAR_GRAINS)}"}), 400
+    try:
+        start = date.fromisoformat(request.args["from"]) if request.args.get("from") else date.today()
+        end = date.fromisoformat(request.args["to"]) if request.args.get("to") else start + timedelta(days=180)
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Please use YYYY-MM-DD."}), 400
+    statuses = request.args.get("status")
+    statuses = [part.strip() for part in statuses.split(",")] if statuses else ["Pending", "Confirmed"]
+
+    period = date_bucket(Breeding.expected_kidding_date, grain).label("period")
+    rows = (
+        db.session.query(
+            period,
+            func.count(Breeding.id).label("expected_kiddings"),
+            func.count(func.distinct(Breeding.doe_id)).label("does"),
+            func.min(Breeding.expected_kidding_date).label("first_due"),
+            func.max(Breeding.expected_kidding_date).label("last_due")
+        )
+        .filter(Breeding.expected_kidding_date.between(start, end), Breeding.status.in_(statuses))
+        .group_by(period)
+        .order_by(period)
+        .all()
+    )
+
+    return jsonify({
+        "grain": grain,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "periods": [
+            {
+                "period": row.period,
+                "expected_kiddings": row.expected_kiddings,
+                "does": row.does,
+                "first_due": row.first_due.isoformat(),
+                "last_due": row.last_due.isoformat()
+            }
+            for row in rows
+        ]
+    }), 200
+
+
+@breeding_bp.route("/recommendations", methods=["GET"])
+@conditional("breeding_records", "animals")
+def get_recommendations():
+    # ?doe_ids=1,2,3 for a batch of does; omit it to rank bucks for every active doe
+    doe_ids = None
+    if request.args.get("doe_ids"):
+        try:
+            doe_ids = [int(part) for part in request.args["doe_ids"].split(",") if part.strip()]
+        except ValueError:
+            return jsonify({"error": "doe_ids must be a comma-separated list of integers"}), 400
+    try:
+        limit = int(request.args.get("limit", 5))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not 1 <= limit <= 100:
+        return jsonify({"error": "limit must be between 1 and 100"}), 400
+
+    recommendations, unknown = recommend_bucks(doe_ids, limit=limit)
+    if unknown:
+        return jsonify({"error": f"Active does not found: {unknown}"}), 404
+    return jsonify({"recommendations": recommendations}), 200
@@ -3,13 +3,21 @@ from app.models import Sale, Animal, Expense
 from datetime import datetime,timedelta,date
 from app.extensions import db
 from sqlalchemy import func
+from app.cache import cache
+from app.serializers import serialize_listing
+from app.aggregates import parse_windows, window_cutoffs, windowed_sums
+from app.versions import conditional
 
 expense_bp = Blueprint("expenses", __name__, url_prefix="/expenses")
 
 @expense_bp.route("/get", methods=["GET"])
+@conditional("expenses")
 def get_expenses():
-    expenses = Expense.query.all()
-    return jsonify([expense.to_dict() for expense in expenses]), 200
+    try:
+        expenses = serialize_listing(Expense.query, Expense, lambda rows: [e.to_dict() for e in rows])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(expenses), 200
 
 @expense_bp.route("/<int:expense_id>", methods=["GET"])
 def get_expense(expense_id):
@@ -20,22 +28,25 @@ def get_expense(expense_id):
     return jsonify(expense.to_dict()), 200
 
 @expense_bp.route("/total", methods=["GET"])
+@conditional("expenses")
+@cache.cached("expenses")
 def get_total_expenses():
-    
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    try:
+        windows = parse_windows(request.args.get("windows"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    total_last_30_days = (
-        db.session.query(func.sum(Expense.amount))
-        .filter(Expense.date >= thirty_days_ago)
-        .scalar()
-    ) or 0  
+    # Every window comes out of a single scan of the expenses table
+    sums = windowed_sums(Expense.amount, Expense.date, window_cutoffs(windows))
 
-    total_all_time = db.session.query(func.sum(Expense.amount)).scalar() or 0
-
-    return jsonify({
-        "total_expenses_last_30_days": total_last_30_days,
-        "total_expenses_all_time": total_all_time
-    }), 200
+    result = {
+        "total_expenses_last_30_days": sums["last_30_days"],
+        "total_expenses_year_to_date": sums["year_to_date"],
+        "total_expenses_all_time": sums["lifetime"]
+    }
+    if windows:
+        result["windows"] = {str(days): sums[str(days)] for days in windows}
+    return jsonify(result), 200
 
 
 @expense_bp.route("/<int:expense_id>/update", methods=["PATCH"])
@@ -43,7 +54,8 @@ def update_expense(expense_id):
     data = request.get_json()
     expense = Expense.query.get_or_404(expense_id)
     expense.amount = data.get("amount", expense.amount)
-    expense.description = data.get("description", expense.description)
+    # Expense has no description column; accept it as an alias for notes
+    expense.notes = data.get("notes", data.get("description", expense.notes))
     expense.date = date.fromisoformat(data["date"]) if "date" in data else expense.date
     db.session.commit()
     return jsonify(expense.to_dict()), 200
@@ -0,0 +1,29 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from app.export import (
+    EXPORT_SPECS, ExportError, export_query, parquet_available, parse_date_range, stream_csv, stream_parquet
+)
+
+export_bp = Blueprint("export", __name__, url_prefix="/export")
+
+
+# /export/sales.csv?from=2025-01-01&to=2025-12-31 (also expenses, animals, treatments; .parquet with pyarrow)
+@export_bp.route("/<entity>.<any(csv, parquet):fmt>", methods=["GET"])
+def export_entity(entity, fmt):
+    if entity not in EXPORT_SPECS:
+        return jsonify({"error": f"Unknown entity. Allowed: {list(EXPORT_SPECS)}"}), 404
+    try:
+        start, end = parse_date_range(request.args)
+    except ExportError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = export_query(entity, start, end)
+    if fmt == "parquet":
+        if not parquet_available():
+            return jsonify({"error": "Parquet export needs pyarrow installed on the server"}), 501
+        body, mimetype = stream_parquet(query), "application/vnd.apache.parquet"
+    else:
+        body, mimetype = stream_csv(query), "text/csv"
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{entity}.{fmt}"'
+    return response
@@ -0,0 +1,65 @@
+import os
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request, send_file, url_for
+from app.models import Job
+from app.jobs import JOB_HANDLERS, JobError, submit_job
+from app.pagination import paginated_response
+
+jobs_bp = Blueprint("jobs", __name__, url_prefix="/jobs")
+
+
+@jobs_bp.route("", methods=["POST"])
+def submit():
+    # {"kind": "sales_stats_monthly", "params": {"fresh": 1}, "priority": 100}
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body must be a JSON object with kind and params"}), 400
+    try:
+        priority = int(data.get("priority", 100))
+        job, created = submit_job(data.get("kind"), data.get("params"), priority=priority)
+    except (JobError, ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = jsonify(job.to_dict())
+    response.headers["Location"] = url_for("jobs.status", job_id=job.id)
+    # 200 when an identical job is already queued/running or its artifact is still fresh
+    return response, 202 if created else 200
+
+
+@jobs_bp.route("", methods=["GET"])
+def list_jobs():
+    query = Job.query
+    status = request.args.get("status")
+    if status:
+        query = query.filter(Job.status == status)
+    return paginated_response(query, Job, lambda jobs: [job.to_dict() for job in jobs], orders=("id",))
+
+
+@jobs_bp.route("/kinds", methods=["GET"])
+def list_kinds():
+    return jsonify({
+        kind: list(getattr(handler, "allowed_params", ()))
+        for kind, handler in sorted(JOB_HANDLERS.items())
+    }), 200
+
+
+@jobs_bp.route("/<int:job_id>", methods=["GET"])
+def status(job_id):
+    job = Job.query.get_or_404(job_id)
+    data = job.to_dict()
+    if job.status == "succeeded" and job.result_path:
+        data["result_url"] = url_for("jobs.result", job_id=job.id)
+    return jsonify(data), 200
+
+
+@jobs_bp.route("/<int:job_id>/result", methods=["GET"])
+def result(job_id):
+    job = Job.query.get_or_404(job_id)
+    if job.status == "failed":
+        return jsonify({"error": "Job failed", "detail": job.error}), 409
+    if job.status != "succeeded":
+        return jsonify({"error": f"Job is {job.status}", "job": job.to_dict()}), 409
+    if not job.result_path or not os.path.exists(job.result_path) or job.expires_at <= datetime.now():
+        return jsonify({"error": "Result has expired; submit the job again"}), 410
+    return send_file(job.result_path, mimetype=job.result_mimetype, download_name=os.path.basename(job.result_path))
@@ -1,4 +1,6 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify
+from app.cache import cache
+from app.instrumentation import metrics
 
 main = Blueprint("main", __name__)
 
@@ -6,4 +8,18 @@ main = Blueprint("main", __name__)
 def home():
     return jsonify({"message": "Goat Farm Management System is running!"})
 
+@main.route("/cache/stats")
+def cache_stats():
+    return jsonify(cache.stats())
+
+# Prometheus scrape target: per-endpoint latency, query counts, rows and slow queries
+@main.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# Most recent statements slower than SLOW_QUERY_MS, newest first
+@main.route("/metrics/slow-queries")
+def slow_queries():
+    return jsonify(metrics.slow_query_samples())
+
 # Additional routes can be added here for managing animals, treatments, sales, and expenses.
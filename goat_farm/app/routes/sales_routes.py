@@ -2,15 +2,26 @@ from flask import Blueprint, jsonify, request
 from app.models import Sale, Animal
 from datetime import date,datetime,timedelta
 from app.extensions import db
-from app.models import Expense
+from app.models import Expense, AnimalCostTotal
+from app.ledger import get_cost_total
+from app.rollups import daily_sales_totals, get_rollups
+from app.date_buckets import date_bucket
+from app.cache import cache
+from app.serializers import serialize_listing
+from app.aggregates import parse_windows, window_cutoffs, windowed_sums
+from app.versions import conditional
 from sqlalchemy import func,case
 
 sales_bp = Blueprint("sales", __name__, url_prefix="/sales")    
 
 @sales_bp.route("/", methods=["GET"])
+@conditional("sales")
 def get_sales():
-    sales = Sale.query.all()
-    return jsonify([sale.to_dict() for sale in sales])
+    try:
+        sales = serialize_listing(Sale.query, Sale, lambda rows: [sale.to_dict() for sale in rows])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(sales)
 
 @sales_bp.route("/<int:sale_id>", methods=["GET"])
 def get_sale(sale_id):
@@ -40,10 +51,9 @@ def create_sale():
     if animal.status == "Sold":
         return jsonify({"error": "Animal already sold"}), 400
     
-    total_expenses = db.session.query(db.func.sum(Expense.amount)).filter_by(animal_id=animal.id).scalar() or 0
-
-    acquisition_price = animal.acquisition_price or 0.0
-    profit = price - (acquisition_price + total_expenses)
+    # Acquisition price + running expense total come from the cost ledger (one PK lookup)
+    cost_total = get_cost_total(animal.id)
+    profit = price - cost_total.total_cost
 
     sale = Sale(
         animal_id=animal_id,
@@ -68,30 +78,31 @@ def create_sale():
     return jsonify({"message": "Sale created successfully", "sale": sale.to_dict()}), 201
 
 @sales_bp.route("/total_profit", methods=["GET"])
+@conditional("sales", "expenses")
+@cache.cached("sales")
 def get_total_profit():
-    last_thirty_days = datetime.utcnow() - timedelta(days=30)
-    profit_for_the_last_30_days = db.session.query(
-        db.func.sum(Sale.profit)
-    ).filter(Sale.sale_date >= last_thirty_days).scalar() or 0.0
-
-    annual_profit = db.session.query(
-        db.func.sum(Sale.profit)
-    ).filter(Sale.sale_date >= datetime(datetime.utcnow().year, 1, 1)).scalar() or 0.0
-
-    total_profit = db.session.query(
-        db.func.sum(Sale.profit)
-    ).scalar() or 0.0
-
-    return jsonify(
-        {
-            "total_profit": profit_for_the_last_30_days,
-            "annual_profit": annual_profit,
-            "lifetime_profit": total_profit
-        }), 200
+    try:
+        windows = parse_windows(request.args.get("windows"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Every window comes out of a single scan of the sales table
+    sums = windowed_sums(Sale.profit, Sale.sale_date, window_cutoffs(windows))
+
+    result = {
+        "total_profit": sums["last_30_days"],
+        "annual_profit": sums["year_to_date"],
+        "lifetime_profit": sums["lifetime"]
+    }
+    if windows:
+        result["windows"] = {str(days): sums[str(days)] for days in windows}
+    return jsonify(result), 200
 
 # A list of recent sales.
 
 @sales_bp.route("/recent", methods=["GET"])
+@conditional("sales")
+@cache.cached("sales")
 def get_recent_sales():
 
     recent_sales = Sale.query.order_by(Sale.sale_date.desc()).limit(2).all()
@@ -115,24 +126,28 @@ def update_sale(sale_id):
     return jsonify(sale.to_dict()), 200
 
  
+def wants_fresh_stats():
+    # ?fresh=1 bypasses the rollup tables and recomputes from sales/expenses
+    return request.args.get("fresh", "").lower() in ("1", "true", "yes")
+
+
 @sales_bp.route("/stats/daily", methods=["GET"])
+@conditional("sales", "expenses")
 def get_daily_sales_stats():
-    # Perform a LEFT JOIN between Sale and Expense tables
-    daily_stats = (
-        db.session.query(
-            Sale.sale_date.label("sale_date"),
-            func.count(Sale.id).label("total_sales"),
-            func.sum(Sale.price).label("total_revenue"),
-            func.coalesce(func.sum(Expense.amount), 0).label("total_expenses"),
-            (
-                func.sum(Sale.price) - func.coalesce(func.sum(Expense.amount), 0)
-            ).label("total_profit")
-        )
-        .outerjoin(Expense, Sale.animal_id == Expense.animal_id)
-        .group_by(Sale.sale_date)
-        .order_by(Sale.sale_date.desc())
-        .all()
-    )
+    if not wants_fresh_stats():
+        result = [
+            {
+                "sale_date": rollup.period,
+                "total_sales": rollup.total_sales,
+                "total_revenue": rollup.total_revenue,
+                "total_expenses": rollup.total_expenses,
+                "total_profit": rollup.total_profit
+            }
+            for rollup in get_rollups("day", descending=True)
+        ]
+        return jsonify(result), 200
+
+    daily_stats = daily_sales_totals().order_by(Sale.sale_date.desc()).all()
 
     result = [
         {
@@ -140,54 +155,41 @@ def get_daily_sales_stats():
             "total_sales": stat.total_sales,
             "total_revenue": stat.total_revenue,
             "total_expenses": stat.total_expenses,
-            "total_profit": stat.total_profit
+            "total_profit": (stat.total_revenue or 0) - (stat.total_expenses or 0)
         }
         for stat in daily_stats
     ]
 
     return jsonify(result), 200
 
-from sqlalchemy import func, and_
-from flask import jsonify
 
 @sales_bp.route("/stats/monthly", methods=["GET"])
+@conditional("sales", "expenses")
 def get_monthly_sales_stats():
-    # 1) Build a per-sale aggregation: sale price + sum of expenses for that animal up to the sale date
-    per_sale = (
-        db.session.query(
-            Sale.id.label("sale_id"),
-            Sale.animal_id.label("animal_id"),
-            Sale.sale_date.label("sale_date"),
-            Sale.price.label("sale_price"),
-            func.coalesce(func.sum(Expense.amount), 0).label("total_expenses")
-        )
-        .outerjoin(
-            Expense,
-            and_(
-                Expense.animal_id == Sale.animal_id,
-                Expense.date <= Sale.sale_date
-            )
-        )
-        .group_by(Sale.id)  
-    ).subquery()
-    #THis is exactly what the above subquery does:
-    """
-    SELECT * FROM (
-    SELECT Sale.id, Sale.price, SUM(Expense.amount) AS total_expenses
-    FROM Sale LEFT JOIN Expense ...
-    GROUP BY Sale.id
-) AS per_sale
-    """
-
-    # 2) Aggregate per-sale rows into monthly stats
+    if not wants_fresh_stats():
+        result = [
+            {
+                "sale_month": rollup.period,
+                "total_sales": rollup.total_sales,
+                "total_revenue": rollup.total_revenue,
+                "total_expenses": rollup.total_expenses,
+                "total_profit": rollup.total_profit
+            }
+            for rollup in get_rollups("month")
+        ]
+        return jsonify(result), 200
+
+    # Each sale is joined to its animal's cost ledger row, which already holds the
+    # running expense total, so there is no per-sale SUM over the expenses table
     monthly_stats = (
         db.session.query(
-            func.to_char(per_sale.c.sale_date, "YYYY-MM").label("sale_month"),
-            func.count(per_sale.c.sale_id).label("total_sales"),
-            func.sum(per_sale.c.sale_price).label("total_revenue"),
-            func.sum(per_sale.c.total_expenses).label("total_expenses"),
-            (func.sum(per_sale.c.sale_price) - func.sum(per_sale.c.total_expenses)).label("total_profit")
+            date_bucket(Sale.sale_date, "month").label("sale_month"),
+            func.count(Sale.id).label("total_sales"),
+            func.sum(Sale.price).label("total_revenue"),
+            func.sum(func.coalesce(AnimalCostTotal.expense_total, 0)).label("total_expenses"),
+            (func.sum(Sale.price) - func.sum(func.coalesce(AnimalCostTotal.expense_total, 0))).label("total_profit")
         )
+        .outerjoin(AnimalCostTotal, AnimalCostTotal.animal_id == Sale.animal_id)
         .group_by("sale_month")
         .order_by("sale_month")
         .all()
@@ -208,12 +210,24 @@ def get_monthly_sales_stats():
 
 
 @sales_bp.route("/stats/yearly", methods=["GET"])
+@conditional("sales", "expenses")
 def get_yearly_sales_stats():   
+    if not wants_fresh_stats():
+        result = [
+            {
+                "sale_year": rollup.period,
+                "total_sales": rollup.total_sales,
+                "total_revenue": rollup.total_revenue
+            }
+            for rollup in get_rollups("year")
+        ]
+        return jsonify(result), 200
+
     yearly_stats = db.session.query(
-        db.func.to_char(Sale.sale_date, "YYYY").label("sale_year"),
+        date_bucket(Sale.sale_date, "year").label("sale_year"),
         db.func.count(Sale.id).label("total_sales"),
         db.func.sum(Sale.price).label("total_revenue")
-    ).group_by("sale_year").all()
+    ).group_by("sale_year").order_by("sale_year").all()
     
     result = [
         {
@@ -226,6 +240,7 @@ def get_yearly_sales_stats():
     return jsonify(result), 200     
 
 @sales_bp.route("/stats/payment_method", methods=["GET"])
+@conditional("sales", "expenses")
 def get_sales_stats_by_payment_method():    
     payment_method_stats = db.session.query(
         Sale.payment_method,
@@ -244,6 +259,7 @@ def get_sales_stats_by_payment_method():
     return jsonify(result), 200     
 
 @sales_bp.route("/stats/purpose", methods=["GET"])
+@conditional("sales", "expenses")
 def get_sales_stats_by_purpose():       
     purpose_stats = db.session.query(
         Sale.purpose,
@@ -262,6 +278,7 @@ def get_sales_stats_by_purpose():
     return jsonify(result), 200 
 
 @sales_bp.route("/stats/status", methods=["GET"])
+@conditional("sales", "expenses")
 def get_sales_stats_by_status():        
     status_stats = db.session.query(
         Sale.status,
@@ -0,0 +1,51 @@
+from flask import Blueprint, current_app, jsonify, request
+from app.models import Animal, Sale, Treatment
+from app.search import parse_types, search
+from app.serializers import serialize_animals
+
+search_bp = Blueprint("search", __name__, url_prefix="/search")
+
+
+@search_bp.route("", methods=["GET"])
+def search_all():
+    q = (request.args.get("q") or "").strip()
+    if not q:
+        return jsonify({"error": "q is required"}), 400
+    try:
+        types = parse_types(request.args.get("types"))
+        limit = min(int(request.args.get("limit", 20)), current_app.config.get("MAX_PAGE_SIZE", 1000))
+        offset = int(request.args.get("offset", 0))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if limit < 1 or offset < 0:
+        return jsonify({"error": "limit must be positive and offset non-negative"}), 400
+
+    # Fetch one extra match to know whether there is a next page
+    matches = search(q, types, limit=limit + 1, offset=offset)
+    has_more = len(matches) > limit
+    matches = matches[:limit]
+
+    # Hydrate the page with one query per entity type
+    ids = {}
+    for kind, item_id, _ in matches:
+        ids.setdefault(kind, []).append(item_id)
+    items = {}
+    if ids.get("animals"):
+        animals = Animal.query.filter(Animal.id.in_(ids["animals"])).all()
+        items.update({("animals", a["id"]): a for a in serialize_animals(animals, include=())})
+    if ids.get("sales"):
+        items.update({("sales", s.id): s.to_dict() for s in Sale.query.filter(Sale.id.in_(ids["sales"]))})
+    if ids.get("treatments"):
+        items.update({("treatments", t.id): t.to_dict() for t in Treatment.query.filter(Treatment.id.in_(ids["treatments"]))})
+
+    results = [
+        {"type": kind, "id": item_id, "rank": float(rank), "item": items.get((kind, item_id))}
+        for kind, item_id, rank in matches
+    ]
+    return jsonify({
+        "query": q,
+        "results": results,
+        "limit": limit,
+        "offset": offset,
+        "next_offset": offset + limit if has_more else None
+    }), 200
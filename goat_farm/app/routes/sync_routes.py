@@ -0,0 +1,43 @@
+from flask import Blueprint, current_app, jsonify, request
+from app.instrumentation import allow_repeated_queries
+from app.sync import SyncError, apply_changes, read_changes
+
+sync_bp = Blueprint("sync", __name__, url_prefix="/sync")
+
+
+# GET /sync (full pull) or /sync?since=<next token from the last sync>; repeat with "next" while has_more
+@sync_bp.route("", methods=["GET"])
+def pull():
+    try:
+        limit = int(request.args.get("limit", current_app.config.get("SYNC_PAGE_SIZE", 500)))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+    limit = min(limit, current_app.config.get("SYNC_MAX_PAGE_SIZE", 5000))
+
+    try:
+        return jsonify(read_changes(request.args.get("since"), limit)), 200
+    except SyncError as e:
+        return jsonify({"error": str(e)}), e.status
+
+
+# POST /sync {"device_id": "...",
+#             "changes": [{"entity": "treatments", "op": "create", "client_id": "...", "data": {...}},
+#                         {"entity": "expenses", "op": "update", "id": 7, "base_updated_at": "...", "data": {...}}]}
+# Rows the batch refers to are loaded up front; the ledger/rollup mapper events still run once per created row
+@sync_bp.route("", methods=["POST"])
+@allow_repeated_queries
+def push():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body must be a JSON object with device_id and changes"}), 400
+    try:
+        results = apply_changes(data.get("changes"), data.get("device_id"))
+    except SyncError as e:
+        return jsonify({"error": str(e)}), e.status
+
+    counts = {status: 0 for status in ("applied", "duplicate", "conflict", "rejected")}
+    for result in results:
+        counts[result["status"]] += 1
+    return jsonify({"results": results, **counts}), 200
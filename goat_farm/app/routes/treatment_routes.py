@@ -1,27 +1,26 @@
 from flask import Blueprint, jsonify, request
-from app.models import Treatment
+from app.models import ALLOWED_TREATMENT_TYPES, Treatment
 from app.extensions import db
-from datetime import date   
-from app.models import Animal
+from datetime import date, timedelta
+from app.models import Animal, Expense, AnimalCostTotal
+from app.cache import cache
+from app.pagination import paginated_response
+from app.serializers import serialize_listing
+from app.reminders import due_treatments_query, parse_within
+from app.versions import bump_versions, conditional
+from sqlalchemy import Date, Float, String, Text, case, func, literal, or_, select
 
 treatments_bp = Blueprint("treatments", __name__, url_prefix="/treatments")
 
-ALLOWED_TREATMENT_TYPES = [
-    "Vaccination",
-    "Deworming",
-    "Antibiotic",
-    "Check-up",
-    "Surgery",
-    "Vitamin Supplement",
-    "Other"
-]
-
-
 
 @treatments_bp.route("/get", methods=["GET"])
+@conditional("treatments")
 def get_treatments():
-    treatments = Treatment.query.all()
-    return jsonify([treatment.to_dict() for treatment in treatments]), 200  
+    try:
+        treatments = serialize_listing(Treatment.query, Treatment, lambda rows: [t.to_dict() for t in rows])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(treatments), 200
 
 @treatments_bp.route("/<int:treatment_id>", methods=["GET"])
 def get_treatment(treatment_id):
@@ -71,13 +70,29 @@ def add_treatment():
 
     return jsonify({"message": "Treatment added successfully"}), 201
 
-# A list of upcoming treatments (where next_due_date is in the near future).
+# A list of upcoming treatments (where next_due_date is in the near future), soonest first, paged.
 @treatments_bp.route("/upcoming", methods=["GET"])
+@conditional("treatments")
 def get_upcoming_treatments():
-    upcoming_treatments = Treatment.query.filter(
-        Treatment.next_due_date >= date.today()
-    ).all()
-    return jsonify([treatment.to_dict() for treatment in upcoming_treatments]), 200
+    query = Treatment.query.filter(Treatment.next_due_date >= date.today())
+    return paginated_response(query, Treatment, lambda treatments: [t.to_dict() for t in treatments],
+                              orders=("next_due_date", "id"), default_order="next_due_date")
+
+# Treatments coming due: ?within=7d (or 2w, or days), ?overdue=1 to include anything already past due.
+# Only the latest treatment of each type per active animal counts.
+@treatments_bp.route("/due", methods=["GET"])
+@conditional("treatments", "animals")
+def get_due_treatments():
+    try:
+        within = parse_within(request.args.get("within"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    today = date.today()
+    start = None if request.args.get("overdue") in ("1", "true", "yes") else today
+    query = due_treatments_query(start, today + timedelta(days=within))
+    return paginated_response(query, Treatment, lambda treatments: [t.to_dict() for t in treatments],
+                              orders=("next_due_date", "id"), default_order="next_due_date")
 
 @treatments_bp.route("/<int:treatment_id>/update", methods=["PATCH"])
 def update_treatment(treatment_id):         
@@ -101,3 +116,123 @@ def delete_treatment(treatment_id):
     db.session.delete(treatment)
     db.session.commit()
     return jsonify({"message": "Treatment deleted successfully"}), 200      
+
+
+# Herd-wide campaigns (vaccination, deworming, ...): one INSERT ... SELECT for the
+# treatments and one for their expenses, all in a single transaction.
+@treatments_bp.route("/bulk", methods=["POST"])
+def add_bulk_treatment():
+    data = request.get_json() or {}
+    template = data.get("treatment") or {}
+    selection = data.get("filter") or {}
+    tag_ids = data.get("tag_ids")
+
+    treatment_type = template.get("treatment_type")
+    if not treatment_type:
+        return jsonify({"error": "Treatment type is required"}), 400
+    if treatment_type not in ALLOWED_TREATMENT_TYPES:
+        return jsonify({"error": f"Invalid treatment type. Allowed: {ALLOWED_TREATMENT_TYPES}"}), 400
+    if treatment_type == "Other":
+        treatment_type = template.get("custom_type")
+        if not treatment_type:
+            return jsonify({"error": "Custom treatment type is required when 'Other' is selected"}), 400
+
+    if not selection and not tag_ids:
+        return jsonify({"error": "Provide a filter (category, breed, status) or a list of tag_ids"}), 400
+    unknown = set(selection) - {"category", "breed", "status"}
+    if unknown:
+        return jsonify({"error": f"Invalid filter fields: {sorted(unknown)}"}), 400
+    if selection.get("status", "Active") != "Active":
+        return jsonify({"error": "Cannot add treatment to inactive animal"}), 400
+    if tag_ids is not None and not isinstance(tag_ids, list):
+        return jsonify({"error": "tag_ids must be a list"}), 400
+
+    try:
+        treatment_date = date.fromisoformat(template["treatment_date"]) if template.get("treatment_date") else date.today()
+        next_due_date = date.fromisoformat(template["next_due_date"]) if template.get("next_due_date") else None
+        cost = float(template["cost"]) if template.get("cost") is not None else None
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid treatment_date, next_due_date or cost"}), 400
+
+    # Treatments only go to active animals, same rule as /treatments/add
+    conditions = [Animal.status == "Active"]
+    if selection.get("category"):
+        conditions.append(Animal.category == selection["category"])
+    if selection.get("breed"):
+        conditions.append(Animal.breed == selection["breed"])
+    if tag_ids:
+        conditions.append(Animal.tag_id.in_(tag_ids))
+
+    skipped_tag_ids = []
+    if tag_ids:
+        matched = set(db.session.execute(select(Animal.tag_id).where(*conditions)).scalars())
+        skipped_tag_ids = [tag for tag in tag_ids if tag not in matched]
+
+    medication = template.get("medication")
+    treatments = Treatment.__table__
+    result = db.session.execute(
+        treatments.insert().from_select(
+            ["animal_id", "treatment_type", "treatment_date", "medication", "dosage",
+             "next_due_date", "notes", "cost"],
+            select(
+                Animal.id,
+                literal(treatment_type),
+                literal(treatment_date, Date),
+                literal(medication, String),
+                literal(template.get("dosage"), String),
+                literal(next_due_date, Date),
+                literal(template.get("notes"), Text),
+                literal(cost, Float)
+            ).where(*conditions)
+        )
+    )
+    treatments_created = result.rowcount
+
+    expenses_created = 0
+    if cost and cost > 0 and treatments_created:
+        # Same rows add_treatment_expense would create one at a time
+        expenses = Expense.__table__
+        result = db.session.execute(
+            expenses.insert().from_select(
+                ["expense_type", "amount", "date", "animal_id", "notes"],
+                select(
+                    literal("Treatment"),
+                    literal(cost, Float),
+                    literal(treatment_date, Date),
+                    Animal.id,
+                    literal(f"{treatment_type} ({medication})")
+                ).where(*conditions)
+            )
+        )
+        expenses_created = result.rowcount
+
+        ledger = AnimalCostTotal.__table__
+        db.session.execute(
+            ledger.update()
+            .where(ledger.c.animal_id.in_(select(Animal.id).where(*conditions)))
+            .values(
+                expense_total=ledger.c.expense_total + cost,
+                last_expense_date=case(
+                    (or_(ledger.c.last_expense_date.is_(None), ledger.c.last_expense_date < treatment_date), treatment_date),
+                    else_=ledger.c.last_expense_date
+                ),
+                updated_at=func.current_timestamp()
+            )
+        )
+        # Active animals have no sale, so the sales rollups are unaffected
+
+    if not treatments_created:
+        db.session.rollback()
+        return jsonify({"error": "No active animals match the selection", "skipped_tag_ids": skipped_tag_ids}), 404
+
+    bump_versions("treatments", *(["expenses"] if expenses_created else []))
+    db.session.commit()
+    if expenses_created:
+        cache.invalidate("expenses")
+
+    return jsonify({
+        "message": "Treatments added successfully",
+        "treatments_created": treatments_created,
+        "expenses_created": expenses_created,
+        "skipped_tag_ids": skipped_tag_ids
+    }), 201
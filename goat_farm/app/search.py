@@ -0,0 +1,157 @@
+"""
+Full-text search across animals, sales and treatments.
+
+Postgres: GIN indexes on a 'simple' tsvector per table plus pg_trgm indexes on
+the short identifier columns (tag_id, buyer_name, medication), so both word
+matches and ILIKE '%...%' substring matches are index-assisted.
+
+SQLite (tests, benchmarks): a single FTS5 table kept in step by triggers. Each
+row's rowid encodes the entity (rowid = id * 4 + entity code) so updates and
+deletes hit the FTS table by rowid.
+"""
+import re
+
+from sqlalchemy import DDL, event, func, literal, literal_column, or_, select, text, union_all
+
+from app.extensions import db
+from app.models import Animal, Sale, Treatment
+
+# entity: (model, document columns, trigram column, FTS5 rowid code)
+SEARCH_SPECS = {
+    "animals": (Animal, ("tag_id", "breed", "category", "notes"), "tag_id", 1),
+    "sales": (Sale, ("buyer_name", "buyer_contact", "receipt_number", "notes"), "buyer_name", 2),
+    "treatments": (Treatment, ("treatment_type", "medication", "notes"), "medication", 3),
+}
+SEARCH_TYPES = tuple(SEARCH_SPECS)
+
+
+def search_document(model, columns):
+    """
+    The tsvector expression the GIN index is built on. Queries must use this
+    exact expression, so the literals are rendered inline rather than bound.
+    """
+    table = model.__table__
+    parts = [func.coalesce(table.c[column], literal_column("''")) for column in columns]
+    body = parts[0]
+    for part in parts[1:]:
+        body = body.op("||")(literal_column("' '")).op("||")(part)
+    return func.to_tsvector(literal_column("'simple'"), body)
+
+
+# Postgres indexes. ddl_if keeps SQLite's create_all from trying to build them.
+for _model, _columns, _trigram_column, _ in SEARCH_SPECS.values():
+    # Purely functional index: nothing in the expression ties it to a table, so attach it explicitly
+    _model.__table__.append_constraint(db.Index(
+        f"ix_{_model.__tablename__}_search_document",
+        search_document(_model, _columns),
+        postgresql_using="gin"
+    ).ddl_if(dialect="postgresql"))
+    db.Index(
+        f"ix_{_model.__tablename__}_{_trigram_column}_trgm",
+        getattr(_model, _trigram_column),
+        postgresql_using="gin",
+        postgresql_ops={_trigram_column: "gin_trgm_ops"}
+    ).ddl_if(dialect="postgresql")
+
+event.listen(
+    db.metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+
+def _sqlite_body(columns, row="new"):
+    return " || ' ' || ".join(f"coalesce({row}.{column}, '')" for column in columns)
+
+
+@event.listens_for(db.metadata, "after_create")
+def create_sqlite_search_index(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    # create_all runs again on existing databases; only a new index needs backfilling
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_fts'"
+    ).scalar()
+    connection.exec_driver_sql("CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(body)")
+    for entity, (model, columns, _, code) in SEARCH_SPECS.items():
+        table = model.__tablename__
+        body = _sqlite_body(columns)
+        connection.exec_driver_sql(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO search_fts(rowid, body) VALUES (new.id * 4 + {code}, {body});
+            END""")
+        connection.exec_driver_sql(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE ON {table} BEGIN
+                DELETE FROM search_fts WHERE rowid = old.id * 4 + {code};
+                INSERT INTO search_fts(rowid, body) VALUES (new.id * 4 + {code}, {body});
+            END""")
+        connection.exec_driver_sql(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM search_fts WHERE rowid = old.id * 4 + {code};
+            END""")
+        if not exists:
+            connection.exec_driver_sql(
+                f"INSERT INTO search_fts(rowid, body) SELECT id * 4 + {code}, {_sqlite_body(columns, table)} FROM {table}"
+            )
+
+
+@event.listens_for(db.metadata, "before_drop")
+def drop_sqlite_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS search_fts")
+
+
+def parse_types(value):
+    if not value:
+        return SEARCH_TYPES
+    types = tuple(part.strip() for part in value.split(",") if part.strip())
+    unknown = [part for part in types if part not in SEARCH_SPECS]
+    if unknown:
+        raise ValueError(f"Invalid types {unknown}. Allowed: {list(SEARCH_TYPES)}")
+    return types
+
+
+def _postgres_matches(q, types, limit, offset):
+    tsquery = func.plainto_tsquery(literal_column("'simple'"), q)
+    pattern = f"%{q}%"
+    selects = []
+    for entity in types:
+        model, columns, trigram_column, _ = SEARCH_SPECS[entity]
+        document = search_document(model, columns)
+        trigram = getattr(model, trigram_column)
+        selects.append(
+            select(
+                literal(entity).label("type"),
+                model.id.label("id"),
+                (func.ts_rank(document, tsquery) + func.similarity(func.coalesce(trigram, ""), q)).label("rank")
+            ).where(or_(document.op("@@")(tsquery), trigram.ilike(pattern)))
+        )
+    matches = union_all(*selects).subquery()
+    return db.session.execute(
+        select(matches.c.type, matches.c.id, matches.c.rank)
+        .order_by(matches.c.rank.desc(), matches.c.type, matches.c.id)
+        .limit(limit).offset(offset)
+    ).all()
+
+
+def _sqlite_matches(q, types, limit, offset):
+    # Quote every word and prefix-match it so user input can't inject FTS5 syntax
+    fts_query = " ".join(f'"{word}"*' for word in re.findall(r"\w+", q))
+    codes = {SEARCH_SPECS[entity][3]: entity for entity in types}
+    rows = db.session.execute(
+        text(
+            "SELECT rowid, -bm25(search_fts) AS score FROM search_fts "
+            f"WHERE search_fts MATCH :query AND rowid % 4 IN ({', '.join(str(code) for code in codes)}) "
+            "ORDER BY score DESC, rowid LIMIT :limit OFFSET :offset"
+        ),
+        {"query": fts_query, "limit": limit, "offset": offset}
+    ).all()
+    return [(codes[rowid % 4], rowid // 4, rank) for rowid, rank in rows]
+
+
+def search(q, types=SEARCH_TYPES, limit=20, offset=0):
+    """Return ranked (type, id, rank) matches for q, best first."""
+    if not re.search(r"\w", q):
+        return []
+    if db.session.get_bind().dialect.name == "postgresql":
+        return _postgres_matches(q, types, limit, offset)
+    return _sqlite_matches(q, types, limit, offset)
@@ -0,0 +1,82 @@
+from flask import request
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models import ANIMAL_INCLUDES, Animal, Breeding
+
+
+def parse_include(value):
+    """
+    Parse an ?include=treatments,sale query param. A missing param keeps the
+    full payload; an empty one strips every nested section.
+    """
+    if value is None:
+        return ANIMAL_INCLUDES
+    include = tuple(part.strip() for part in value.split(",") if part.strip())
+    unknown = [part for part in include if part not in ANIMAL_INCLUDES]
+    if unknown:
+        raise ValueError(f"Invalid include {unknown}. Allowed: {list(ANIMAL_INCLUDES)}")
+    return include
+
+
+def animal_load_options(include):
+    """Eager-load the requested sections in one SELECT ... IN per relationship."""
+    options = []
+    if "treatments" in include:
+        options.append(selectinload(Animal.treatments))
+    if "sale" in include:
+        options.append(selectinload(Animal.sale))
+    return options
+
+
+def serialize_animals(animals, include=ANIMAL_INCLUDES):
+    """
+    Serialize a batch of animals without per-row lazy loads. Relationships in
+    include should already be eager-loaded via animal_load_options.
+    """
+    return [animal.to_dict(include=include) for animal in animals]
+
+
+def breeding_load_options():
+    """Join in the doe's and buck's tag_id so Breeding.to_dict never lazy-loads them per row."""
+    return [
+        joinedload(Breeding.doe, innerjoin=True).load_only(Animal.tag_id),
+        joinedload(Breeding.buck, innerjoin=True).load_only(Animal.tag_id),
+    ]
+
+
+def parse_fields(value, model):
+    """
+    Parse ?fields=id,tag_id,status into column names of model's table, or
+    None when the param is absent (full payload).
+    """
+    if value is None:
+        return None
+    fields = tuple(dict.fromkeys(part.strip() for part in value.split(",") if part.strip()))
+    allowed = model.__table__.columns.keys()
+    unknown = [field for field in fields if field not in allowed]
+    if unknown or not fields:
+        raise ValueError(f"Invalid fields {unknown}. Allowed: {allowed}")
+    return fields
+
+
+def project(query, model, fields, keys=("id",)):
+    """
+    Narrow query to just the requested columns (plus `keys` the caller needs,
+    e.g. for cursors), so rows come back as tuples and no ORM objects are
+    built. Returns the new query and a serialize_many for its rows.
+    """
+    columns = tuple(dict.fromkeys((*keys, *fields)))
+    positions = [(field, columns.index(field)) for field in fields]
+
+    def serialize_rows(rows):
+        return [{field: row[i] for field, i in positions} for row in rows]
+
+    return query.with_entities(*(getattr(model, column) for column in columns)), serialize_rows
+
+
+def serialize_listing(query, model, serialize_many):
+    """Every row of query, projected to ?fields= when given. Raises ValueError for unknown fields."""
+    fields = parse_fields(request.args.get("fields"), model)
+    if fields:
+        query, serialize_many = project(query, model, fields)
+    return serialize_many(query.all())
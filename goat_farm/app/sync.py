@@ -0,0 +1,430 @@
+"""
+Delta sync for offline clients (GET/POST /sync).
+
+Reads return the animals, treatments and expenses whose updated_at falls
+after the client's token, plus the ids deleted since then (sync_tombstones).
+A token is an opaque, base64-encoded window: `since` is the database clock
+at the end of the previous sync, and `until`/`after` keep the position
+while a large window is paged on (updated_at, id). Rows are re-read from
+SYNC_OVERLAP_SECONDS before `since`, because a transaction can commit after
+a later one with an earlier timestamp. Clients upsert by id, so the overlap
+only costs a few repeated rows. Tokens older than the tombstone retention
+get 410 and the client starts over without `since`.
+
+Writes are batches of creates, updates and deletes of treatments and
+expenses, sent with the pushing device's device_id. Creates carry a
+client_id, unique per device and entity. A retried batch finds (device_id,
+client_id, entity) in sync_receipts and is not applied twice. Updates and deletes carry the
+updated_at the client last saw, and a row that has changed since then is
+a conflict: the change is skipped and the server's row is sent back.
+"""
+import base64
+import json
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.models import ALLOWED_TREATMENT_TYPES, Animal, Expense, SyncReceipt, SyncTombstone, Treatment
+from app.pagination import PaginationError, apply_keyset
+
+TOKEN_VERSION = 1
+SYNC_ENTITIES = {
+    "animals": Animal,
+    "treatments": Treatment,
+    "expenses": Expense,
+}
+WRITABLE_ENTITIES = ("treatments", "expenses")
+SYNC_OPS = ("create", "update", "delete")
+DELETED = "deleted"  # the tombstone stream's name in a token
+
+
+class SyncError(ValueError):
+    """Raised for an unusable token or batch; status is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _record_tombstone(table_name):
+    def record(mapper, connection, target):
+        connection.execute(SyncTombstone.__table__.insert().values(table_name=table_name, row_id=target.id))
+
+    return record
+
+
+def _clear_tombstone(table_name):
+    # SQLite can hand a deleted row's id to the next insert; the new row's upsert supersedes the tombstone
+    def clear(mapper, connection, target):
+        tombstones = SyncTombstone.__table__
+        connection.execute(
+            tombstones.delete().where(tombstones.c.table_name == table_name, tombstones.c.row_id == target.id)
+        )
+
+    return clear
+
+
+for _name, _model in SYNC_ENTITIES.items():
+    event.listen(_model, "after_delete", _record_tombstone(_name))
+    event.listen(_model, "after_insert", _clear_tombstone(_name))
+
+
+def _db_now():
+    # The database clock, as naive wall time comparable with the stored timestamps
+    now = db.session.execute(select(func.current_timestamp())).scalar()
+    if isinstance(now, str):
+        now = datetime.fromisoformat(now)
+    return now.replace(tzinfo=None)
+
+
+def _parse_datetime(raw, message):
+    # Stored timestamps are naive database time, so an offset cannot be compared with them
+    if raw is None:
+        return None
+    try:
+        value = datetime.fromisoformat(raw)
+    except (TypeError, ValueError):
+        raise SyncError(message)
+    if value.tzinfo is not None:
+        raise SyncError(message)
+    return value
+
+
+def encode_token(payload):
+    raw = json.dumps(dict(payload, v=TOKEN_VERSION), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token):
+    """Decode a sync token into (since, until, after cursors, finished streams)."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise SyncError("Invalid sync token")
+    if not isinstance(payload, dict) or payload.get("v") != TOKEN_VERSION:
+        raise SyncError("Invalid sync token")
+
+    since = _parse_datetime(payload.get("since"), "Invalid sync token")
+    until = _parse_datetime(payload.get("until"), "Invalid sync token")
+    try:
+        after = {stream: (raw, int(last_id)) for stream, (raw, last_id) in payload.get("after", {}).items()}
+        done = set(payload.get("done", []))
+    except (AttributeError, TypeError, ValueError):
+        raise SyncError("Invalid sync token")
+    for raw, _ in after.values():
+        if _parse_datetime(raw, "Invalid sync token") is None:
+            raise SyncError("Invalid sync token")
+    return since, until, after, done
+
+
+def _page(query, model, order, cursor, limit):
+    try:
+        rows = apply_keyset(query, model, order, cursor).limit(limit + 1).all()
+    except PaginationError:
+        raise SyncError("Invalid sync token")
+    return rows[:limit], len(rows) > limit
+
+
+def read_changes(token=None, limit=None):
+    """
+    One page of changes since token (everything when token is None).
+    Returns {"changes": {entity: {"upserted": [...], "deleted": [ids]}}, "next": token, "has_more": bool}.
+    Clients apply "deleted" before "upserted", and keep calling with "next" while has_more is true.
+    """
+    limit = limit or current_app.config.get("SYNC_PAGE_SIZE", 500)
+    now = _db_now()
+    since, until, after, done = decode_token(token) if token else (None, None, {}, set())
+
+    retention = timedelta(days=current_app.config.get("SYNC_TOMBSTONE_RETENTION_DAYS", 30))
+    if since is not None and since < now - retention:
+        raise SyncError("Sync token has expired; sync again without since", status=410)
+    until = until or now
+    lower = since - timedelta(seconds=current_app.config.get("SYNC_OVERLAP_SECONDS", 60)) if since else None
+
+    changes = {name: {"upserted": [], "deleted": []} for name in SYNC_ENTITIES}
+    cursors, finished = {}, set()
+
+    for name, model in SYNC_ENTITIES.items():
+        if name in done:
+            finished.add(name)
+            continue
+        query = model.query.filter(model.updated_at <= until)
+        if lower is not None:
+            query = query.filter(model.updated_at >= lower)
+        rows, more = _page(query, model, "updated_at", after.get(name), limit)
+        if name == "animals":
+            changes[name]["upserted"] = [animal.to_dict(include=()) for animal in rows]
+        else:
+            changes[name]["upserted"] = [row.to_dict() for row in rows]
+        if more:
+            cursors[name] = [rows[-1].updated_at.isoformat(), rows[-1].id]
+        else:
+            finished.add(name)
+
+    # A full sync has nothing to delete
+    if since is not None and DELETED not in done:
+        query = SyncTombstone.query.filter(
+            SyncTombstone.table_name.in_(list(SYNC_ENTITIES)),
+            SyncTombstone.deleted_at >= lower,
+            SyncTombstone.deleted_at <= until
+        )
+        tombstones, more = _page(query, SyncTombstone, "deleted_at", after.get(DELETED), limit)
+        for tombstone in tombstones:
+            changes[tombstone.table_name]["deleted"].append(tombstone.row_id)
+        if more:
+            cursors[DELETED] = [tombstones[-1].deleted_at.isoformat(), tombstones[-1].id]
+        else:
+            finished.add(DELETED)
+
+    if cursors:
+        next_token = encode_token({
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat(),
+            "after": cursors,
+            "done": sorted(finished),
+        })
+    else:
+        next_token = encode_token({"since": until.isoformat()})
+    return {"changes": changes, "next": next_token, "has_more": bool(cursors)}
+
+
+def _date_value(data, field):
+    try:
+        return date.fromisoformat(data[field]) if data[field] else None
+    except (TypeError, ValueError):
+        raise SyncError(f"{field} must be a YYYY-MM-DD date")
+
+
+def _number_value(data, field):
+    value = data[field]
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise SyncError(f"{field} must be a number")
+    return float(value)
+
+
+def _text_value(data, field, column):
+    # column is the one the value is stored in; String(n) columns also bound its length
+    value = data[field]
+    if value is None:
+        return None
+    length = column.type.length
+    if not isinstance(value, str):
+        raise SyncError(f"{field} must be a string")
+    if length is not None and len(value) > length:
+        raise SyncError(f"{field} must be at most {length} characters")
+    return value
+
+
+def _treatment_values(data, animals, creating):
+    columns = Treatment.__table__.c
+    values = {}
+    if creating or "animal_id" in data:
+        animal = animals.get(data.get("animal_id"))
+        if animal is None:
+            raise SyncError("animal_id does not match an animal")
+        if animal.status != "Active":
+            raise SyncError("Cannot add treatment to inactive animal")
+        values["animal_id"] = animal.id
+    if creating or "treatment_type" in data:
+        treatment_type = data.get("treatment_type")
+        if not treatment_type:
+            raise SyncError("Treatment type is required")
+        if not isinstance(treatment_type, str) or treatment_type not in ALLOWED_TREATMENT_TYPES:
+            raise SyncError(f"Invalid treatment type. Allowed: {ALLOWED_TREATMENT_TYPES}")
+        if treatment_type == "Other":
+            if not data.get("custom_type"):
+                raise SyncError("Custom treatment type is required when 'Other' is selected")
+            treatment_type = _text_value(data, "custom_type", columns.treatment_type)
+        values["treatment_type"] = treatment_type
+    for field in ("treatment_date", "next_due_date"):
+        if field in data:
+            values[field] = _date_value(data, field)
+    for field in ("medication", "dosage", "notes", "outcome"):
+        if field in data:
+            values[field] = _text_value(data, field, columns[field])
+    if "cost" in data:
+        values["cost"] = _number_value(data, "cost")
+    return values
+
+
+def _expense_values(data, animals, creating):
+    columns = Expense.__table__.c
+    values = {}
+    if creating or "expense_type" in data:
+        if not data.get("expense_type"):
+            raise SyncError("expense_type is required")
+        values["expense_type"] = _text_value(data, "expense_type", columns.expense_type)
+    if creating or "amount" in data:
+        if data.get("amount") is None:
+            raise SyncError("amount is required")
+        values["amount"] = _number_value(data, "amount")
+    if "date" in data:
+        values["date"] = _date_value(data, "date")
+    if "notes" in data:
+        values["notes"] = _text_value(data, "notes", columns.notes)
+    if data.get("animal_id") is not None:
+        if data["animal_id"] not in animals:
+            raise SyncError("animal_id does not match an animal")
+        values["animal_id"] = data["animal_id"]
+    elif "animal_id" in data:
+        values["animal_id"] = None
+    return values
+
+
+ENTITY_VALUES = {
+    "treatments": _treatment_values,
+    "expenses": _expense_values,
+}
+
+
+def _check_change(change):
+    if not isinstance(change, dict):
+        raise SyncError("Each change must be an object")
+    if change.get("entity") not in WRITABLE_ENTITIES:
+        raise SyncError(f"Invalid entity. Allowed: {list(WRITABLE_ENTITIES)}")
+    if change.get("op") not in SYNC_OPS:
+        raise SyncError(f"Invalid op. Allowed: {list(SYNC_OPS)}")
+    if change.get("data") is not None and not isinstance(change["data"], dict):
+        raise SyncError("data must be an object")
+    if change["op"] == "create":
+        client_id = change.get("client_id")
+        if not isinstance(client_id, str) or not 0 < len(client_id) <= 64:
+            raise SyncError("create needs a client_id of at most 64 characters")
+    else:
+        if not isinstance(change.get("id"), int) or isinstance(change.get("id"), bool):
+            raise SyncError(f"{change['op']} needs the row id")
+        if not change.get("base_updated_at"):
+            raise SyncError(f"{change['op']} needs base_updated_at, the updated_at the client last saw")
+        _parse_datetime(change["base_updated_at"], "base_updated_at must be an ISO 8601 datetime")
+
+
+def apply_changes(changes, device_id):
+    """
+    Apply a batch of offline writes from one device in one transaction. Returns one
+    result per change, in order, with status "applied", "duplicate", "conflict" or "rejected".
+    A database error rolls the whole batch back and raises SyncError (409).
+    """
+    if not isinstance(device_id, str) or not 0 < len(device_id) <= 64:
+        raise SyncError("device_id is required, at most 64 characters")
+    if not isinstance(changes, list) or not changes:
+        raise SyncError("changes must be a non-empty list")
+    max_batch = current_app.config.get("SYNC_MAX_BATCH", 500)
+    if len(changes) > max_batch:
+        raise SyncError(f"At most {max_batch} changes per batch", status=413)
+
+    results = []
+    for index, change in enumerate(changes):
+        result = {"index": index}
+        try:
+            _check_change(change)
+        except SyncError as e:
+            result.update(status="rejected", error=str(e))
+        results.append(result)
+    valid = [(change, result) for change, result in zip(changes, results) if "status" not in result]
+
+    # Everything the batch refers to, one query per table
+    client_ids = {change["client_id"] for change, _ in valid if change["op"] == "create"}
+    receipts = {
+        (receipt.table_name, receipt.client_id): receipt
+        for receipt in SyncReceipt.query.filter(
+            SyncReceipt.device_id == device_id, SyncReceipt.client_id.in_(client_ids)
+        )
+    } if client_ids else {}
+    rows = {}
+    for name in WRITABLE_ENTITIES:
+        ids = {change["id"] for change, _ in valid if change["entity"] == name and change["op"] != "create"}
+        model = SYNC_ENTITIES[name]
+        rows[name] = {row.id: row for row in model.query.filter(model.id.in_(ids))} if ids else {}
+    animal_ids = {(change.get("data") or {}).get("animal_id") for change, _ in valid} - {None}
+    animal_ids = {animal_id for animal_id in animal_ids if isinstance(animal_id, int)}
+    animals = {animal.id: animal for animal in Animal.query.filter(Animal.id.in_(animal_ids))} if animal_ids else {}
+
+    created = {}  # (entity, client_id) -> row for creates in this batch
+    pending_ids = []  # (result, row): results that get the new row's id after the flush
+    touched = {name: set() for name in WRITABLE_ENTITIES}
+    for change, result in valid:
+        name, op, data = change["entity"], change["op"], change.get("data") or {}
+        model = SYNC_ENTITIES[name]
+        result.update(entity=name, op=op)
+        try:
+            if op == "create":
+                result["client_id"] = change["client_id"]
+                key = (name, change["client_id"])
+                receipt = receipts.get(key)
+                if receipt is not None:
+                    result.update(status="duplicate", id=receipt.row_id)
+                    continue
+                if key in created:
+                    result["status"] = "duplicate"
+                    pending_ids.append((result, created[key]))
+                    continue
+                row = model(**ENTITY_VALUES[name](data, animals, creating=True))
+                db.session.add(row)
+                created[key] = row
+                pending_ids.append((result, row))
+                result["status"] = "applied"
+                continue
+
+            result["id"] = change["id"]
+            row = rows[name].get(change["id"])
+            if row is None:
+                if op == "delete":
+                    result["status"] = "applied"  # already gone
+                else:
+                    result.update(status="conflict", reason="deleted")
+                continue
+            if row.updated_at != datetime.fromisoformat(change["base_updated_at"]):
+                result.update(status="conflict", reason="modified")
+                touched[name].add(row.id)
+                continue
+            if op == "delete":
+                db.session.delete(row)
+                rows[name][row.id] = None
+            else:
+                for field, value in ENTITY_VALUES[name](data, animals, creating=False).items():
+                    setattr(row, field, value)
+                touched[name].add(row.id)
+            result["status"] = "applied"
+        except SyncError as e:
+            result.update(status="rejected", error=str(e))
+
+    try:
+        db.session.flush()
+        for (name, client_id), row in created.items():
+            db.session.add(SyncReceipt(device_id=device_id, client_id=client_id, table_name=name, row_id=row.id))
+            touched[name].add(row.id)
+        for result, row in pending_ids:
+            result["id"] = row.id
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        raise SyncError(f"Batch rolled back, nothing was applied: {e.__class__.__name__}", status=409)
+
+    # Send back the stored rows (new updated_at) for applied writes and conflicts, one query per table
+    current = {}
+    for name, ids in touched.items():
+        model = SYNC_ENTITIES[name]
+        current[name] = {row.id: row.to_dict() for row in model.query.filter(model.id.in_(ids))} if ids else {}
+    for result in results:
+        row = current.get(result.get("entity"), {}).get(result.get("id"))
+        if row is not None and result["status"] in ("applied", "conflict"):
+            result["row"] = row
+    return results
+
+
+def prune_sync_history(days=None):
+    """Delete tombstones and create receipts older than the retention window. Returns the rows deleted."""
+    days = days if days is not None else current_app.config.get("SYNC_TOMBSTONE_RETENTION_DAYS", 30)
+    cutoff = _db_now() - timedelta(days=days)
+    tombstones = SyncTombstone.__table__
+    receipts = SyncReceipt.__table__
+    deleted = db.session.execute(tombstones.delete().where(tombstones.c.deleted_at < cutoff)).rowcount
+    deleted += db.session.execute(receipts.delete().where(receipts.c.created_at < cutoff)).rowcount
+    db.session.commit()
+    return deleted
@@ -0,0 +1,172 @@
+"""
+Per-table change versions and conditional GETs.
+
+Every flush that writes an Animal, Sale, Expense, Treatment or Breeding row
+bumps that table's row in table_versions inside the same transaction, so a
+rollback undoes the bump and every worker process sees the same counters.
+Core writes the mapper events never see call bump_versions themselves.
+
+@conditional(*tables) reads the counters with one query before the view runs
+and answers If-None-Match / If-Modified-Since with 304 when none of the
+tables has changed. The ETag also covers the path, query string, Accept
+header, ETAG_SALT (set it per release when representations change) and the
+current date, since some lists ("upcoming", ages) depend on today.
+
+The bump is an UPDATE on one row per table, so on Postgres concurrent
+writers to the same table queue on that row until the first one commits.
+A table's first bump creates its row with INSERT ... ON CONFLICT DO UPDATE,
+so two first writers do not both insert it.
+"""
+import hashlib
+from datetime import date, datetime, time, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db
+from app.models import Animal, Breeding, Expense, Sale, TableVersion, Treatment, dialect_insert
+
+# Which table_versions row a write to each model bumps
+VERSIONED_MODELS = {
+    Animal: "animals",
+    Sale: "sales",
+    Expense: "expenses",
+    Treatment: "treatments",
+    Breeding: "breeding_records",
+}
+VERSIONED_TABLES = tuple(VERSIONED_MODELS.values())
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def bump_versions(*tables, connection=None):
+    """Increment the given tables' versions in the current transaction (db.session's unless connection is given)."""
+    tables = sorted(set(tables))  # a fixed order keeps concurrent bumps from deadlocking
+    if not tables:
+        return
+    connection = connection if connection is not None else db.session.connection()
+    versions = TableVersion.__table__
+    now = _utcnow()
+    result = connection.execute(
+        versions.update()
+        .where(versions.c.name.in_(tables))
+        .values(version=versions.c.version + 1, updated_at=now)
+    )
+    if result.rowcount < len(tables):
+        existing = set(connection.execute(select(versions.c.name).where(versions.c.name.in_(tables))).scalars())
+        missing = [{"name": name, "version": 1, "updated_at": now} for name in tables if name not in existing]
+        insert = dialect_insert(connection, versions)
+        if insert is None:
+            connection.execute(versions.insert(), missing)
+            return
+        # Another transaction may create the same row first: then bump the row it created
+        for row in missing:
+            connection.execute(insert.values(**row).on_conflict_do_update(
+                index_elements=[versions.c.name],
+                set_={"version": versions.c.version + 1, "updated_at": now}
+            ))
+
+
+def current_versions(tables):
+    """{table: (version, updated_at)}; tables that were never written are (0, None)."""
+    versions = TableVersion.__table__
+    rows = db.session.execute(
+        select(versions.c.name, versions.c.version, versions.c.updated_at).where(versions.c.name.in_(tables))
+    )
+    found = {name: (version, updated_at) for name, version, updated_at in rows}
+    return {name: found.get(name, (0, None)) for name in tables}
+
+
+def mark_tables_changed(session, *tables):
+    if session is not None:
+        session.info.setdefault("changed_tables", set()).update(tables)
+
+
+def _register_versioning(model, table):
+    def mark(mapper, connection, target):
+        mark_tables_changed(object_session(target), table)
+
+    for name in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, name, mark)
+
+
+for _model, _table in VERSIONED_MODELS.items():
+    _register_versioning(_model, _table)
+
+
+# add_treatment_expense writes expenses through Core, so the Expense events above never see them
+@event.listens_for(Treatment, "after_insert")
+def mark_treatment_expense_changed(mapper, connection, target):
+    if target.cost and target.cost > 0:
+        mark_tables_changed(object_session(target), "expenses")
+
+
+@event.listens_for(Session, "after_flush")
+def bump_flushed_versions(session, flush_context):
+    tables = session.info.pop("changed_tables", None)
+    if tables:
+        bump_versions(*tables, connection=session.connection())
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_rolled_back_tables(session):
+    session.info.pop("changed_tables", None)
+
+
+def _last_modified(versions):
+    # Lists that depend on today change at midnight even when no row does
+    start_of_day = datetime.combine(date.today(), time.min).astimezone(timezone.utc)
+    stamps = [updated_at.replace(tzinfo=timezone.utc) for _, updated_at in versions.values() if updated_at]
+    return max(stamps + [start_of_day]).replace(microsecond=0)
+
+
+def _etag(versions):
+    parts = [
+        request.path,
+        request.query_string.decode(),
+        request.headers.get("Accept", ""),
+        current_app.config.get("ETAG_SALT", ""),
+        date.today().isoformat(),
+    ] + [f"{name}={version}" for name, (version, _) in sorted(versions.items())]
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    # If-Modified-Since only counts when the client sent no ETag (RFC 9110 13.1.3)
+    return request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+
+def conditional(*tables):
+    """
+    Serve a GET view with a strong ETag and Last-Modified derived from the
+    tables it reads, answering a matching conditional request with 304
+    before the view (or the response cache behind it) runs.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get("CONDITIONAL_GET_ENABLED", True):
+                return view(*args, **kwargs)
+
+            versions = current_versions(tables)
+            etag = _etag(versions)
+            last_modified = _last_modified(versions)
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.headers["Cache-Control"] = "no-cache"
+            response.vary.add("Accept")
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,46 @@
+"""
+In-process endpoint benchmarks for pytest-benchmark, on a seeded 1k herd.
+
+    pytest benchmarks/bench_endpoints.py --benchmark-autosave
+    pytest benchmarks/bench_endpoints.py --benchmark-compare --benchmark-compare-fail=median:25%
+
+The endpoints and id sampling are latency_benchmark's SCENARIOS, so both
+measure the same requests. The file name keeps it out of the default test
+run; it is skipped when pytest-benchmark is not installed.
+"""
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from benchmarks.latency_benchmark import SCENARIOS, fill, sample_ids  # noqa: E402
+from benchmarks.seed import SCALES, seed_herd  # noqa: E402
+
+ENDPOINTS = [(f"{blueprint}.{name}", template) for blueprint, scenarios in SCENARIOS.items()
+             for name, template in scenarios]
+
+
+@pytest.fixture(scope="module")
+def herd():
+    app = create_app("app.config.TestingConfig")
+    with app.app_context():
+        db.create_all()
+        seed_herd(SCALES["1k"])
+        yield app.test_client(), sample_ids(random.Random(42))
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.mark.parametrize("template", [template for _, template in ENDPOINTS],
+                         ids=[endpoint for endpoint, _ in ENDPOINTS])
+def test_endpoint_latency(benchmark, herd, template):
+    client, ids = herd
+    rng = random.Random(0)
+
+    def request():
+        return client.get(fill(template, ids, rng)).status_code
+
+    assert benchmark(request) == 200
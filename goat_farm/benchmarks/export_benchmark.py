@@ -0,0 +1,71 @@
+"""
+Stream /export/expenses.csv against a seeded SQLite file and check that peak
+memory stays bounded however many rows are exported.
+
+    python -m benchmarks.export_benchmark --expenses 1000000
+    python -m benchmarks.export_benchmark --format parquet --rss-budget-mb 96
+
+The database (BenchmarkConfig, override with BENCH_DATABASE_URI) is seeded on
+first run and reused afterwards. The run fails when the process's peak RSS
+grows by more than --rss-budget-mb while the export is consumed.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+from app import create_app
+from app.extensions import db
+from app.models import Expense
+from benchmarks.seed import seed_expenses
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--expenses", type=int, default=1_000_000, help="Expenses to seed when the table is smaller")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--rss-budget-mb", type=float, default=64, help="Allowed peak RSS growth during the export")
+    args = parser.parse_args(argv)
+
+    app = create_app("app.config.BenchmarkConfig")
+    os.makedirs(app.instance_path, exist_ok=True)
+
+    with app.app_context():
+        db.create_all()
+        existing = Expense.query.count()
+        if existing < args.expenses:
+            print(f"Seeding {args.expenses - existing} expenses ...")
+            seed_expenses(args.expenses - existing)
+        db.session.remove()
+
+        client = app.test_client()
+        before = peak_rss_mb()
+        started = time.perf_counter()
+        response = client.get(f"/export/expenses.{args.format}", buffered=False)
+        if response.status_code != 200:
+            print(f"/export/expenses.{args.format} returned {response.status_code}", file=sys.stderr)
+            return 1
+        exported = 0
+        for piece in response.response:
+            exported += len(piece)
+        response.close()
+        elapsed = time.perf_counter() - started
+        growth = peak_rss_mb() - before
+
+    print(f"Exported {exported / 1e6:.1f}MB of {args.format} in {elapsed:.1f}s; "
+          f"peak RSS grew {growth:.1f}MB (budget {args.rss_budget_mb:.0f}MB)")
+    if growth > args.rss_budget_mb:
+        print("Export memory exceeded the budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
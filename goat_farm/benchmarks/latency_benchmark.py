@@ -0,0 +1,237 @@
+"""
+Per-endpoint latency for every blueprint at a given herd size.
+
+    python -m benchmarks.latency_benchmark --scale 10k
+    python -m benchmarks.latency_benchmark --scale 1k --blueprint sales --blueprint animals
+    python -m benchmarks.latency_benchmark --scale 100k --output results-100k.json
+    python -m benchmarks.latency_benchmark --url http://127.0.0.1:8000 --scale 10k
+
+Each scale gets its own SQLite file (instance/bench-<scale>.db, or
+BENCH_DATABASE_URI), seeded with seed_herd on first run. Requests go
+in-process through create_app's test client, or over keep-alive HTTP to a
+running server with --url. Every endpoint in SCENARIOS is requested
+--requests times with ids drawn from the seeded rows, and its p50/p95/p99
+are checked against benchmarks/budgets.json; the run fails when any
+endpoint goes over budget. --write-budgets records the current run times
+--headroom as the new budgets for the scale.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+from app import create_app
+from app.config import BASE_DIR, BenchmarkConfig
+from app.extensions import db
+from app.models import Animal, Breeding, Expense, Sale, Treatment
+from benchmarks.seed import SCALES, seed_herd
+
+BUDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "budgets.json")
+PERCENTILES = ("p50_ms", "p95_ms", "p99_ms")
+
+# blueprint: [(endpoint name, path template)]; {animal}, {doe}, {sale}, ... are filled from seeded ids
+SCENARIOS = {
+    "main": [
+        ("home", "/"),
+        ("cache_stats", "/cache/stats"),
+    ],
+    "animals": [
+        ("list", "/animals/get?limit=100"),
+        ("detail", "/animals/{animal}"),
+        ("pedigree", "/animals/{animal}/pedigree"),
+        ("descendants", "/animals/{founder}/descendants"),
+        ("kinship", "/animals/kinship?ids={doe},{buck}"),
+        ("deceased", "/animals/deceased?limit=100"),
+        ("total", "/animals/total/animals"),
+    ],
+    "treatments": [
+        ("list", "/treatments/get?limit=100"),
+        ("detail", "/treatments/{treatment}"),
+        ("upcoming", "/treatments/upcoming?limit=100"),
+        ("due", "/treatments/due?within=7d&overdue=1&limit=100"),
+    ],
+    "sales": [
+        ("list", "/sales/"),
+        ("detail", "/sales/{sale}"),
+        ("recent", "/sales/recent"),
+        ("total_profit", "/sales/total_profit"),
+        ("stats_daily", "/sales/stats/daily"),
+        ("stats_monthly", "/sales/stats/monthly"),
+        ("stats_yearly", "/sales/stats/yearly"),
+        ("stats_payment_method", "/sales/stats/payment_method"),
+        ("stats_purpose", "/sales/stats/purpose"),
+        ("stats_status", "/sales/stats/status"),
+        ("search", "/sales/search?buyer_name=Buyer%201"),
+    ],
+    "expenses": [
+        ("list", "/expenses/get?limit=100"),
+        ("detail", "/expenses/{expense}"),
+        ("total", "/expenses/total"),
+    ],
+    "search": [
+        ("search", "/search?q=Boer&limit=20"),
+    ],
+    "breeding": [
+        ("list", "/breeding/get?limit=100"),
+        ("detail", "/breeding/{breeding}"),
+        ("calendar", "/breeding/calendar?from={month_ago}&grain=week"),
+        ("recommendations", "/breeding/recommendations?doe_ids={doe}&limit=3"),
+    ],
+    "jobs": [
+        ("list", "/jobs"),
+        ("kinds", "/jobs/kinds"),
+    ],
+    "export": [
+        ("sales_csv_month", "/export/sales.csv?from={month_ago}&to={today}"),
+    ],
+}
+
+
+def scale_config(scale):
+    uri = os.environ.get("BENCH_DATABASE_URI") or "sqlite:///" + os.path.join(
+        BASE_DIR, "..", "instance", f"bench-{scale}.db"
+    )
+    return type(f"Bench{scale}Config", (BenchmarkConfig,), {"SQLALCHEMY_DATABASE_URI": uri})
+
+
+def sample_ids(rng, size=200):
+    """A deterministic sample of seeded ids to fill the path templates from."""
+    def pick(query):
+        ids = [row[0] for row in query.order_by(None).limit(5000)]
+        return rng.sample(ids, min(size, len(ids))) if ids else [0]
+
+    active = db.session.query(Animal.id).filter(Animal.status == "Active")
+    return {
+        "animal": pick(active),
+        "founder": pick(db.session.query(Animal.id).filter(Animal.mother_id.is_(None))),
+        "doe": pick(active.filter(Animal.sex == "Doe")),
+        "buck": pick(active.filter(Animal.sex == "Buck")),
+        "treatment": pick(db.session.query(Treatment.id)),
+        "sale": pick(db.session.query(Sale.id)),
+        "expense": pick(db.session.query(Expense.id)),
+        "breeding": pick(db.session.query(Breeding.id)),
+    }
+
+
+def fill(template, ids, rng):
+    today = date.today()
+    values = {name: rng.choice(choices) for name, choices in ids.items()}
+    return template.format(today=today, month_ago=today - timedelta(days=30), **values)
+
+
+def in_process_getter(app):
+    client = app.test_client()
+
+    def get(path):
+        response = client.get(path)
+        response.get_data()
+        return response.status_code
+    return get
+
+
+def http_getter(url):
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+
+    def get(path):
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    return get
+
+
+def measure(get, template, ids, rng, requests, warmup=2):
+    for _ in range(warmup):
+        get(fill(template, ids, rng))
+    timings = []
+    for _ in range(requests):
+        path = fill(template, ids, rng)
+        started = time.perf_counter()
+        status = get(path)
+        timings.append((time.perf_counter() - started) * 1000)
+        if status != 200:
+            raise RuntimeError(f"{path} returned {status}")
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {"p50_ms": cuts[49], "p95_ms": cuts[94], "p99_ms": cuts[98], "requests": requests}
+
+
+def over_budget(results, budgets):
+    failures = []
+    for endpoint, result in results.items():
+        for percentile, limit in budgets.get(endpoint, {}).items():
+            if result.get(percentile, 0) > limit:
+                failures.append(f"{endpoint} {percentile}: {result[percentile]:.1f}ms > budget {limit:.1f}ms")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=list(SCALES), default="10k")
+    parser.add_argument("--blueprint", action="append", choices=list(SCENARIOS),
+                        help="Only these blueprints (repeatable; default all)")
+    parser.add_argument("--requests", type=int, default=50, help="Timed requests per endpoint")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", help="Time a running server (seeded at the same scale) over HTTP")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--budgets", default=BUDGETS_FILE)
+    parser.add_argument("--write-budgets", action="store_true", help="Record this run (x --headroom) as the budgets")
+    parser.add_argument("--headroom", type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    app = create_app(scale_config(args.scale))
+    os.makedirs(app.instance_path, exist_ok=True)
+    rng = random.Random(args.seed)
+    results = {}
+    with app.app_context():
+        db.create_all()
+        existing = Animal.query.count()
+        if existing < SCALES[args.scale]:
+            print(f"Seeding a {args.scale} herd ...")
+            seed_herd(SCALES[args.scale] - existing, seed=args.seed)
+        ids = sample_ids(rng)
+        get = http_getter(args.url) if args.url else in_process_getter(app)
+
+        for blueprint in args.blueprint or SCENARIOS:
+            for name, template in SCENARIOS[blueprint]:
+                endpoint = f"{blueprint}.{name}"
+                results[endpoint] = measure(get, template, ids, rng, args.requests)
+                result = results[endpoint]
+                print(f"{endpoint:<34} p50 {result['p50_ms']:8.1f}ms   p95 {result['p95_ms']:8.1f}ms   "
+                      f"p99 {result['p99_ms']:8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    budgets = {}
+    if os.path.exists(args.budgets):
+        with open(args.budgets) as f:
+            budgets = json.load(f)
+
+    if args.write_budgets:
+        budgets.setdefault(args.scale, {}).update({
+            endpoint: {p: round(max(result[p] * args.headroom, 1.0), 1) for p in PERCENTILES}
+            for endpoint, result in results.items()
+        })
+        with open(args.budgets, "w") as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Wrote {args.scale} budgets to {args.budgets}")
+        return 0
+
+    failures = over_budget(results, budgets.get(args.scale, {}))
+    if failures:
+        print("Over budget:\n  " + "\n  ".join(failures), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
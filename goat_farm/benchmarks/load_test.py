@@ -0,0 +1,191 @@
+"""
+Load-test the production server and check that throughput scales with workers.
+
+    python -m benchmarks.load_test --workers 1 2 4
+    python -m benchmarks.load_test --workers 2 --worker-class gevent
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --clients 16
+
+Without --url, gunicorn (gunicorn.conf.py, wsgi:app with BenchmarkConfig) is
+started on a free local port for each worker count, and the run fails when
+the largest worker count serves less than --min-speedup times the requests
+per second of the smallest. Client processes hold keep-alive connections and
+cycle through LOAD_ENDPOINTS for --duration seconds.
+"""
+import argparse
+import http.client
+import importlib.util
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from app import create_app
+from app.extensions import db
+from app.models import Sale
+from benchmarks.seed import seed_sales
+
+LOAD_ENDPOINTS = [
+    "/animals/get?limit=50",
+    "/sales/recent",
+    "/sales/stats/monthly",
+    "/sales/stats/payment_method",
+    "/treatments/upcoming?limit=50",
+]
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _client(url, duration):
+    # Each client times its own run: spawned processes take a moment to start
+    deadline = time.monotonic() + duration
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    latencies, errors, n = [], 0, 0
+    while time.monotonic() < deadline:
+        path = LOAD_ENDPOINTS[n % len(LOAD_ENDPOINTS)]
+        n += 1
+        started = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            continue
+        if response.status != 200:
+            errors += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    return latencies, errors
+
+
+def run_load(url, clients, duration):
+    """Hammer url from `clients` processes for `duration` seconds. Returns throughput and latency percentiles."""
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        results = pool.starmap(_client, [(url, duration)] * clients)
+    latencies = sorted(ms for client_latencies, _ in results for ms in client_latencies)
+    errors = sum(client_errors for _, client_errors in results)
+    if not latencies:
+        return {"requests": 0, "errors": errors, "rps": 0.0}
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "p50_ms": cuts[49],
+        "p95_ms": cuts[94],
+        "p99_ms": cuts[98],
+    }
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_until_up(url, timeout=30):
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((parts.hostname, parts.port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout}s")
+
+
+def start_gunicorn(workers, worker_class, threads):
+    port = _free_port()
+    env = dict(
+        os.environ,
+        APP_CONFIG="app.config.BenchmarkConfig",
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_THREADS=str(threads),
+        GUNICORN_ACCESSLOG=os.devnull,
+        # Recycling mid-run would show up as latency spikes that have nothing to do with scaling
+        GUNICORN_MAX_REQUESTS="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"], cwd=PROJECT_DIR, env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_until_up(url)
+    except RuntimeError:
+        server.terminate()
+        raise
+    return server, url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Load an already running server instead of starting gunicorn")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare")
+    parser.add_argument("--worker-class", choices=["gthread", "gevent", "sync"], default="gthread")
+    parser.add_argument("--threads", type=int, default=4, help="Threads per gthread worker")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client processes")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per run")
+    parser.add_argument("--sales", type=int, default=20_000, help="Sales to seed when the database is empty")
+    parser.add_argument("--min-speedup", type=float, default=1.5,
+                        help="Required rps ratio between the largest and smallest worker count")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        result = run_load(args.url, args.clients, args.duration)
+        print(_format(args.url, result))
+        return 1 if result["errors"] else 0
+
+    if importlib.util.find_spec("gunicorn") is None:
+        print("gunicorn is not installed (pip install gunicorn)", file=sys.stderr)
+        return 2
+
+    app = create_app("app.config.BenchmarkConfig")
+    os.makedirs(app.instance_path, exist_ok=True)
+    with app.app_context():
+        db.create_all()
+        existing = Sale.query.count()
+        if existing < args.sales:
+            print(f"Seeding {args.sales - existing} sales ...")
+            seed_sales(args.sales - existing)
+        db.engine.dispose()
+
+    results = {}
+    for workers in args.workers:
+        server, url = start_gunicorn(workers, args.worker_class, args.threads)
+        try:
+            run_load(url, args.clients, 1)  # warm up caches and connection pools
+            results[workers] = run_load(url, args.clients, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        print(_format(f"{workers} x {args.worker_class}", results[workers]))
+
+    if any(result["errors"] for result in results.values()):
+        print("Requests failed during the load test", file=sys.stderr)
+        return 1
+    smallest, largest = min(results), max(results)
+    if largest != smallest:
+        speedup = results[largest]["rps"] / max(results[smallest]["rps"], 1e-9)
+        print(f"Speedup {smallest} -> {largest} workers: {speedup:.2f}x (required {args.min_speedup:.2f}x)")
+        if speedup < args.min_speedup:
+            return 1
+    return 0
+
+
+def _format(label, result):
+    if not result["requests"]:
+        return f"{label:<16} no successful requests ({result['errors']} errors)"
+    return (f"{label:<16} {result['rps']:8.1f} req/s   p50 {result['p50_ms']:6.1f}ms   "
+            f"p95 {result['p95_ms']:6.1f}ms   p99 {result['p99_ms']:6.1f}ms   errors {result['errors']}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""Deterministic data generator for the benchmarks."""
+import random
+from datetime import date, timedelta
+
+from app.extensions import db
+from app.ledger import rebuild_cost_totals
+from app.models import Animal, Breeding, Expense, Sale, Treatment
+from app.offspring import reconcile_offspring_counts
+from app.pedigree import invalidate_pedigree
+from app.rollups import rebuild_sales_rollups
+from app.versions import VERSIONED_TABLES, bump_versions
+
+BREEDS = ["Boer", "Saanen", "Alpine", "Toggenburg", "Kalahari Red", "Galla"]
+PAYMENT_METHODS = ["Mpesa", "Bank", "Cash"]
+PURPOSES = ["breeding", "meat", "dairy"]
+EXPENSE_TYPES = ["Feed", "Vet", "Treatment", "Transport"]
+TREATMENTS = [("Vaccination", "CDT", 180), ("Deworming", "Ivermectin", 90), ("Hoof trimming", None, 60)]
+BREEDING_STATUSES = ["Pending", "Confirmed", "Completed", "Failed"]
+
+# Herd sizes for seed_herd / the latency benchmark
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+CHUNK_SIZE = 5000
+
+
+def _insert_chunked(table, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[start:start + CHUNK_SIZE])
+
+
+def seed_sales(count, seed=42, start=date(2023, 1, 1), days=3 * 365):
+    """
+    Insert `count` sold animals, each with one sale and two expenses, through
+    Core executemany, then rebuild the cost ledger and sales rollups (Core
+    inserts skip the ORM events that normally maintain them).
+    """
+    rng = random.Random(seed)
+    first_id = (db.session.query(db.func.max(Animal.id)).scalar() or 0) + 1
+
+    animals, sales, expenses = [], [], []
+    for offset in range(count):
+        animal_id = first_id + offset
+        acquired = start + timedelta(days=rng.randrange(days))
+        sold = acquired + timedelta(days=rng.randrange(30, 365))
+        animals.append({
+            "id": animal_id,
+            "tag_id": f"BENCH{animal_id:07d}",
+            "breed": rng.choice(BREEDS),
+            "sex": rng.choice(["Doe", "Buck"]),
+            "status": "Sold",
+            "acquisition_date": acquired,
+            "acquisition_price": round(rng.uniform(4000, 20000), 2),
+        })
+        sales.append({
+            "animal_id": animal_id,
+            "buyer_name": f"Buyer {rng.randrange(2000)}",
+            "sale_date": sold,
+            "price": round(rng.uniform(8000, 40000), 2),
+            "payment_method": rng.choice(PAYMENT_METHODS),
+            "payment_received": True,
+            "receipt_number": f"BENCH-{animal_id:07d}",
+            "purpose": rng.choice(PURPOSES),
+            "status": "completed",
+        })
+        for _ in range(2):
+            expenses.append({
+                "expense_type": rng.choice(EXPENSE_TYPES),
+                "amount": round(rng.uniform(100, 3000), 2),
+                "date": acquired + timedelta(days=rng.randrange(30)),
+                "animal_id": animal_id,
+            })
+
+    _insert_chunked(Animal.__table__, animals)
+    _insert_chunked(Sale.__table__, sales)
+    _insert_chunked(Expense.__table__, expenses)
+    bump_versions("animals", "sales", "expenses")
+    db.session.commit()
+
+    rebuild_cost_totals()
+    rebuild_sales_rollups()
+
+
+def seed_expenses(count, seed=7, start=date(2023, 1, 1), days=3 * 365):
+    """
+    Insert `count` herd-level expenses (no animal) through Core executemany,
+    generating one chunk at a time so seeding millions of rows stays small.
+    Rebuilds the cost ledger afterwards.
+    """
+    rng = random.Random(seed)
+    for chunk_start in range(0, count, CHUNK_SIZE):
+        rows = [
+            {
+                "expense_type": rng.choice(EXPENSE_TYPES),
+                "amount": round(rng.uniform(100, 3000), 2),
+                "date": start + timedelta(days=rng.randrange(days)),
+                "notes": f"bench expense {chunk_start + offset}",
+            }
+            for offset in range(min(CHUNK_SIZE, count - chunk_start))
+        ]
+        db.session.execute(Expense.__table__.insert(), rows)
+        bump_versions("expenses")
+        db.session.commit()
+
+    rebuild_cost_totals()
+
+
+def seed_herd(count, seed=42, today=None):
+    """
+    Insert a herd of `count` animals with everything hanging off it: parent
+    links three generations deep, two treatments per animal (some due around
+    `today`), a sale for every sold animal, expenses and breeding records.
+    The same seed and `today` always produce the same rows. Core inserts skip
+    the ORM events, so the ledger, rollups and offspring counters are rebuilt
+    afterwards.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    first_id = (db.session.query(db.func.max(Animal.id)).scalar() or 0) + 1
+
+    animals, does, bucks = [], [], []
+    founders = max(count // 10, 2)
+    for offset in range(count):
+        animal_id = first_id + offset
+        sex = "Doe" if offset % 3 else "Buck"
+        born = today - timedelta(days=rng.randrange(60, 8 * 365))
+        mother_id = father_id = None
+        if offset >= founders and does and bucks:
+            mother_id = rng.choice(does)
+            father_id = rng.choice(bucks)
+        roll = rng.random()
+        animals.append({
+            "id": animal_id,
+            "tag_id": f"HERD{animal_id:07d}",
+            "breed": rng.choice(BREEDS),
+            "sex": sex,
+            "birth_date": born,
+            "weight": round(rng.uniform(15, 90), 1),
+            "status": "Active" if roll < 0.7 else "Sold" if roll < 0.9 else "Deceased",
+            "acquisition_date": born,
+            "acquisition_price": round(rng.uniform(4000, 20000), 2),
+            "mother_id": mother_id,
+            "father_id": father_id,
+        })
+        (does if sex == "Doe" else bucks).append(animal_id)
+
+    treatments, sales, expenses, breedings = [], [], [], []
+    for animal in animals:
+        for treatment_type, medication, interval in rng.sample(TREATMENTS, 2):
+            treated = today - timedelta(days=rng.randrange(interval + 30))
+            treatments.append({
+                "animal_id": animal["id"],
+                "treatment_type": treatment_type,
+                "treatment_date": treated,
+                "medication": medication,
+                "next_due_date": treated + timedelta(days=interval),
+                "cost": round(rng.uniform(50, 800), 2),
+            })
+        expenses.append({
+            "expense_type": rng.choice(EXPENSE_TYPES),
+            "amount": round(rng.uniform(100, 3000), 2),
+            "date": animal["acquisition_date"] + timedelta(days=rng.randrange(30)),
+            "animal_id": animal["id"],
+        })
+        if animal["status"] == "Sold":
+            sales.append({
+                "animal_id": animal["id"],
+                "buyer_name": f"Buyer {rng.randrange(2000)}",
+                "sale_date": min(animal["acquisition_date"] + timedelta(days=rng.randrange(30, 365)), today),
+                "price": round(rng.uniform(8000, 40000), 2),
+                "payment_method": rng.choice(PAYMENT_METHODS),
+                "payment_received": True,
+                "receipt_number": f"HERD-{animal['id']:07d}",
+                "purpose": rng.choice(PURPOSES),
+                "status": "completed",
+            })
+        if animal["sex"] == "Doe" and animal["status"] == "Active" and rng.random() < 0.5:
+            mated = today - timedelta(days=rng.randrange(365))
+            breedings.append({
+                "doe_id": animal["id"],
+                "buck_id": rng.choice(bucks),
+                "mating_date": mated,
+                "expected_kidding_date": mated + timedelta(days=150),
+                "status": rng.choice(BREEDING_STATUSES),
+            })
+
+    _insert_chunked(Animal.__table__, animals)
+    _insert_chunked(Treatment.__table__, treatments)
+    _insert_chunked(Sale.__table__, sales)
+    _insert_chunked(Expense.__table__, expenses)
+    _insert_chunked(Breeding.__table__, breedings)
+    bump_versions(*VERSIONED_TABLES)
+    db.session.commit()
+
+    rebuild_cost_totals()
+    rebuild_sales_rollups()
+    reconcile_offspring_counts()
+    invalidate_pedigree()
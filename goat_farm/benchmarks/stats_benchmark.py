@@ -0,0 +1,96 @@
+"""
+Time the /sales/stats endpoints against a seeded SQLite file.
+
+    python -m benchmarks.stats_benchmark --sales 100000
+    python -m benchmarks.stats_benchmark --output benchmarks/stats_baseline.json
+    python -m benchmarks.stats_benchmark --baseline benchmarks/stats_baseline.json
+
+The database (BenchmarkConfig, override with BENCH_DATABASE_URI) is seeded on
+first run and reused afterwards. With --baseline the run fails when any
+endpoint's median regresses by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from app import create_app
+from app.extensions import db
+from app.models import Sale
+from benchmarks.seed import seed_sales
+
+STATS_ENDPOINTS = [
+    "/sales/stats/daily",
+    "/sales/stats/daily?fresh=1",
+    "/sales/stats/monthly",
+    "/sales/stats/monthly?fresh=1",
+    "/sales/stats/yearly",
+    "/sales/stats/yearly?fresh=1",
+    "/sales/stats/payment_method",
+    "/sales/stats/purpose",
+    "/sales/stats/status",
+]
+
+
+def time_endpoint(client, url, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}")
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings)}
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for url, result in results.items():
+        previous = baseline.get(url)
+        if previous and result["median_ms"] > previous["median_ms"] * (1 + tolerance):
+            regressions.append(f"{url}: {previous['median_ms']:.1f}ms -> {result['median_ms']:.1f}ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sales", type=int, default=100_000, help="Sales to seed when the database is empty")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON (use as a future --baseline)")
+    parser.add_argument("--baseline", help="Fail if medians regress against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown, 0.25 = 25%%")
+    args = parser.parse_args(argv)
+
+    app = create_app("app.config.BenchmarkConfig")
+    os.makedirs(app.instance_path, exist_ok=True)
+
+    with app.app_context():
+        db.create_all()
+        existing = Sale.query.count()
+        if existing < args.sales:
+            print(f"Seeding {args.sales - existing} sales ...")
+            seed_sales(args.sales - existing)
+
+        client = app.test_client()
+        results = {url: time_endpoint(client, url, args.repeat) for url in STATS_ENDPOINTS}
+
+    for url, result in results.items():
+        print(f"{url:<36} median {result['median_ms']:8.1f}ms   min {result['min_ms']:8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Gunicorn settings for wsgi:app. Every value can be overridden from the
+environment (GUNICORN_*), or on the command line.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    GUNICORN_WORKER_CLASS=gevent GUNICORN_WORKERS=4 gunicorn -c gunicorn.conf.py wsgi:app
+
+gthread (the default) runs `threads` requests per worker process and suits
+this app's mix of short queries and CPU-bound reports. gevent needs the
+gevent package (and psycogreen for Postgres) and suits many slow, mostly
+idle clients; its concurrency per worker is worker_connections.
+
+Unless DB_POOL_SIZE / DB_MAX_OVERFLOW are set, GUNICORN_DB_CONNECTIONS (80,
+under Postgres' default max_connections of 100) is split across the
+workers: each pools at most one connection per concurrent request and gets
+the rest of its share as overflow, so all workers together never open more
+than the budget. Raise it together with max_connections (or behind
+pgbouncer) when adding workers.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+# Behind a load balancer keep idle connections open a little longer than its own keep-alive
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# Recycle workers now and then so slow leaks can't accumulate; jitter avoids restarting all at once
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+# Import the app once in the master so workers share its memory pages. Off for gevent, which has to
+# monkey-patch before the app (and its database driver) is imported.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "0" if worker_class == "gevent" else "1") == "1"
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-")
+errorlog = os.environ.get("GUNICORN_ERRORLOG", "-")
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+
+# Each worker's share of the database connection budget: pooled up to its concurrency, the rest overflow
+db_connections = int(os.environ.get("GUNICORN_DB_CONNECTIONS", 80))
+worker_share = max(1, db_connections // workers)
+pool_size = min(worker_connections if worker_class == "gevent" else threads, worker_share)
+os.environ.setdefault("DB_POOL_SIZE", str(pool_size))
+os.environ.setdefault("DB_MAX_OVERFLOW", str(worker_share - pool_size))
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            server.log.warning("psycogreen not installed; Postgres calls will block the gevent loop")
+        else:
+            patch_psycopg()
+
+    if preload_app:
+        # Connections must not be shared across processes: drop any the master opened while preloading
+        from app.extensions import db
+        from wsgi import app
+
+        with app.app_context():
+            db.engine.dispose(close=False)
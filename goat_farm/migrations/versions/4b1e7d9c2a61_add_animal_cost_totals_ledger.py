@@ -0,0 +1,41 @@
+"""Add animal_cost_totals ledger
+
+Revision ID: 4b1e7d9c2a61
+Revises: f0c7bf382a0f
+Create Date: 2026-10-18 09:12:41.203518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b1e7d9c2a61'
+down_revision = 'f0c7bf382a0f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('animal_cost_totals',
+    sa.Column('animal_id', sa.Integer(), nullable=False),
+    sa.Column('acquisition_price', sa.Float(), nullable=True),
+    sa.Column('expense_total', sa.Float(), nullable=False),
+    sa.Column('last_expense_date', sa.Date(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['animal_id'], ['animals.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('animal_id')
+    )
+
+    # Backfill from existing data (same result as `flask ledger rebuild`)
+    op.execute("""
+        INSERT INTO animal_cost_totals (animal_id, acquisition_price, expense_total, last_expense_date, updated_at)
+        SELECT a.id, a.acquisition_price, COALESCE(SUM(e.amount), 0), MAX(e.date), CURRENT_TIMESTAMP
+        FROM animals a
+        LEFT JOIN expenses e ON e.animal_id = a.id
+        GROUP BY a.id, a.acquisition_price
+    """)
+
+
+def downgrade():
+    op.drop_table('animal_cost_totals')
@@ -0,0 +1,34 @@
+"""Add sales_rollups
+
+Revision ID: 9d3f5a2c7e18
+Revises: 4b1e7d9c2a61
+Create Date: 2026-10-18 11:40:07.551932
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3f5a2c7e18'
+down_revision = '4b1e7d9c2a61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Populate afterwards with `flask rollups rebuild`
+    op.create_table('sales_rollups',
+    sa.Column('grain', sa.String(length=5), nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('total_sales', sa.Integer(), nullable=False),
+    sa.Column('total_revenue', sa.Float(), nullable=False),
+    sa.Column('total_expenses', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('grain', 'period')
+    )
+
+
+def downgrade():
+    op.drop_table('sales_rollups')
@@ -0,0 +1,47 @@
+"""Key sync receipts on (client_id, table_name)
+
+Revision ID: a6e1c9f4b2d8
+Revises: d7b3f9e2a5c1
+Create Date: 2026-10-18 23:52:16.204871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e1c9f4b2d8'
+down_revision = 'd7b3f9e2a5c1'
+branch_labels = None
+depends_on = None
+
+
+def _set_primary_key(columns):
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('sync_receipts_pkey', 'sync_receipts', type_='primary')
+        op.create_primary_key('sync_receipts_pkey', 'sync_receipts', columns)
+        return
+
+    # SQLite cannot alter a primary key in place; batch mode copies the rows into this shape
+    receipts = sa.Table('sync_receipts', sa.MetaData(),
+        sa.Column('client_id', sa.String(length=64), nullable=False),
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint(*columns, name='sync_receipts_pkey')
+    )
+    with op.batch_alter_table('sync_receipts', schema=None, recreate='always', copy_from=receipts):
+        pass
+
+
+def upgrade():
+    _set_primary_key(['client_id', 'table_name'])
+
+
+def downgrade():
+    # A client_id reused across tables keeps only one receipt
+    op.execute(
+        'DELETE FROM sync_receipts WHERE table_name > '
+        '(SELECT min(r.table_name) FROM sync_receipts r WHERE r.client_id = sync_receipts.client_id)'
+    )
+    _set_primary_key(['client_id'])
@@ -0,0 +1,44 @@
+"""Add reminders queue table for treatment due-date notifications
+
+Revision ID: a8c5e2f7b1d3
+Revises: f6a2c8e1d9b4
+Create Date: 2026-10-18 18:21:37.604115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c5e2f7b1d3'
+down_revision = 'f6a2c8e1d9b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reminders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('treatment_id', sa.Integer(), nullable=True),
+    sa.Column('animal_id', sa.Integer(), nullable=False),
+    sa.Column('treatment_type', sa.String(length=50), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['animal_id'], ['animals.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['treatment_id'], ['treatments.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('animal_id', 'treatment_type', 'due_date', name='uq_reminders_animal_type_due')
+    )
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.create_index('ix_reminders_status_due_date', ['status', 'due_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.drop_index('ix_reminders_status_due_date')
+
+    op.drop_table('reminders')
@@ -0,0 +1,51 @@
+"""Add jobs table for the background job queue
+
+Revision ID: b2d7f4a9c6e0
+Revises: a8c5e2f7b1d3
+Create Date: 2026-10-18 19:05:52.118374
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d7f4a9c6e0'
+down_revision = 'a8c5e2f7b1d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('params', sa.Text(), nullable=False),
+    sa.Column('params_hash', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('worker_id', sa.String(length=100), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('result_path', sa.String(length=500), nullable=True),
+    sa.Column('result_mimetype', sa.String(length=100), nullable=True),
+    sa.Column('result_size', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_jobs_status_priority_id', ['status', 'priority', 'id'], unique=False)
+        batch_op.create_index('ix_jobs_kind_params_hash', ['kind', 'params_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_jobs_kind_params_hash')
+        batch_op.drop_index('ix_jobs_status_priority_id')
+
+    op.drop_table('jobs')
@@ -0,0 +1,66 @@
+"""Add indexes for hot query paths
+
+Revision ID: b7e24f0d5c93
+Revises: 9d3f5a2c7e18
+Create Date: 2026-10-18 14:03:55.310284
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e24f0d5c93'
+down_revision = '9d3f5a2c7e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('animals', schema=None) as batch_op:
+        batch_op.create_index('ix_animals_status_id', ['status', 'id'], unique=False)
+        batch_op.create_index('ix_animals_active_id', ['id'], unique=False,
+                              postgresql_where=sa.text("status = 'Active'"),
+                              sqlite_where=sa.text("status = 'Active'"))
+        batch_op.create_index('ix_animals_category', ['category'], unique=False)
+        batch_op.create_index('ix_animals_mother_id', ['mother_id'], unique=False)
+        batch_op.create_index('ix_animals_father_id', ['father_id'], unique=False)
+
+    with op.batch_alter_table('treatments', schema=None) as batch_op:
+        batch_op.create_index('ix_treatments_animal_id', ['animal_id'], unique=False)
+        batch_op.create_index('ix_treatments_next_due_date', ['next_due_date'], unique=False)
+
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.create_index('ix_sales_sale_date', ['sale_date'], unique=False)
+
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.create_index('ix_expenses_animal_id_date', ['animal_id', 'date'], unique=False)
+        batch_op.create_index('ix_expenses_date', ['date'], unique=False)
+
+    with op.batch_alter_table('breeding_records', schema=None) as batch_op:
+        batch_op.create_index('ix_breeding_records_doe_id', ['doe_id'], unique=False)
+        batch_op.create_index('ix_breeding_records_buck_id', ['buck_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('breeding_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_breeding_records_buck_id')
+        batch_op.drop_index('ix_breeding_records_doe_id')
+
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.drop_index('ix_expenses_date')
+        batch_op.drop_index('ix_expenses_animal_id_date')
+
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_index('ix_sales_sale_date')
+
+    with op.batch_alter_table('treatments', schema=None) as batch_op:
+        batch_op.drop_index('ix_treatments_next_due_date')
+        batch_op.drop_index('ix_treatments_animal_id')
+
+    with op.batch_alter_table('animals', schema=None) as batch_op:
+        batch_op.drop_index('ix_animals_father_id')
+        batch_op.drop_index('ix_animals_mother_id')
+        batch_op.drop_index('ix_animals_category')
+        batch_op.drop_index('ix_animals_active_id')
+        batch_op.drop_index('ix_animals_status_id')
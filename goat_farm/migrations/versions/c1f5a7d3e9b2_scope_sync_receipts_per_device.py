@@ -0,0 +1,54 @@
+"""Scope sync receipts per device
+
+Revision ID: c1f5a7d3e9b2
+Revises: a6e1c9f4b2d8
+Create Date: 2026-10-19 10:14:38.516204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1f5a7d3e9b2'
+down_revision = 'a6e1c9f4b2d8'
+branch_labels = None
+depends_on = None
+
+
+def _set_primary_key(columns, with_device):
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('sync_receipts_pkey', 'sync_receipts', type_='primary')
+        op.create_primary_key('sync_receipts_pkey', 'sync_receipts', columns)
+        return
+
+    # SQLite cannot alter a primary key in place; batch mode copies the rows into this shape
+    device = [sa.Column('device_id', sa.String(length=64), nullable=False, server_default='')] if with_device else []
+    receipts = sa.Table('sync_receipts', sa.MetaData(),
+        *device,
+        sa.Column('client_id', sa.String(length=64), nullable=False),
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint(*columns, name='sync_receipts_pkey')
+    )
+    with op.batch_alter_table('sync_receipts', schema=None, recreate='always', copy_from=receipts):
+        pass
+
+
+def upgrade():
+    # Receipts from before this revision belong to no device, so they no longer match any retry
+    op.add_column('sync_receipts', sa.Column('device_id', sa.String(length=64), nullable=False, server_default=''))
+    _set_primary_key(['device_id', 'client_id', 'table_name'], with_device=True)
+
+
+def downgrade():
+    # Devices that reused a client_id keep only one receipt
+    op.execute(
+        'DELETE FROM sync_receipts WHERE device_id > '
+        '(SELECT min(r.device_id) FROM sync_receipts r '
+        'WHERE r.client_id = sync_receipts.client_id AND r.table_name = sync_receipts.table_name)'
+    )
+    _set_primary_key(['client_id', 'table_name'], with_device=True)
+    with op.batch_alter_table('sync_receipts', schema=None) as batch_op:
+        batch_op.drop_column('device_id')
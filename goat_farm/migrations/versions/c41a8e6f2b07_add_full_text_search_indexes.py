@@ -0,0 +1,54 @@
+"""Add full-text and trigram search indexes
+
+Revision ID: c41a8e6f2b07
+Revises: b7e24f0d5c93
+Create Date: 2026-10-18 15:26:12.874410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41a8e6f2b07'
+down_revision = 'b7e24f0d5c93'
+branch_labels = None
+depends_on = None
+
+# Must build the same expression as app.search.search_document, or the planner won't use the indexes
+SEARCH_DOCUMENTS = {
+    'animals': ['tag_id', 'breed', 'category', 'notes'],
+    'sales': ['buyer_name', 'buyer_contact', 'receipt_number', 'notes'],
+    'treatments': ['treatment_type', 'medication', 'notes'],
+}
+TRIGRAM_COLUMNS = {'animals': 'tag_id', 'sales': 'buyer_name', 'treatments': 'medication'}
+
+
+def _document(columns):
+    body = f"coalesce({columns[0]}, '')"
+    for column in columns[1:]:
+        body = f"{body} || ' ' || coalesce({column}, '')"
+    return f"to_tsvector('simple', {body})"
+
+
+def upgrade():
+    # Postgres only; SQLite builds its FTS5 fallback from app.search on create_all
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, columns in SEARCH_DOCUMENTS.items():
+        op.create_index(f'ix_{table}_search_document', table, [sa.text(_document(columns))],
+                        postgresql_using='gin')
+        column = TRIGRAM_COLUMNS[table]
+        op.create_index(f'ix_{table}_{column}_trgm', table, [column],
+                        postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table, column in TRIGRAM_COLUMNS.items():
+        op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
+        op.drop_index(f'ix_{table}_search_document', table_name=table)
@@ -0,0 +1,32 @@
+"""Add table_versions for ETags on list endpoints
+
+Revision ID: c4e8a1d6f2b7
+Revises: b2d7f4a9c6e0
+Create Date: 2026-10-18 20:41:07.530912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1d6f2b7'
+down_revision = 'b2d7f4a9c6e0'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('animals', 'sales', 'expenses', 'treatments', 'breeding_records')
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(table_versions, [{'name': name, 'version': 0} for name in VERSIONED_TABLES])
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,72 @@
+"""Add delta sync: treatment timestamps, updated_at indexes, tombstones and receipts
+
+Revision ID: d7b3f9e2a5c1
+Revises: c4e8a1d6f2b7
+Create Date: 2026-10-18 21:26:44.903187
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b3f9e2a5c1'
+down_revision = 'c4e8a1d6f2b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('treatments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # Delta sync pages on updated_at, so every existing row needs one
+    for table in ('animals', 'treatments', 'expenses'):
+        op.execute(f'UPDATE {table} SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL')
+    op.execute('UPDATE treatments SET created_at = updated_at WHERE created_at IS NULL')
+
+    with op.batch_alter_table('animals', schema=None) as batch_op:
+        batch_op.create_index('ix_animals_updated_at_id', ['updated_at', 'id'], unique=False)
+    with op.batch_alter_table('treatments', schema=None) as batch_op:
+        batch_op.create_index('ix_treatments_updated_at_id', ['updated_at', 'id'], unique=False)
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.create_index('ix_expenses_updated_at_id', ['updated_at', 'id'], unique=False)
+
+    op.create_table('sync_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_sync_tombstones_deleted_at_id', ['deleted_at', 'id'], unique=False)
+        batch_op.create_index('ix_sync_tombstones_table_row', ['table_name', 'row_id'], unique=False)
+
+    op.create_table('sync_receipts',
+    sa.Column('client_id', sa.String(length=64), nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('client_id')
+    )
+
+
+def downgrade():
+    op.drop_table('sync_receipts')
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_sync_tombstones_table_row')
+        batch_op.drop_index('ix_sync_tombstones_deleted_at_id')
+
+    op.drop_table('sync_tombstones')
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.drop_index('ix_expenses_updated_at_id')
+    with op.batch_alter_table('treatments', schema=None) as batch_op:
+        batch_op.drop_index('ix_treatments_updated_at_id')
+    with op.batch_alter_table('animals', schema=None) as batch_op:
+        batch_op.drop_index('ix_animals_updated_at_id')
+
+    with op.batch_alter_table('treatments', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('created_at')
@@ -0,0 +1,30 @@
+"""Add kidding outcome columns and expected kidding date index to breeding_records
+
+Revision ID: e3b9d0c6a4f2
+Revises: c41a8e6f2b07
+Create Date: 2026-10-18 17:02:41.309218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b9d0c6a4f2'
+down_revision = 'c41a8e6f2b07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('breeding_records', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('kidding_date', sa.Date(), nullable=True))
+        batch_op.add_column(sa.Column('kids_born', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_breeding_records_expected_kidding_date', ['expected_kidding_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('breeding_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_breeding_records_expected_kidding_date')
+        batch_op.drop_column('kids_born')
+        batch_op.drop_column('kidding_date')
@@ -0,0 +1,35 @@
+"""Allow one queued or running job per kind and params
+
+Revision ID: e5a9b3c7d1f4
+Revises: c1f5a7d3e9b2
+Create Date: 2026-10-19 11:02:47.390158
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9b3c7d1f4'
+down_revision = 'c1f5a7d3e9b2'
+branch_labels = None
+depends_on = None
+
+ACTIVE = "status IN ('queued', 'running')"
+
+
+def upgrade():
+    # Submits that raced before this index existed: keep the oldest live job of each set
+    op.execute(
+        "UPDATE jobs SET status = 'failed', error = 'Duplicate of an earlier job' "
+        f"WHERE {ACTIVE} AND EXISTS (SELECT 1 FROM jobs j WHERE j.kind = jobs.kind "
+        "AND j.params_hash = jobs.params_hash AND j.status IN ('queued', 'running') AND j.id < jobs.id)"
+    )
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index('uq_jobs_active_kind_params_hash', ['kind', 'params_hash'], unique=True,
+                              postgresql_where=sa.text(ACTIVE), sqlite_where=sa.text(ACTIVE))
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('uq_jobs_active_kind_params_hash')
@@ -0,0 +1,34 @@
+"""Add sired_count to animals and backfill both offspring counters
+
+Revision ID: f6a2c8e1d9b4
+Revises: e3b9d0c6a4f2
+Create Date: 2026-10-18 17:48:09.551032
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a2c8e1d9b4'
+down_revision = 'e3b9d0c6a4f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('animals', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sired_count', sa.Integer(), nullable=True))
+
+    # offspring_count was never maintained before; recount both from the parent links
+    op.execute("""
+        UPDATE animals SET
+            offspring_count = (SELECT count(*) FROM animals child
+                               WHERE child.mother_id = animals.id OR child.father_id = animals.id),
+            sired_count = (SELECT count(*) FROM animals child WHERE child.father_id = animals.id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('animals', schema=None) as batch_op:
+        batch_op.drop_column('sired_count')
@@ -0,0 +1,204 @@
+import random
+import time
+from datetime import date
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import Animal, Breeding
+from app.pedigree import Pedigree, invalidate_pedigree, load_pedigree
+
+
+def test_recommendations_rank_unrelated_proven_bucks_first(client):
+    """
+    GIVEN a doe, her sire, a half brother and two unrelated bucks, one of which has failed twice
+    WHEN '/breeding/recommendations' is asked for that doe
+    THEN the unrelated proven buck ranks first and related bucks are flagged and ranked last
+    """
+    sire = Animal(tag_id="RECSIRE", breed="Boer", sex="Buck")
+    dam = Animal(tag_id="RECDAM", breed="Boer", sex="Doe", status="Sold")
+    other_dam = Animal(tag_id="RECDAM2", breed="Boer", sex="Doe", status="Sold")
+    proven = Animal(tag_id="RECPROVEN", breed="Boer", sex="Buck")
+    unlucky = Animal(tag_id="RECUNLUCKY", breed="Boer", sex="Buck")
+    db.session.add_all([sire, dam, other_dam, proven, unlucky])
+    db.session.flush()
+    doe = Animal(tag_id="RECDOE", breed="Boer", sex="Doe", mother_id=dam.id, father_id=sire.id)
+    half_brother = Animal(tag_id="RECHALF", breed="Boer", sex="Buck", mother_id=other_dam.id, father_id=sire.id)
+    db.session.add_all([doe, half_brother])
+    db.session.flush()
+    db.session.add_all([
+        Breeding(doe_id=dam.id, buck_id=proven.id, mating_date=date(2024, 1, 1), status="Completed"),
+        Breeding(doe_id=dam.id, buck_id=unlucky.id, mating_date=date(2024, 1, 1), status="Failed"),
+        Breeding(doe_id=other_dam.id, buck_id=unlucky.id, mating_date=date(2024, 2, 1), status="Failed"),
+    ])
+    db.session.commit()
+
+    response = client.get(f"/breeding/recommendations?doe_ids={doe.id}&limit=10")
+    assert response.status_code == 200
+    [recommendation] = response.get_json()["recommendations"]
+    ranked = [buck["buck_tag_id"] for buck in recommendation["bucks"]]
+    assert ranked[:2] == ["RECPROVEN", "RECUNLUCKY"]
+    assert set(ranked[2:]) == {"RECSIRE", "RECHALF"}
+
+    by_tag = {buck["buck_tag_id"]: buck for buck in recommendation["bucks"]}
+    assert by_tag["RECSIRE"]["predicted_inbreeding"] == 0.25
+    assert by_tag["RECHALF"]["predicted_inbreeding"] == 0.125
+    assert by_tag["RECSIRE"]["exceeds_inbreeding_limit"]
+    assert not by_tag["RECPROVEN"]["exceeds_inbreeding_limit"]
+    assert by_tag["RECPROVEN"]["success_rate"] > by_tag["RECUNLUCKY"]["success_rate"]
+
+    assert client.get("/breeding/recommendations?doe_ids=999999").status_code == 404
+    assert client.get("/breeding/recommendations?limit=0").status_code == 400
+
+
+def test_kinship_is_read_from_the_smaller_side(client, monkeypatch):
+    """
+    GIVEN a few does and more active bucks than the kinship column cache holds
+    WHEN recommendations are requested for two does, then for many does
+    THEN each pairing's predicted inbreeding is its kinship either way round,
+         and the two-doe request computes one relationship column per doe, once
+    """
+    sire = Animal(tag_id="SIDESIRE", breed="Boer", sex="Buck", status="Sold")
+    dam = Animal(tag_id="SIDEDAM", breed="Boer", sex="Doe", status="Sold")
+    db.session.add_all([sire, dam])
+    db.session.flush()
+    does = [Animal(tag_id=f"SIDEDOE{i}", breed="Boer", sex="Doe", mother_id=dam.id if i % 2 else None,
+                   father_id=sire.id) for i in range(40)]
+    bucks = [Animal(tag_id=f"SIDEBUCK{i}", breed="Boer", sex="Buck", father_id=sire.id if i % 3 == 0 else None)
+             for i in range(12)]
+    db.session.add_all(does + bucks)
+    db.session.commit()
+
+    computed = []
+    relationship_column = Pedigree._relationship_column
+
+    def counting(pedigree, j):
+        computed.append(j)
+        return relationship_column(pedigree, j)
+
+    monkeypatch.setattr(Pedigree, "KINSHIP_COLUMN_CACHE", 4)
+    monkeypatch.setattr(Pedigree, "_relationship_column", counting)
+
+    def recommend(doe_ids):
+        response = client.get(f"/breeding/recommendations?limit=100&doe_ids={','.join(map(str, doe_ids))}")
+        assert response.status_code == 200
+        return response.get_json()["recommendations"]
+
+    pair = [does[0].id, does[1].id]
+    for _ in range(2):
+        few = recommend(pair)
+    assert len(computed) == 2
+
+    many = recommend([doe.id for doe in does])
+    pedigree = load_pedigree()
+    for recommendation in few + many:
+        assert len(recommendation["bucks"]) >= len(bucks)
+        for buck in recommendation["bucks"]:
+            assert buck["predicted_inbreeding"] == pedigree.kinship(recommendation["doe_id"], buck["buck_id"])
+    assert {buck["predicted_inbreeding"] for buck in many[1]["bucks"]} >= {0.0, 0.125}
+
+
+def test_breeding_listing_does_not_load_animals_per_row(client):
+    does = Animal.query.filter(Animal.sex == "Doe").all()
+    buck_id = Animal.query.filter_by(tag_id="RECPROVEN").one().id
+    for day in range(1, 21):
+        db.session.add(Breeding(doe_id=does[day % len(does)].id, buck_id=buck_id,
+                                mating_date=date(2025, 1, day), expected_kidding_date=date(2025, 6, day),
+                                status="Confirmed"))
+    db.session.commit()
+    db.session.expunge_all()
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        if "table_versions" not in statement:  # the ETag lookup, not the listing
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count_statement)
+    try:
+        response = client.get(f"/breeding/get?buck_id={buck_id}&limit=50")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count_statement)
+
+    assert response.status_code == 200
+    records = response.get_json()
+    assert len(records) == 21
+    assert all(record["buck_tag_id"] == "RECPROVEN" for record in records)
+    assert len(statements) == 1
+
+    assert client.get("/breeding/get?order=updated_at").status_code == 400
+
+
+def test_kidding_calendar_groups_expected_kiddings_in_sql(client):
+    response = client.get("/breeding/calendar?grain=month&from=2025-06-01&to=2025-06-30")
+    assert response.status_code == 200
+    assert [(p["period"], p["expected_kiddings"]) for p in response.get_json()["periods"]] == [("2025-06", 20)]
+
+    response = client.get("/breeding/calendar?grain=week&from=2025-06-01&to=2025-06-30")
+    weeks = response.get_json()["periods"]
+    # 2025-06-01 is a Sunday, so it belongs to the week starting Monday 2025-05-26
+    assert [p["period"] for p in weeks] == ["2025-05-26", "2025-06-02", "2025-06-09", "2025-06-16"]
+    assert sum(p["expected_kiddings"] for p in weeks) == 20
+
+    assert client.get("/breeding/calendar?grain=day").status_code == 400
+
+
+def test_update_and_kidding_outcome(client):
+    record = Breeding.query.filter_by(mating_date=date(2025, 1, 1)).one()
+
+    response = client.patch(f"/breeding/{record.id}/update", json={"mating_date": "2025-01-05"})
+    assert response.status_code == 200
+    assert response.get_json()["record"]["expected_kidding_date"] == "2025-06-04"
+    assert client.patch(f"/breeding/{record.id}/update", json={"status": "Born"}).status_code == 400
+
+    response = client.post(f"/breeding/{record.id}/kidding", json={
+        "kidding_date": "2025-06-03",
+        "kids": [{"tag_id": "KIDA", "sex": "Doe"}, {"tag_id": "KIDB", "sex": "Buck", "weight": 3.2}]
+    })
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data["record"]["status"] == "Completed"
+    assert data["record"]["kids_born"] == 2
+    kid = Animal.query.filter_by(tag_id="KIDB").one()
+    assert (kid.mother_id, kid.father_id) == (record.doe_id, record.buck_id)
+    assert kid.birth_date == date(2025, 6, 3)
+
+    assert client.post(f"/breeding/{record.id}/kidding", json={"kids": []}).status_code == 409
+
+
+def test_full_herd_recommendation_run_is_fast(client):
+    """
+    GIVEN a 6,000 animal herd over several generations, with more active bucks than the kinship column cache holds
+    WHEN recommendations are requested for every active doe
+    THEN a run on a warm kinship cache completes in well under a second and gives the same answer
+    """
+    rng = random.Random(7)
+    animals = Animal.__table__
+    does, bucks = [], []
+    for generation in range(6):
+        rows = []
+        for i in range(1000):
+            sex = "Buck" if i % 3 == 0 else "Doe"
+            mother = rng.choice(does) if does else None
+            father = rng.choice(bucks) if bucks else None
+            rows.append({"tag_id": f"HERD{generation}-{i:04d}", "breed": "Boer", "sex": sex,
+                         "status": "Active" if generation >= 2 else "Sold",
+                         "mother_id": mother, "father_id": father, "offspring_count": 0})
+        inserted = db.session.execute(animals.insert().returning(animals.c.id, animals.c.sex), rows).all()
+        does = [animal_id for animal_id, sex in inserted if sex == "Doe"]
+        bucks = [animal_id for animal_id, sex in inserted if sex == "Buck"]
+    db.session.commit()
+    # Core inserts bypass the ORM hooks that normally invalidate the pedigree
+    invalidate_pedigree()
+
+    first = client.get("/breeding/recommendations")  # builds pedigree + kinship block
+    assert first.status_code == 200
+
+    started = time.perf_counter()
+    response = client.get("/breeding/recommendations")
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    assert len(response.get_json()["recommendations"]) >= 2600
+    assert response.get_json() == first.get_json()
+    assert elapsed < 1.0
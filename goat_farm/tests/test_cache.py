@@ -0,0 +1,36 @@
+from app.extensions import db
+from app.models import Animal
+
+
+def test_dashboard_cache_hits_until_a_write_commits(client):
+    """
+    GIVEN the '/animals/total/animals' dashboard endpoint
+    WHEN it is polled twice, then an animal is added and it is polled again
+    THEN the second poll is a cache hit and the commit invalidates the entry
+    """
+    first = client.get("/animals/total/animals")
+    assert first.headers["X-Cache"] == "MISS"
+    second = client.get("/animals/total/animals")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.get_json() == first.get_json()
+
+    db.session.add(Animal(tag_id="CACHE001", breed="Boer", sex="Doe", category="Kid"))
+    db.session.commit()
+
+    third = client.get("/animals/total/animals")
+    assert third.headers["X-Cache"] == "MISS"
+    assert third.get_json()["total_animals"] == first.get_json()["total_animals"] + 1
+
+    stats = client.get("/cache/stats").get_json()
+    assert stats["hits"] >= 1
+    assert stats["misses"] >= 2
+    assert stats["invalidations"] >= 1
+
+
+def test_rolled_back_writes_do_not_invalidate(client):
+    client.get("/animals/total/animals")
+    db.session.add(Animal(tag_id="CACHE002", breed="Boer", sex="Doe"))
+    db.session.flush()
+    db.session.rollback()
+
+    assert client.get("/animals/total/animals").headers["X-Cache"] == "HIT"
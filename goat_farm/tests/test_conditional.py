@@ -0,0 +1,107 @@
+from sqlalchemy import event, false, select
+
+from app import versions
+from app.extensions import db
+from app.models import Animal, Expense, TableVersion, Treatment
+from app.versions import bump_versions
+
+
+def test_unchanged_list_answers_304_without_running_the_view(client):
+    """
+    GIVEN '/animals/get' fetched once
+    WHEN it is requested again with the returned ETag in If-None-Match
+    THEN the answer is a bodiless 304 and only the version lookup hits the database
+    """
+    db.session.add(Animal(tag_id="ETAG001", breed="Boer", sex="Doe"))
+    db.session.commit()
+
+    first = client.get("/animals/get")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert not etag.startswith("W/")
+    assert first.headers["Last-Modified"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count_statement)
+    try:
+        second = client.get("/animals/get", headers={"If-None-Match": etag})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count_statement)
+
+    assert second.status_code == 304
+    assert second.data == b""
+    assert second.headers["ETag"] == etag
+    assert len(statements) == 1 and "table_versions" in statements[0]
+
+    # A different query string is a different representation
+    assert client.get("/animals/get?limit=1", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_commit_changes_the_etag_and_rollback_does_not(client):
+    etag = client.get("/expenses/total").headers["ETag"]
+
+    db.session.add(Expense(expense_type="Feed", amount=10.0))
+    db.session.flush()
+    db.session.rollback()
+    assert client.get("/expenses/total", headers={"If-None-Match": etag}).status_code == 304
+
+    db.session.add(Expense(expense_type="Feed", amount=10.0))
+    db.session.commit()
+    response = client.get("/expenses/total", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_treatment_cost_bumps_expenses_version(client):
+    """Treatment costs become expenses through Core, which the Expense mapper events never see."""
+    animal = Animal(tag_id="ETAG002", breed="Boer", sex="Doe")
+    db.session.add(animal)
+    db.session.commit()
+    before = db.session.get(TableVersion, "expenses").version
+
+    db.session.add(Treatment(animal_id=animal.id, treatment_type="Vaccination", cost=150.0))
+    db.session.commit()
+
+    assert db.session.get(TableVersion, "expenses").version == before + 1
+
+
+def test_if_modified_since(client):
+    first = client.get("/sales/stats/monthly")
+    last_modified = first.headers["Last-Modified"]
+
+    assert client.get("/sales/stats/monthly", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/sales/stats/monthly",
+                      headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}).status_code == 200
+    # If-None-Match wins over If-Modified-Since
+    assert client.get("/sales/stats/monthly", headers={
+        "If-Modified-Since": last_modified, "If-None-Match": '"stale"'
+    }).status_code == 200
+
+
+def test_errors_carry_no_etag(client):
+    response = client.get("/animals/get?include=nonsense")
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
+
+
+def test_first_bump_survives_a_concurrent_first_bump(app, monkeypatch):
+    """Two writers creating a table's version row at once: the second bumps the row the first created."""
+    connection = db.session.connection()
+    table = TableVersion.__table__
+
+    def racing_select(*columns):
+        # The other writer inserts after our UPDATE matched nothing; our SELECT cannot see it yet
+        connection.execute(table.insert().values(name="race_table", version=1))
+        return select(*columns).where(false())
+
+    monkeypatch.setattr(versions, "select", racing_select)
+    bump_versions("race_table", connection=connection)
+    monkeypatch.undo()
+
+    assert db.session.get(TableVersion, "race_table").version == 2
+    db.session.rollback()
@@ -0,0 +1,45 @@
+import os
+import runpy
+from pathlib import Path
+
+from app.config import Config, engine_options
+
+GUNICORN_CONF = Path(__file__).resolve().parent.parent / "gunicorn.conf.py"
+
+
+def _config(**overrides):
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    config.update(overrides)
+    return config
+
+
+def test_engine_options_tune_the_postgres_pool():
+    options = engine_options(_config(DB_POOL_SIZE=8, DB_STATEMENT_TIMEOUT_MS=5000))
+    assert options["pool_size"] == 8
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+    assert "connect_args" not in engine_options(_config(DB_STATEMENT_TIMEOUT_MS=0))
+
+
+def test_sqlite_gets_no_pool_options(app):
+    assert engine_options(_config(SQLALCHEMY_DATABASE_URI="sqlite:///:memory:")) == {}
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"] == {}
+
+
+def test_gunicorn_pool_defaults_stay_within_the_connection_budget(monkeypatch):
+    # 17 workers (an 8-core host) share the default 80 connections, gevent included
+    for worker_class in ("gevent", "gthread"):
+        for name in ("DB_POOL_SIZE", "DB_MAX_OVERFLOW"):
+            monkeypatch.delenv(name, raising=False)
+        monkeypatch.setenv("GUNICORN_WORKER_CLASS", worker_class)
+        monkeypatch.setenv("GUNICORN_WORKERS", "17")
+        runpy.run_path(str(GUNICORN_CONF))
+        assert (int(os.environ["DB_POOL_SIZE"]), int(os.environ["DB_MAX_OVERFLOW"])) == (4, 0)
+
+    monkeypatch.delenv("DB_POOL_SIZE")
+    monkeypatch.delenv("DB_MAX_OVERFLOW")
+    monkeypatch.setenv("GUNICORN_WORKERS", "5")
+    monkeypatch.setenv("GUNICORN_THREADS", "2")
+    runpy.run_path(str(GUNICORN_CONF))
+    assert (int(os.environ["DB_POOL_SIZE"]), int(os.environ["DB_MAX_OVERFLOW"])) == (2, 14)
@@ -0,0 +1,72 @@
+import csv
+import io
+from datetime import date
+
+import pytest
+
+from app.extensions import db
+from app.models import Expense
+
+
+def _rows(response):
+    return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+
+def test_expenses_export_streams_csv_in_chunks(app, client, monkeypatch):
+    """
+    GIVEN more expenses than one export chunk
+    WHEN '/export/expenses.csv' is requested with a date range
+    THEN every expense in the range is streamed as an attachment, in id order
+    """
+    db.session.add_all([
+        Expense(expense_type="Feed", amount=10.0 + day, date=date(2025, 1, day), notes="hay, 2 bales")
+        for day in range(1, 8)
+    ])
+    db.session.commit()
+    monkeypatch.setitem(app.config, "EXPORT_CHUNK_SIZE", 3)
+
+    response = client.get("/export/expenses.csv")
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="expenses.csv"'
+    rows = _rows(response)
+    assert len(rows) == 7
+    assert rows[0]["date"] == "2025-01-01"
+    assert rows[0]["notes"] == "hay, 2 bales"
+    assert [int(row["id"]) for row in rows] == sorted(int(row["id"]) for row in rows)
+
+    ranged = _rows(client.get("/export/expenses.csv?from=2025-01-03&to=2025-01-05"))
+    assert [row["date"] for row in ranged] == ["2025-01-03", "2025-01-04", "2025-01-05"]
+
+
+def test_export_rejects_bad_requests(client):
+    assert client.get("/export/goats.csv").status_code == 404
+    assert client.get("/export/sales.xlsx").status_code == 404
+    assert client.get("/export/sales.csv?from=yesterday").status_code == 400
+    assert client.get("/export/sales.csv?from=2025-02-01&to=2025-01-01").status_code == 400
+
+
+def test_parquet_export_needs_pyarrow(client, monkeypatch):
+    monkeypatch.setattr("app.routes.export_routes.parquet_available", lambda: False)
+    assert client.get("/export/sales.parquet").status_code == 501
+
+
+def test_parquet_export_round_trips(app, client, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    db.session.add_all([Expense(expense_type="Vet", amount=25.5, date=date(2025, 2, day)) for day in range(1, 6)])
+    db.session.commit()
+    monkeypatch.setitem(app.config, "EXPORT_CHUNK_SIZE", 2)
+
+    response = client.get("/export/expenses.parquet")
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "application/vnd.apache.parquet"
+    parquet = pq.ParquetFile(io.BytesIO(response.get_data()))
+    table = parquet.read()
+
+    assert table.num_rows == Expense.query.count()
+    assert table.column_names == [column.name for column in Expense.__table__.columns]
+    assert parquet.num_row_groups == -(-table.num_rows // 2)
+    assert table.column("amount").to_pylist()[-1] == 25.5
+    assert table.column("date").to_pylist()[-1] == date(2025, 2, 5)
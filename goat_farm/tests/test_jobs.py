@@ -0,0 +1,133 @@
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import jobs
+from app.extensions import db
+from app.jobs import JOB_HANDLERS, claim_next_job, job_handler, prune_expired_artifacts, submit_job, work
+from app.models import Animal, Job, Sale
+
+
+@pytest.fixture(scope="module", autouse=True)
+def artifacts(app, tmp_path_factory):
+    app.config["JOB_ARTIFACT_DIR"] = str(tmp_path_factory.mktemp("job_artifacts"))
+    goat = Animal(tag_id="JOBGOAT", breed="Boer", sex="Buck", status="Sold", acquisition_price=50.0)
+    db.session.add(goat)
+    db.session.flush()
+    db.session.add(Sale(animal_id=goat.id, buyer_name="Job Buyer", price=300.0, sale_date=date(2025, 3, 4)))
+    db.session.commit()
+
+
+def test_report_runs_out_of_band_and_is_served_as_artifact(client):
+    """
+    GIVEN a monthly sales report submitted to '/jobs'
+    WHEN a worker drains the queue
+    THEN the job's result is the same document the endpoint serves inline
+    """
+    response = client.post("/jobs", json={"kind": "sales_stats_monthly", "params": {"fresh": 1}})
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job["status"] == "queued"
+    assert response.headers["Location"].endswith(f"/jobs/{job['id']}")
+
+    # Submitting the same report again attaches to the queued job
+    again = client.post("/jobs", json={"kind": "sales_stats_monthly", "params": {"fresh": 1}})
+    assert again.status_code == 200
+    assert again.get_json()["id"] == job["id"]
+    assert client.get(f"/jobs/{job['id']}/result").status_code == 409
+
+    assert work(until_empty=True) == 1
+
+    status = client.get(f"/jobs/{job['id']}").get_json()
+    assert status["status"] == "succeeded"
+    assert status["result_url"].endswith(f"/jobs/{job['id']}/result")
+
+    result = client.get(f"/jobs/{job['id']}/result")
+    assert result.status_code == 200
+    assert json.loads(result.get_data()) == client.get("/sales/stats/monthly?fresh=1").get_json()
+
+    # A fresh artifact is reused instead of recomputed
+    assert client.post("/jobs", json={"kind": "sales_stats_monthly", "params": {"fresh": 1}}).status_code == 200
+
+
+def test_herd_export_job_writes_ndjson(client):
+    job, created = submit_job("animals_export", {"status": "Sold"})
+    assert created
+    work(until_empty=True)
+
+    response = client.get(f"/jobs/{job.id}/result")
+    assert response.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row["tag_id"] for row in rows] == ["JOBGOAT"]
+
+
+def test_submit_rejects_unknown_kinds_and_params(client):
+    assert client.post("/jobs", json={"kind": "mine_bitcoin"}).status_code == 400
+    assert client.post("/jobs", json={"kind": "sales_stats_yearly", "params": {"year": 2025}}).status_code == 400
+    assert "sales_stats_yearly" in client.get("/jobs/kinds").get_json()
+    for body in (["sales_stats_monthly"], "sales_stats_monthly", 1):
+        assert client.post("/jobs", json=body).status_code == 400
+
+
+def test_failing_jobs_retry_then_fail(client):
+    calls = []
+
+    @job_handler("test_flaky")
+    def flaky(params):
+        calls.append(params)
+        raise RuntimeError("disk full")
+
+    try:
+        job, _ = submit_job("test_flaky")
+        work(until_empty=True)
+    finally:
+        del JOB_HANDLERS["test_flaky"]
+
+    job = db.session.get(Job, job.id, populate_existing=True)
+    assert len(calls) == job.max_attempts == 3
+    assert job.status == "failed"
+    assert job.error == "RuntimeError: disk full"
+    assert client.get(f"/jobs/{job.id}/result").status_code == 409
+
+
+def test_a_job_is_claimed_by_one_worker_only(app):
+    job, _ = submit_job("sales_stats_daily")
+    first = claim_next_job("worker-a")
+    second = claim_next_job("worker-b")
+    assert first.id == job.id and first.worker_id == "worker-a"
+    assert second is None
+    db.session.delete(first)
+    db.session.commit()
+
+
+def test_concurrent_submits_queue_one_job(app, monkeypatch):
+    job, created = submit_job("sales_stats_daily", {"fresh": 1})
+    assert created
+
+    # The second submit looked for a live job before the first one committed
+    live_job = jobs._live_job
+    lookups = []
+
+    def racing(kind, digest):
+        lookups.append(kind)
+        return None if len(lookups) == 1 else live_job(kind, digest)
+
+    monkeypatch.setattr(jobs, "_live_job", racing)
+    again, created = submit_job("sales_stats_daily", {"fresh": 1})
+    assert not created and again.id == job.id
+    assert Job.query.filter_by(kind="sales_stats_daily", status="queued").count() == 1
+    db.session.delete(again)
+    db.session.commit()
+
+
+def test_expired_artifacts_are_pruned(client):
+    job = Job.query.filter_by(kind="animals_export").one()
+    job.expires_at = datetime.now() - timedelta(seconds=1)
+    db.session.commit()
+
+    assert client.get(f"/jobs/{job.id}/result").status_code == 410
+    assert prune_expired_artifacts() == 1
+    assert db.session.get(Job, job.id).result_path is None
+    # Expired results don't satisfy new submissions
+    assert client.post("/jobs", json={"kind": "animals_export", "params": {"status": "Sold"}}).status_code == 202
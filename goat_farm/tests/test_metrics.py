@@ -0,0 +1,83 @@
+from app import create_app
+from app.config import TestingConfig
+from app.extensions import db
+from app.instrumentation import metrics
+from app.models import Animal
+
+
+def test_metrics_count_requests_and_queries_per_endpoint(client):
+    """
+    GIVEN a few requests to '/animals/get'
+    WHEN '/metrics' is scraped
+    THEN it reports their latency histogram, status counts and SQL statements in Prometheus format
+    """
+    db.session.add_all([Animal(tag_id=f"MET{i}", breed="Boer", sex="Doe") for i in range(3)])
+    db.session.commit()
+    metrics.reset()
+
+    for _ in range(2):
+        assert client.get("/animals/get").status_code == 200
+    client.get("/animals/999999")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert 'goatfarm_http_requests_total{endpoint="animal.get_animals",method="GET",status="200"} 2' in body
+    assert 'goatfarm_http_requests_total{endpoint="animal.get_animal",method="GET",status="404"} 1' in body
+    assert ('goatfarm_http_request_duration_seconds_bucket'
+            '{endpoint="animal.get_animals",method="GET",le="+Inf"} 2') in body
+    assert 'goatfarm_http_request_duration_seconds_count{endpoint="animal.get_animals",method="GET"} 2' in body
+
+    queries = next(line for line in body.splitlines()
+                   if line.startswith('goatfarm_db_queries_per_request_sum{endpoint="animal.get_animals"}'))
+    assert float(queries.split()[-1]) >= 2
+
+
+def test_slow_queries_are_sampled_and_server_timing_is_optional(app, client):
+    metrics.reset()
+    assert "Server-Timing" not in client.get("/animals/get").headers
+
+    previous = metrics.slow_query_seconds, metrics.server_timing
+    metrics.slow_query_seconds, metrics.server_timing = 0.0, True
+    try:
+        response = client.get("/animals/get")
+    finally:
+        metrics.slow_query_seconds, metrics.server_timing = previous
+
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("db;dur=") and "app;dur=" in timing
+    samples = client.get("/metrics/slow-queries").get_json()
+    assert samples and samples[0]["endpoint"] == "animal.get_animals"
+    assert samples[0]["statement"].lstrip().upper().startswith("SELECT")
+    assert 'goatfarm_db_slow_queries_total{endpoint="animal.get_animals"}' in client.get("/metrics").get_data(as_text=True)
+
+
+def test_a_second_app_keeps_its_own_metrics(app, client):
+    """
+    GIVEN a scraped request on the test app
+    WHEN another app is created with different settings and serves a request
+    THEN the first app's counters and thresholds are untouched, and the second only counts its own
+    """
+    class QuietConfig(TestingConfig):
+        SLOW_QUERY_MS = 5000
+        N_PLUS_ONE_MODE = "off"
+
+    metrics.reset()
+    client.get("/animals/get")
+    settings = metrics.slow_query_seconds, metrics.n_plus_one_mode
+
+    other = create_app(QuietConfig)
+    with other.app_context():
+        db.create_all()
+        other.test_client().get("/animals/999999")
+        assert (metrics.slow_query_seconds, metrics.n_plus_one_mode) == (5.0, "off")
+        body = metrics.render()
+        db.drop_all()
+    assert 'endpoint="animal.get_animal",method="GET",status="404"} 1' in body
+    assert "animal.get_animals" not in body
+
+    assert (metrics.slow_query_seconds, metrics.n_plus_one_mode) == settings == (0.2, "raise")
+    body = metrics.render()
+    assert 'goatfarm_http_requests_total{endpoint="animal.get_animals",method="GET",status="200"} 1' in body
+    assert "animal.get_animal\"" not in body
@@ -0,0 +1,71 @@
+import re
+
+import pytest
+from flask import jsonify
+
+from app import create_app
+from app.extensions import db
+from app.instrumentation import RepeatedQueryError, allow_repeated_queries, metrics, statement_shape
+from app.models import Animal
+
+
+@pytest.fixture(scope="module")
+def herd_app():
+    """An app with views that walk parent links lazily, one SELECT per animal."""
+    app = create_app("app.config.TestingConfig")
+
+    def mothers():
+        return jsonify([animal.mother.tag_id for animal in Animal.query.filter(Animal.mother_id.isnot(None))])
+
+    app.add_url_rule("/test/mothers", "test_mothers", mothers)
+    app.add_url_rule("/test/mothers/allowed", "test_mothers_allowed", allow_repeated_queries(mothers))
+    # The lazy load happens inside Animal.to_dict, so an app frame issues it
+    app.add_url_rule("/test/treatments", "test_treatments",
+                     lambda: jsonify([animal.to_dict(include=("treatments",)) for animal in Animal.query]))
+
+    with app.app_context():
+        db.create_all()
+        does = [Animal(tag_id=f"DAM{i}", breed="Boer", sex="Doe") for i in range(6)]
+        db.session.add_all(does)
+        db.session.flush()
+        db.session.add_all([
+            Animal(tag_id=f"KID{i}", breed="Boer", sex="Buck", mother_id=doe.id) for i, doe in enumerate(does)
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_repeated_lazy_loads_fail_the_request_in_testing(herd_app):
+    """
+    GIVEN TestingConfig (N_PLUS_ONE_MODE = "raise")
+    WHEN a view serializes animals whose to_dict lazy-loads their treatments
+    THEN the request raises with the repeated statement and the app frame that issued it
+    """
+    with pytest.raises(RepeatedQueryError) as error:
+        herd_app.test_client().get("/test/treatments")
+    message = str(error.value)
+    assert "GET /test/treatments (test_treatments)" in message
+    assert "FROM treatments" in message
+    assert re.search(r'app[/\\]models\.py", line \d+, in to_dict', message)
+    assert "test_n_plus_one.py" not in message  # only app frames; the view itself lives in the test
+    assert 'goatfarm_db_repeated_queries_total{endpoint="test_treatments"} 1' in metrics.render()
+
+
+def test_log_mode_and_opt_out(herd_app, caplog, monkeypatch):
+    client = herd_app.test_client()
+    # Requests share the fixture's session; start each from an empty identity map
+    db.session.expire_all()
+    assert client.get("/test/mothers/allowed").status_code == 200
+    assert "Repeated queries" not in caplog.text
+
+    monkeypatch.setattr(metrics, "n_plus_one_mode", "log")
+    db.session.expire_all()
+    assert client.get("/test/mothers").status_code == 200
+    assert "Repeated queries (possible N+1)" in caplog.text
+
+
+def test_statement_shape_ignores_in_list_length_and_whitespace():
+    assert statement_shape("SELECT id FROM animals\n WHERE id IN (?, ?, ?)") == \
+        statement_shape("SELECT id FROM animals WHERE id IN (?)")
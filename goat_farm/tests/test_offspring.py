@@ -0,0 +1,72 @@
+from app.extensions import db
+from app.models import Animal
+
+
+def _counts(tag_id):
+    animal = Animal.query.filter_by(tag_id=tag_id).one()
+    return animal.offspring_count, animal.sired_count
+
+
+def test_counters_follow_inserts_parent_changes_and_deletes(client):
+    """
+    GIVEN a doe and two bucks
+    WHEN kids are added, moved to another sire and deleted through the API and ORM
+    THEN the stored offspring_count/sired_count always match the parent links
+    """
+    doe = Animal(tag_id="OFFDOE", breed="Boer", sex="Doe")
+    buck = Animal(tag_id="OFFBUCK", breed="Boer", sex="Buck")
+    other_buck = Animal(tag_id="OFFBUCK2", breed="Boer", sex="Buck")
+    db.session.add_all([doe, buck, other_buck])
+    db.session.commit()
+
+    for tag in ("OFFKID1", "OFFKID2"):
+        response = client.post("/animals/add", json={
+            "tag_id": tag, "breed": "Boer", "sex": "Doe", "weight": 3.0, "health_status": "Healthy",
+            "mother_id": doe.id, "father_id": buck.id
+        })
+        assert response.status_code == 201
+    assert _counts("OFFDOE") == (2, 0)
+    assert _counts("OFFBUCK") == (2, 2)
+
+    kid = Animal.query.filter_by(tag_id="OFFKID1").one()
+    response = client.patch(f"/animals/{kid.id}/update", json={"father_id": other_buck.id})
+    assert response.status_code == 200
+    assert _counts("OFFBUCK") == (1, 1)
+    assert _counts("OFFBUCK2") == (1, 1)
+
+    kid = Animal.query.filter_by(tag_id="OFFKID2").one()
+    db.session.delete(kid)
+    db.session.commit()
+    assert _counts("OFFDOE") == (1, 0)
+    assert _counts("OFFBUCK") == (0, 0)
+
+    response = client.get(f"/animals/{doe.id}")
+    assert response.get_json()["offspring_count"] == 1
+
+
+def test_bulk_import_recounts_parents(client):
+    response = client.post("/animals/bulk", json=[
+        {"tag_id": "OFFBULK1", "breed": "Boer", "sex": "Doe", "mother_tag_id": "OFFDOE"},
+        {"tag_id": "OFFBULK2", "breed": "Boer", "sex": "Buck", "mother_tag_id": "OFFBULK1",
+         "father_tag_id": "OFFBUCK"},
+    ])
+    assert response.status_code == 201
+    assert _counts("OFFDOE") == (2, 0)
+    assert _counts("OFFBULK1") == (1, 0)
+    assert _counts("OFFBUCK") == (1, 1)
+
+
+def test_reconcile_cli_repairs_drift(app):
+    animals = Animal.__table__
+    db.session.execute(animals.update().where(animals.c.tag_id == "OFFDOE").values(offspring_count=40))
+    db.session.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["offspring", "reconcile", "--verify-only"])
+    assert result.exit_code != 0
+    assert "expected 2" in result.output
+
+    result = runner.invoke(args=["offspring", "reconcile"])
+    assert result.exit_code == 0
+    assert "Fixed offspring counters for 1 animal(s)." in result.output
+    assert runner.invoke(args=["offspring", "reconcile", "--verify-only"]).exit_code == 0
@@ -0,0 +1,110 @@
+import random
+import time
+
+import pytest
+
+from app.extensions import db
+from app.models import Animal
+from app.pedigree import Pedigree
+
+
+def _family():
+    """
+    Founders 1 (buck) and 2, 3 (does). 4, 5 full sibs out of 2 by 1; 6 a half sib
+    out of 3 by 1. 7 = 4 x 5 (full-sib mating), 8 = 4 x 6 (half-sib mating),
+    9 = 1 x 5 (sire x daughter), 10 = 7 x 9.
+    """
+    return [
+        (10, 9, 7),  # listed out of order on purpose
+        (1, None, None), (2, None, None), (3, None, None),
+        (4, 2, 1), (5, 2, 1), (6, 3, 1),
+        (7, 5, 4), (8, 6, 4), (9, 5, 1),
+    ]
+
+
+def test_inbreeding_matches_known_coefficients():
+    pedigree = Pedigree.from_rows(_family())
+    assert pedigree.inbreeding(4) == 0.0
+    assert pedigree.inbreeding(7) == pytest.approx(0.25)
+    assert pedigree.inbreeding(8) == pytest.approx(0.125)
+    assert pedigree.inbreeding(9) == pytest.approx(0.25)
+    # Parents are always indexed before their offspring
+    assert all(pedigree.sire[i] < i and pedigree.dam[i] < i for i in range(len(pedigree)))
+
+
+def test_kinship_matrix_agrees_with_pairwise_kinship():
+    pedigree = Pedigree.from_rows(_family())
+    assert pedigree.kinship(4, 5) == pytest.approx(0.25)
+    assert pedigree.kinship(4, 4) == pytest.approx(0.5)
+    assert pedigree.kinship(2, 3) == 0.0
+    # Kinship of the parents is the offspring's inbreeding
+    assert pedigree.kinship(7, 9) == pytest.approx(pedigree.inbreeding(10))
+
+    does, bucks = [2, 3, 5, 6, 9], [1, 4, 7]
+    matrix = pedigree.kinship_matrix(does, bucks)
+    assert len(matrix) == len(does) and all(len(row) == len(bucks) for row in matrix)
+    for i, doe in enumerate(does):
+        for j, buck in enumerate(bucks):
+            assert matrix[i][j] == pytest.approx(pedigree.kinship(doe, buck))
+
+
+def test_parent_cycles_do_not_hang():
+    pedigree = Pedigree.from_rows([(1, 2, None), (2, 1, None), (3, 1, 2)])
+    assert len(pedigree) == 3
+    assert pedigree.inbreeding(3) >= 0.0
+
+
+def test_doe_by_buck_evaluation_for_5000_animals_runs_in_seconds():
+    rng = random.Random(12)
+    rows, does, bucks = [], [], []
+    for animal_id in range(1, 5001):
+        if animal_id <= 100:
+            mother = father = None
+        else:
+            mother, father = rng.choice(does), rng.choice(bucks)
+        rows.append((animal_id, mother, father))
+        (bucks if animal_id % 10 == 0 else does).append(animal_id)
+
+    # Every doe x buck pair: 4500 x 500
+    started = time.perf_counter()
+    pedigree = Pedigree.from_rows(rows)
+    matrix = pedigree.kinship_matrix(does, bucks)
+    elapsed = time.perf_counter() - started
+
+    assert len(matrix) == len(does) == 4500
+    assert all(len(row) == len(bucks) == 500 for row in matrix)
+    assert all(0.0 <= value <= 1.0 for row in matrix for value in row)
+    assert matrix[-1][-1] == pytest.approx(pedigree.kinship(does[-1], bucks[-1]))
+    assert elapsed < 5
+
+
+def test_pedigree_endpoints_use_recursive_queries(client):
+    sire = Animal(tag_id="PEDSIRE", breed="Boer", sex="Buck")
+    dam = Animal(tag_id="PEDDAM", breed="Boer", sex="Doe")
+    db.session.add_all([sire, dam])
+    db.session.flush()
+    brother = Animal(tag_id="PEDBRO", breed="Boer", sex="Buck", mother_id=dam.id, father_id=sire.id)
+    sister = Animal(tag_id="PEDSIS", breed="Boer", sex="Doe", mother_id=dam.id, father_id=sire.id)
+    db.session.add_all([brother, sister])
+    db.session.flush()
+    kid = Animal(tag_id="PEDKID", breed="Boer", sex="Doe", mother_id=sister.id, father_id=brother.id)
+    db.session.add(kid)
+    db.session.commit()
+
+    response = client.get(f"/animals/{kid.id}/pedigree?generations=2")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["inbreeding_coefficient"] == pytest.approx(0.25)
+    # Grandparents are reached through both parents but listed once
+    assert [(a["tag_id"], a["generation"]) for a in data["ancestors"]] == [
+        ("PEDBRO", 1), ("PEDSIS", 1), ("PEDSIRE", 2), ("PEDDAM", 2)
+    ]
+
+    response = client.get(f"/animals/{sire.id}/descendants?generations=1")
+    assert sorted(a["tag_id"] for a in response.get_json()["descendants"]) == ["PEDBRO", "PEDSIS"]
+
+    response = client.get(f"/animals/kinship?ids={brother.id},{sister.id}")
+    assert response.get_json()["kinship"][0][1] == pytest.approx(0.25)
+
+    assert client.get(f"/animals/{kid.id}/pedigree?generations=0").status_code == 400
+    assert client.get("/animals/kinship?ids=999999").status_code == 404
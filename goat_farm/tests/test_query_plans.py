@@ -0,0 +1,115 @@
+"""
+EXPLAIN-based checks that the hot endpoints are served by the indexes declared
+in app/models.py. Every SELECT an endpoint issues is captured and re-run under
+SQLite's EXPLAIN QUERY PLAN with the same parameters.
+"""
+import pytest
+from datetime import date
+from sqlalchemy import event, select
+
+from app.extensions import db
+from app.models import Animal, Breeding, Expense, Sale, Treatment
+from app.offspring import _expected_counts
+
+
+@pytest.fixture(scope="module", autouse=True)
+def herd(app):
+    dam = Animal(tag_id="PLANDAM", breed="Boer", sex="Doe", category="Doe")
+    db.session.add(dam)
+    db.session.flush()
+    kid = Animal(tag_id="PLANKID", breed="Boer", sex="Buck", category="Kid", mother_id=dam.id)
+    sold = Animal(tag_id="PLANSOLD", breed="Boer", sex="Buck", status="Sold")
+    db.session.add_all([kid, sold])
+    db.session.flush()
+    db.session.add_all([
+        Treatment(animal_id=kid.id, treatment_type="Vaccination", next_due_date=date(2030, 1, 1)),
+        Expense(expense_type="Feed", amount=10.0, animal_id=kid.id),
+        Sale(animal_id=sold.id, buyer_name="Plan Buyer", price=100.0),
+    ])
+    db.session.commit()
+
+
+def query_plans(client, url, method="GET", **kwargs):
+    """Run a request and return the EXPLAIN QUERY PLAN text of every SELECT it issued."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        response = client.open(url, method=method, **kwargs)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+    assert response.status_code < 400, response.get_data(as_text=True)
+
+    connection = db.session.connection()
+    return [
+        " | ".join(row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+        for statement, parameters in statements
+    ]
+
+
+def assert_uses_index(plans, index):
+    assert any(index in plan for plan in plans), plans
+
+
+def assert_no_full_scan(plans, table):
+    for plan in plans:
+        for step in plan.split(" | "):
+            assert not (step.startswith(f"SCAN {table}") and "INDEX" not in step), plan
+
+
+def test_active_herd_listing_uses_status_index(client):
+    plans = query_plans(client, "/animals/get")
+    assert_uses_index(plans, "ix_animals_status_id")
+    assert_no_full_scan(plans, "animals")
+
+
+def test_archive_status_filter_uses_status_index(client):
+    plans = query_plans(client, "/animals/archive?status=Sold")
+    assert_uses_index(plans, "ix_animals_status_id")
+
+
+def test_offspring_recount_uses_parent_indexes():
+    offspring, sired = _expected_counts()
+    compiled = select(Animal.id, offspring, sired).compile(dialect=db.engine.dialect)
+    plan = " | ".join(row[-1] for row in db.session.connection().exec_driver_sql(
+        "EXPLAIN QUERY PLAN " + str(compiled), tuple(compiled.params.values())
+    ))
+    assert "ix_animals_mother_id" in plan, plan
+    assert "ix_animals_father_id" in plan, plan
+
+
+def test_upcoming_treatments_use_due_date_index(client):
+    plans = query_plans(client, "/treatments/upcoming")
+    assert_uses_index(plans, "ix_treatments_next_due_date")
+    assert_no_full_scan(plans, "treatments")
+
+    plans = query_plans(client, "/treatments/due?within=30d")
+    assert_uses_index(plans, "ix_treatments_next_due_date")
+    assert_no_full_scan(plans, "treatments")
+
+
+def test_recent_sales_and_date_search_use_sale_date_index(client):
+    assert_uses_index(query_plans(client, "/sales/recent"), "ix_sales_sale_date")
+    assert_uses_index(query_plans(client, "/sales/search?start_date=2026-01-01"), "ix_sales_sale_date")
+
+
+def test_expense_edit_refreshes_ledger_through_animal_index(client):
+    expense = Expense.query.filter_by(expense_type="Feed", amount=10.0).first()
+    plans = query_plans(client, f"/expenses/{expense.id}/update", method="PATCH", json={"amount": 12.0})
+    assert_uses_index(plans, "ix_expenses_animal_id_date")
+    assert_no_full_scan(plans, "expenses")
+
+
+def test_breeding_lookups_use_parent_indexes():
+    connection = db.session.connection()
+    for column, index in ((Breeding.doe_id, "ix_breeding_records_doe_id"),
+                          (Breeding.buck_id, "ix_breeding_records_buck_id")):
+        compiled = select(Breeding.id).where(column == 1).compile(dialect=db.engine.dialect)
+        plan = " | ".join(row[-1] for row in connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + str(compiled), tuple(compiled.params.values())
+        ))
+        assert index in plan, plan
@@ -0,0 +1,130 @@
+import json
+from datetime import date, timedelta
+
+from app.extensions import db
+from app.models import Animal, Reminder, Treatment
+from app.reminders import FileNotifier, deliver_reminders, parse_within, scan_due_treatments
+
+TODAY = date.today()
+
+
+def _days(n):
+    return TODAY + timedelta(days=n)
+
+
+def test_due_endpoint_pages_current_treatments_soonest_first(client):
+    """
+    GIVEN vaccinations due at various dates, one superseded by a later booster and one on a sold animal
+    WHEN '/treatments/due?within=7d' is paged two at a time
+    THEN only current treatments of active animals due within a week come back, soonest first
+    """
+    herd = [Animal(tag_id=f"REM{i}", breed="Boer", sex="Doe") for i in range(4)]
+    sold = Animal(tag_id="REMSOLD", breed="Boer", sex="Doe", status="Sold")
+    db.session.add_all(herd + [sold])
+    db.session.flush()
+    db.session.add_all([
+        Treatment(animal_id=herd[0].id, treatment_type="Vaccination", treatment_date=_days(-30), next_due_date=_days(5)),
+        Treatment(animal_id=herd[1].id, treatment_type="Vaccination", treatment_date=_days(-30), next_due_date=_days(1)),
+        Treatment(animal_id=herd[2].id, treatment_type="Deworming", treatment_date=_days(-60), next_due_date=_days(3)),
+        Treatment(animal_id=herd[3].id, treatment_type="Vaccination", treatment_date=_days(-30), next_due_date=_days(20)),
+        Treatment(animal_id=herd[0].id, treatment_type="Deworming", treatment_date=_days(-40), next_due_date=_days(-2)),
+        # Superseded: the booster below moved herd[2]'s vaccination out of the window
+        Treatment(animal_id=herd[2].id, treatment_type="Vaccination", treatment_date=_days(-90), next_due_date=_days(2)),
+        Treatment(animal_id=herd[2].id, treatment_type="Vaccination", treatment_date=_days(-1), next_due_date=_days(60)),
+        Treatment(animal_id=sold.id, treatment_type="Vaccination", treatment_date=_days(-30), next_due_date=_days(2)),
+    ])
+    db.session.commit()
+
+    due, url = [], "/treatments/due?within=7d&limit=2"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        due.extend((t["animal_id"], t["treatment_type"]) for t in response.get_json())
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/treatments/due?within=7d&limit=2&after={cursor}" if cursor else None
+
+    assert due == [
+        (herd[1].id, "Vaccination"), (herd[2].id, "Deworming"), (herd[0].id, "Vaccination")
+    ]
+
+    response = client.get("/treatments/due?within=1w&overdue=1")
+    assert (herd[0].id, "Deworming") in [(t["animal_id"], t["treatment_type"]) for t in response.get_json()]
+    assert client.get("/treatments/due?within=soon").status_code == 400
+
+
+def test_parse_within():
+    assert parse_within("7d") == 7
+    assert parse_within("2w") == 14
+    assert parse_within("10") == 10
+    assert parse_within(None) == 7
+
+
+def test_scan_is_idempotent_and_cancels_superseded_reminders(app):
+    counts = scan_due_treatments(horizon_days=7, window_days=3)
+    # herd[1], herd[2] deworming, herd[0] vaccination and herd[0]'s overdue deworming
+    assert counts == {"created": 4, "cancelled": 0}
+    assert scan_due_treatments(horizon_days=7, window_days=3) == {"created": 0, "cancelled": 0}
+
+    # A booster for herd[1] supersedes its pending reminder
+    animal = Animal.query.filter_by(tag_id="REM1").one()
+    db.session.add(Treatment(animal_id=animal.id, treatment_type="Vaccination",
+                             treatment_date=TODAY, next_due_date=_days(365)))
+    db.session.commit()
+    assert scan_due_treatments(horizon_days=7) == {"created": 0, "cancelled": 1}
+    assert Reminder.query.filter_by(animal_id=animal.id).one().status == "cancelled"
+
+
+def test_deliver_writes_to_file_sink_and_retries_failures(app, tmp_path):
+    class BrokenNotifier:
+        def send(self, reminders):
+            raise ConnectionError("offline")
+
+    assert deliver_reminders(BrokenNotifier()) == (0, 3)
+    assert {r.attempts for r in Reminder.query.filter_by(status="pending")} == {1}
+
+    sink = tmp_path / "reminders.jsonl"
+    assert deliver_reminders(FileNotifier(str(sink)), batch_size=2) == (3, 0)
+    lines = [json.loads(line) for line in sink.read_text().splitlines()]
+    assert sorted(line["tag_id"] for line in lines) == ["REM0", "REM0", "REM2"]
+    assert Reminder.query.filter_by(status="pending").count() == 0
+
+    # Nothing left to send
+    assert deliver_reminders(FileNotifier(str(sink))) == (0, 0)
+
+
+def test_reminder_worker_cli_runs_once(app):
+    result = app.test_cli_runner().invoke(args=["reminders", "run", "--once"])
+    assert result.exit_code == 0
+    assert "0 created" in result.output
+
+
+def test_reminders_fail_after_max_attempts(app):
+    """
+    GIVEN a due reminder and a notifier that is always down
+    WHEN delivery has been tried max_attempts times
+    THEN the reminder is marked failed, keeps its last error and is not retried
+    """
+    class BrokenNotifier:
+        def send(self, reminders):
+            raise ConnectionError("offline")
+
+    animal = Animal.query.filter_by(tag_id="REM2").one()
+    db.session.add(Treatment(animal_id=animal.id, treatment_type="Hoof trim",
+                             treatment_date=_days(-30), next_due_date=_days(1)))
+    db.session.commit()
+    assert scan_due_treatments(horizon_days=7)["created"] == 1
+    reminder = Reminder.query.filter_by(animal_id=animal.id, treatment_type="Hoof trim").one()
+
+    assert deliver_reminders(BrokenNotifier(), max_attempts=2) == (0, 1)
+    assert (reminder.status, reminder.attempts) == ("pending", 1)
+    assert deliver_reminders(BrokenNotifier(), max_attempts=2) == (0, 1)
+    assert (reminder.status, reminder.attempts) == ("failed", 2)
+    assert reminder.last_error == "ConnectionError: offline"
+    assert deliver_reminders(BrokenNotifier(), max_attempts=2) == (0, 0)
+
+    # Reminders already out of attempts when the limit is lowered are retired too
+    pending = Reminder(animal_id=animal.id, treatment_type="Shearing", due_date=_days(2), attempts=3)
+    db.session.add(pending)
+    db.session.commit()
+    assert deliver_reminders(BrokenNotifier(), max_attempts=3) == (0, 0)
+    assert pending.status == "failed"
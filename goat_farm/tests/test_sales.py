@@ -1,6 +1,10 @@
 import pytest
+from datetime import date
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from app.date_buckets import date_bucket
 from app.extensions import db
-from app.models import Animal, Treatment # and other models
+from app.models import Animal, Treatment, Expense, Sale, AnimalCostTotal, SalesRollup, dialect_insert, refresh_cost_total
+from app.rollups import apply_rollup_delta
 
 # The 'client' argument tells pytest to run the client() fixture from conftest.py
 def test_create_sale_calculates_profit_correctly(client):
@@ -33,4 +37,168 @@ def test_create_sale_calculates_profit_correctly(client):
     assert response.status_code == 201
     data = response.get_json()
     expected_profit = 9149.50
-    assert data["sale"]["profit"] == pytest.approx(expected_profit)
\ No newline at end of file
+    assert data["sale"]["profit"] == pytest.approx(expected_profit)
+
+def test_cost_ledger_tracks_expense_changes(app):
+    """
+    GIVEN an animal with an acquisition price
+    WHEN expenses are added, edited and deleted
+    THEN its animal_cost_totals row follows along and `flask ledger rebuild` finds no drift
+    """
+    animal = Animal(tag_id="LEDGER001", acquisition_price=1000.00, sex="Buck", breed="Boer")
+    db.session.add(animal)
+    db.session.commit()
+
+    feed = Expense(expense_type="Feed", amount=200.00, date=date(2025, 1, 5), animal_id=animal.id)
+    vet = Expense(expense_type="Vet", amount=50.00, date=date(2025, 2, 1), animal_id=animal.id)
+    db.session.add_all([feed, vet])
+    db.session.commit()
+
+    ledger = db.session.get(AnimalCostTotal, animal.id)
+    assert ledger.expense_total == pytest.approx(250.00)
+    assert ledger.total_cost == pytest.approx(1250.00)
+    assert ledger.last_expense_date == date(2025, 2, 1)
+
+    feed.amount = 300.00
+    db.session.delete(vet)
+    db.session.commit()
+    db.session.refresh(ledger)
+    assert ledger.expense_total == pytest.approx(300.00)
+    assert ledger.last_expense_date == date(2025, 1, 5)
+
+    result = app.test_cli_runner().invoke(args=["ledger", "rebuild"])
+    assert result.exit_code == 0, result.output
+    assert "Cost ledger verified." in result.output
+
+
+def test_daily_rollups_match_fresh_computation(app, client):
+    """
+    GIVEN sales whose animals keep accruing expenses
+    WHEN sales and expenses are created, edited and deleted
+    THEN '/sales/stats/daily' served from rollups matches '?fresh=1' at every step
+    """
+    def assert_rollups_fresh():
+        from_rollups = client.get('/sales/stats/daily').get_json()
+        fresh = client.get('/sales/stats/daily?fresh=1').get_json()
+        assert from_rollups
+        assert from_rollups == fresh
+
+    goats = [Animal(tag_id=f"ROLLUP{i}", sex="Buck", breed="Boer") for i in range(3)]
+    db.session.add_all(goats)
+    db.session.commit()
+    db.session.add(Expense(expense_type="Feed", amount=120.00, animal_id=goats[0].id))
+    db.session.commit()
+
+    for goat, day in zip(goats, ["2025-11-01", "2025-11-01", "2025-11-02"]):
+        response = client.post('/sales/make', json={
+            "animal_id": goat.id, "buyer_name": "Rollup Buyer", "price": 5000.00, "sale_date": day
+        })
+        assert response.status_code == 201
+    assert_rollups_fresh()
+
+    # Expenses recorded after the sale still count against the sale's day
+    treatment = Treatment(animal_id=goats[1].id, treatment_type="Vaccination", cost=80.00)
+    late_expense = Expense(expense_type="Vet", amount=40.00, animal_id=goats[2].id)
+    db.session.add_all([treatment, late_expense])
+    db.session.commit()
+    assert_rollups_fresh()
+
+    sale = Sale.query.filter_by(animal_id=goats[0].id).one()
+    assert client.patch(f'/sales/{sale.id}', json={"price": 6500.00, "sale_date": "2025-11-03"}).status_code == 200
+    db.session.delete(late_expense)
+    db.session.commit()
+    assert_rollups_fresh()
+
+    result = app.test_cli_runner().invoke(args=["rollups", "rebuild"])
+    assert result.exit_code == 0, result.output
+    assert_rollups_fresh()
+
+
+@pytest.mark.parametrize("url", ['/sales/stats/monthly', '/sales/stats/yearly'])
+def test_bucketed_stats_run_on_sqlite_and_match_rollups(client, url):
+    fresh = client.get(f'{url}?fresh=1')
+    assert fresh.status_code == 200
+    assert fresh.get_json()
+    assert fresh.get_json() == client.get(url).get_json()
+
+
+def test_date_bucket_renders_per_dialect():
+    expr = date_bucket(Sale.sale_date, "month")
+    assert "to_char(date_trunc('month', sales.sale_date), 'YYYY-MM')" in str(expr.compile(dialect=postgresql.dialect()))
+    assert "strftime('%Y-%m', sales.sale_date)" in str(expr.compile(dialect=sqlite.dialect()))
+
+    week = date_bucket(Sale.sale_date, "week")
+    assert "to_char(date_trunc('week', sales.sale_date), 'YYYY-MM-DD')" in str(week.compile(dialect=postgresql.dialect()))
+    assert "strftime('%Y-%m-%d', sales.sale_date, 'weekday 0', '-6 days')" in str(week.compile(dialect=sqlite.dialect()))
+
+
+def test_total_profit_returns_requested_windows(client):
+    response = client.get('/sales/total_profit?windows=365,7,30')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert set(data["windows"]) == {"7", "30", "365"}
+    assert data["windows"]["30"] == pytest.approx(data["total_profit"])
+    assert data["lifetime_profit"] >= data["windows"]["365"]
+
+    assert client.get('/sales/total_profit?windows=0').status_code == 400
+    assert client.get('/expenses/total?windows=week').status_code == 400
+    assert client.get('/sales/total_profit?windows=36500').status_code == 200
+    assert client.get('/sales/total_profit?windows=1000000').status_code == 400
+    assert client.get('/expenses/total?windows=100000000').status_code == 400
+
+
+def test_ledger_and_rollup_upserts_compile_to_on_conflict(app):
+    """Both first-write paths are a single INSERT ... ON CONFLICT DO UPDATE on each backend."""
+    class FakeConnection:
+        def __init__(self, dialect):
+            self.dialect = dialect
+
+    for dialect in (postgresql.dialect(), sqlite.dialect()):
+        insert = dialect_insert(FakeConnection(dialect), SalesRollup.__table__).values(grain="day", period="2025-01-01")
+        sql = str(insert.on_conflict_do_update(
+            index_elements=["grain", "period"], set_={"total_sales": insert.excluded.total_sales}
+        ).compile(dialect=dialect))
+        assert "ON CONFLICT (grain, period) DO UPDATE" in sql
+
+
+def test_rollup_delta_creates_then_accumulates_a_period(app):
+    connection = db.session.connection()
+    apply_rollup_delta(connection, date(1999, 3, 4), sales=1, revenue=100.0)
+    apply_rollup_delta(connection, date(1999, 3, 20), sales=1, revenue=50.0, expenses=10.0)
+    db.session.commit()
+
+    month = db.session.get(SalesRollup, ("month", "1999-03"))
+    assert (month.total_sales, month.total_revenue, month.total_expenses) == (2, 150.0, 10.0)
+    assert db.session.get(SalesRollup, ("day", "1999-03-04")).total_sales == 1
+
+
+def test_ledger_and_rollups_update_then_insert_without_on_conflict(app):
+    """Backends with no ON CONFLICT (e.g. MySQL) fall back to UPDATE, then INSERT when no row matched."""
+    class OtherBackend:
+        dialect = mysql.dialect()
+
+        def __init__(self, connection):
+            self.connection = connection
+
+        def execute(self, *args, **kwargs):
+            return self.connection.execute(*args, **kwargs)
+
+    assert dialect_insert(OtherBackend(None), SalesRollup.__table__) is None
+
+    animal = Animal(tag_id="NOUPSERT1", acquisition_price=300.0, sex="Doe", breed="Boer")
+    db.session.add(animal)
+    db.session.commit()
+    connection = OtherBackend(db.session.connection())
+    db.session.execute(AnimalCostTotal.__table__.delete().where(AnimalCostTotal.animal_id == animal.id))
+    apply_rollup_delta(connection, date(1998, 5, 4), sales=1, revenue=100.0)
+    apply_rollup_delta(connection, date(1998, 5, 20), sales=1, revenue=50.0, expenses=10.0)
+    refresh_cost_total(connection, animal.id)
+    db.session.add(Expense(animal_id=animal.id, amount=20.0, date=date(1998, 5, 1), expense_type="Feed"))
+    db.session.flush()
+    refresh_cost_total(connection, animal.id)
+    db.session.commit()
+
+    month = db.session.get(SalesRollup, ("month", "1998-05"))
+    assert (month.total_sales, month.total_revenue, month.total_expenses) == (2, 150.0, 10.0)
+    ledger = db.session.get(AnimalCostTotal, animal.id)
+    assert (ledger.acquisition_price, ledger.expense_total) == (300.0, 20.0)
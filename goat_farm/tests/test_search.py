@@ -0,0 +1,69 @@
+from app import create_app
+from app.config import TestingConfig
+from app.extensions import db
+from app.models import Animal, Sale, Treatment
+
+
+def test_search_spans_animals_sales_and_treatments(client):
+    """
+    GIVEN an animal, its treatment and a sale that all mention 'Kajiado'
+    WHEN '/search?q=kajiado' is requested
+    THEN all three come back ranked, and paging splits them across pages
+    """
+    goat = Animal(tag_id="KJD-001", breed="Galla", sex="Buck", notes="Bought at Kajiado market")
+    db.session.add(goat)
+    db.session.commit()
+    db.session.add_all([
+        Treatment(animal_id=goat.id, treatment_type="Deworming", medication="Albendazole",
+                  notes="Kajiado vet visit"),
+        Sale(animal_id=goat.id, buyer_name="Kajiado Butchery", price=12000.0),
+    ])
+    db.session.commit()
+
+    response = client.get("/search?q=kajiado")
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert {r["type"] for r in results} == {"animals", "sales", "treatments"}
+    assert all(r["item"] is not None for r in results)
+    ranks = [r["rank"] for r in results]
+    assert ranks == sorted(ranks, reverse=True)
+
+    first_page = client.get("/search?q=kajiado&limit=2").get_json()
+    assert len(first_page["results"]) == 2
+    second_page = client.get(f"/search?q=kajiado&limit=2&offset={first_page['next_offset']}").get_json()
+    assert len(second_page["results"]) == 1
+    assert second_page["next_offset"] is None
+
+
+def test_search_filters_types_and_tracks_updates(client):
+    response = client.get("/search?q=albendaz&types=treatments").get_json()
+    assert [r["type"] for r in response["results"]] == ["treatments"]
+
+    treatment = Treatment.query.filter_by(medication="Albendazole").one()
+    treatment.medication = "Ivermectin"
+    db.session.commit()
+    assert client.get("/search?q=albendazole").get_json()["results"] == []
+    assert client.get("/search?q=ivermectin").get_json()["results"][0]["id"] == treatment.id
+
+    assert client.get("/search?q=x&types=users").status_code == 400
+    assert client.get("/search").status_code == 400
+
+
+def test_create_all_on_an_existing_database_keeps_one_index_entry(tmp_path):
+    """
+    GIVEN a SQLite database file that already has the search index and an animal
+    WHEN the app is created and create_all runs against it again
+    THEN the index is not backfilled a second time and the animal is found once
+    """
+    config = type("FileConfig", (TestingConfig,), {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'farm.db'}"})
+    for run in range(2):
+        app = create_app(config)
+        with app.app_context():
+            db.create_all()
+            if run == 0:
+                db.session.add(Animal(tag_id="REOPEN-1", breed="Toggenburg", sex="Doe"))
+                db.session.commit()
+            results = app.test_client().get("/search?q=toggenburg").get_json()["results"]
+            db.session.remove()
+            db.engine.dispose()
+        assert [r["item"]["tag_id"] for r in results] == ["REOPEN-1"]
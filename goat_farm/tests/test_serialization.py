@@ -0,0 +1,61 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+from app.extensions import db
+from app.json_provider import OrjsonProvider, StdlibJSONProvider, make_json_provider
+from app.models import Animal, Expense
+
+
+def test_fields_projects_listing_columns_across_pages(client):
+    """
+    GIVEN three active animals
+    WHEN '/animals/get?fields=tag_id,birth_date' is paged two at a time
+    THEN each item has exactly the requested fields, dates are ISO 8601, and the cursor still works
+    """
+    db.session.add_all([
+        Animal(tag_id=f"FLD{i}", breed="Boer", sex="Doe", birth_date=date(2024, 1, i + 1)) for i in range(3)
+    ])
+    db.session.commit()
+
+    first = client.get("/animals/get?fields=tag_id,birth_date&limit=2")
+    assert first.status_code == 200
+    assert first.get_json() == [
+        {"tag_id": "FLD0", "birth_date": "2024-01-01"}, {"tag_id": "FLD1", "birth_date": "2024-01-02"}
+    ]
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/animals/get?fields=tag_id,birth_date&limit=2&after={cursor}")
+    assert second.get_json() == [{"tag_id": "FLD2", "birth_date": "2024-01-03"}]
+
+    ordered = client.get("/animals/get?fields=tag_id&order=updated_at&limit=1")
+    assert list(ordered.get_json()[0]) == ["tag_id"]
+    assert "X-Next-Cursor" in ordered.headers
+
+    streamed = client.get("/animals/get?fields=id,tag_id", headers={"Accept": "application/x-ndjson"})
+    rows = [json.loads(line) for line in streamed.get_data(as_text=True).splitlines()]
+    assert [row["tag_id"] for row in rows] == ["FLD0", "FLD1", "FLD2"]
+
+
+def test_fields_on_unpaged_listings_and_validation(client):
+    db.session.add(Expense(expense_type="Feed", amount=12.5, date=date(2025, 5, 1)))
+    db.session.commit()
+
+    assert client.get("/expenses/get?fields=amount,date").get_json() == [{"amount": 12.5, "date": "2025-05-01"}]
+    assert client.get("/expenses/get").get_json()[0]["date"] == "2025-05-01"
+    assert client.get("/expenses/get?fields=amount,password").status_code == 400
+    assert client.get("/animals/get?fields=").status_code == 400
+
+
+def test_providers_write_the_same_documents(app):
+    payload = {"day": date(2025, 1, 2), "price": Decimal("10.50"), "by_year": {2025: [1.5, None, True]}}
+    fast, stdlib = OrjsonProvider(app), StdlibJSONProvider(app)
+    assert json.loads(fast.dumps(payload)) == json.loads(stdlib.dumps(payload)) == {
+        "day": "2025-01-02", "price": "10.50", "by_year": {"2025": [1.5, None, True]}
+    }
+    assert fast.loads(b'{"a": 1}') == {"a": 1}
+
+    app.config["JSON_PROVIDER"] = "stdlib"
+    try:
+        assert isinstance(make_json_provider(app), StdlibJSONProvider)
+    finally:
+        app.config["JSON_PROVIDER"] = "auto"
@@ -0,0 +1,228 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.models import Animal, Expense, SyncReceipt, Treatment
+from app.sync import encode_token
+
+
+@pytest.fixture(scope="module")
+def herd(app):
+    app.config["SYNC_OVERLAP_SECONDS"] = 0
+    animal = Animal(tag_id="SYNC001", breed="Boer", sex="Doe")
+    db.session.add(animal)
+    db.session.commit()
+    return animal.id
+
+
+def pull(client, since=None, limit=None):
+    """Follow "next" until has_more is false; returns (merged changes, final token)."""
+    merged = {}
+    token = since
+    while True:
+        params = {key: value for key, value in (("since", token), ("limit", limit)) if value is not None}
+        response = client.get("/sync", query_string=params)
+        assert response.status_code == 200
+        body = response.get_json()
+        for entity, changes in body["changes"].items():
+            merged.setdefault(entity, {"upserted": [], "deleted": []})
+            merged[entity]["upserted"] += changes["upserted"]
+            merged[entity]["deleted"] += changes["deleted"]
+        token = body["next"]
+        if not body["has_more"]:
+            return merged, token
+
+
+def test_delta_returns_only_changed_and_deleted_rows(client, herd):
+    """
+    GIVEN a client that has pulled everything
+    WHEN a treatment is updated, an expense deleted and a new treatment added
+    THEN the next delta carries those rows and the deleted id, and not the untouched ones
+    """
+    kept = Treatment(animal_id=herd, treatment_type="Deworming")
+    edited = Treatment(animal_id=herd, treatment_type="Vaccination")
+    expense = Expense(expense_type="Feed", amount=100.0)
+    db.session.add_all([kept, edited, expense])
+    db.session.commit()
+    kept_id, edited_id, expense_id = kept.id, edited.id, expense.id
+
+    full, token = pull(client)
+    assert {row["id"] for row in full["treatments"]["upserted"]} >= {kept_id, edited_id}
+    assert herd in {row["id"] for row in full["animals"]["upserted"]}
+
+    # Second-resolution timestamps: make the edits land after the token
+    db.session.execute(db.text("UPDATE treatments SET updated_at = '2000-01-01 00:00:00'"))
+    db.session.execute(db.text("UPDATE animals SET updated_at = '2000-01-01 00:00:00'"))
+    db.session.commit()
+    _, token = pull(client)
+
+    assert client.patch(f"/treatments/{edited_id}/update", json={"notes": "booster"}).status_code == 200
+    assert client.delete(f"/expenses/{expense_id}/delete").status_code == 200
+    db.session.add(Treatment(animal_id=herd, treatment_type="Antibiotic"))
+    db.session.commit()
+
+    delta, _ = pull(client, since=token)
+    upserted = {row["id"]: row for row in delta["treatments"]["upserted"]}
+    assert edited_id in upserted and upserted[edited_id]["notes"] == "booster"
+    assert kept_id not in upserted
+    assert "Antibiotic" in {row["treatment_type"] for row in upserted.values()}
+    assert expense_id in delta["expenses"]["deleted"]
+    assert herd not in {row["id"] for row in delta["animals"]["upserted"]}
+
+
+def test_paging_within_one_second_skips_nothing(client, herd):
+    db.session.add_all([Treatment(animal_id=herd, treatment_type="Check-up") for _ in range(7)])
+    db.session.commit()
+    expected = {treatment.id for treatment in Treatment.query}
+
+    paged, _ = pull(client, limit=2)
+    ids = [row["id"] for row in paged["treatments"]["upserted"]]
+    assert len(ids) == len(set(ids))
+    assert set(ids) == expected
+
+
+def test_push_applies_creates_once_and_detects_conflicts(client, herd):
+    batch = [
+        {"entity": "treatments", "op": "create", "client_id": "phone-1:1",
+         "data": {"animal_id": herd, "treatment_type": "Vaccination", "cost": 250}},
+        {"entity": "expenses", "op": "create", "client_id": "phone-1:2",
+         "data": {"expense_type": "Transport", "amount": 80}},
+        {"entity": "treatments", "op": "create", "client_id": "phone-1:3",
+         "data": {"animal_id": herd, "treatment_type": "Massage"}},
+        {"entity": "sales", "op": "create", "client_id": "phone-1:4", "data": {}},
+    ]
+    body = client.post("/sync", json={"device_id": "phone-1", "changes": batch}).get_json()
+    assert [result["status"] for result in body["results"]] == ["applied", "applied", "rejected", "rejected"]
+    treatment = body["results"][0]["row"]
+    assert treatment["treatment_type"] == "Vaccination" and treatment["updated_at"]
+    assert db.session.get(SyncReceipt, ("phone-1", "phone-1:1", "treatments")).row_id == treatment["id"]
+
+    # The phone lost the response and sends the batch again
+    retry = client.post("/sync", json={"device_id": "phone-1", "changes": batch[:2]}).get_json()
+    assert [result["status"] for result in retry["results"]] == ["duplicate", "duplicate"]
+    assert retry["results"][0]["id"] == treatment["id"]
+    assert Treatment.query.filter_by(treatment_type="Vaccination", cost=250).count() == 1
+
+    update = {"entity": "treatments", "op": "update", "id": treatment["id"],
+              "base_updated_at": treatment["updated_at"], "data": {"outcome": "Recovered"}}
+    stale = dict(update, base_updated_at="2000-01-01T00:00:00", data={"outcome": "Ongoing"})
+    body = client.post("/sync", json={"device_id": "phone-1", "changes": [stale, update]}).get_json()
+    assert body["conflict"] == 1 and body["applied"] == 1
+    assert body["results"][0]["reason"] == "modified"
+    assert body["results"][1]["row"]["outcome"] == "Recovered"
+
+    delete = {"entity": "treatments", "op": "delete", "id": treatment["id"],
+              "base_updated_at": body["results"][1]["row"]["updated_at"]}
+    assert client.post("/sync", json={"device_id": "phone-1", "changes": [delete]}).get_json()["applied"] == 1
+    assert db.session.get(Treatment, treatment["id"]) is None
+    late_edit = dict(update, base_updated_at=delete["base_updated_at"])
+    body = client.post("/sync", json={"device_id": "phone-1", "changes": [late_edit]}).get_json()
+    assert body["results"][0]["reason"] == "deleted"
+
+
+def test_push_batches_many_creates(client, herd):
+    """Per-row ledger upkeep for treatment costs is by design, not an N+1 in the sync view."""
+    batch = [
+        {"entity": "treatments", "op": "create", "client_id": f"phone-2:{n}",
+         "data": {"animal_id": herd, "treatment_type": "Deworming", "cost": 10}}
+        for n in range(12)
+    ]
+    body = client.post("/sync", json={"device_id": "phone-1", "changes": batch}).get_json()
+    assert body["applied"] == 12
+
+
+def test_bad_tokens_and_batches(client, herd):
+    assert client.get("/sync?since=garbage").status_code == 400
+    for payload in ({"since": "2030-01-01T00:00:00+00:00"},
+                    {"until": "2030-01-01T00:00:00Z", "after": {"animals": ["2030-01-01T00:00:00", 1]}},
+                    {"until": "2030-01-01T00:00:00", "after": {"animals": [1, 1]}},
+                    {"until": "2030-01-01T00:00:00", "after": {"animals": [None, 1]}}):
+        response = client.get(f"/sync?since={encode_token(payload)}")
+        assert response.status_code == 400 and response.get_json()["error"] == "Invalid sync token"
+    expired = encode_token({"since": datetime(2000, 1, 1).isoformat()})
+    assert client.get(f"/sync?since={expired}").status_code == 410
+    assert client.post("/sync", json={"device_id": "phone-1", "changes": []}).status_code == 400
+    assert client.post("/sync", json={"changes": [{}]}).status_code == 400
+    for body in ([{"device_id": "phone-1"}], "changes", 7, None):
+        assert client.post("/sync", json=body).status_code == 400
+    assert client.post("/sync", data="not json", content_type="application/json").status_code == 400
+    assert client.post("/sync", json={"device_id": "phone-1", "changes": [{}] * 501}).status_code == 413
+
+
+def test_push_rejects_values_that_do_not_fit_their_columns(client, herd):
+    batch = [
+        {"entity": "expenses", "op": "create", "client_id": "phone-3:1",
+         "data": {"expense_type": ["Feed"], "amount": 5}},
+        {"entity": "expenses", "op": "create", "client_id": "phone-3:2",
+         "data": {"expense_type": "Feed", "amount": 5, "notes": {"x": 1}}},
+        {"entity": "treatments", "op": "create", "client_id": "phone-3:3",
+         "data": {"animal_id": herd, "treatment_type": "Other", "custom_type": "x" * 51}},
+        {"entity": "treatments", "op": "create", "client_id": "phone-3:4",
+         "data": {"animal_id": herd, "treatment_type": "Deworming", "dosage": 5}},
+        {"entity": "treatments", "op": "create", "client_id": "phone-3:5",
+         "data": {"animal_id": herd, "treatment_type": "Deworming", "medication": "m" * 100}},
+    ]
+    response = client.post("/sync", json={"device_id": "phone-1", "changes": batch})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == ["rejected"] * 4 + ["applied"]
+    assert results[0]["error"] == "expense_type must be a string"
+    assert results[2]["error"] == "custom_type must be at most 50 characters"
+
+
+def test_database_error_rolls_back_the_batch(client, herd, monkeypatch):
+    def locked():
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(db.session, "flush", locked)
+    batch = [{"entity": "expenses", "op": "create", "client_id": "phone-4:1",
+              "data": {"expense_type": "Feed", "amount": 5}}]
+    response = client.post("/sync", json={"device_id": "phone-1", "changes": batch})
+    monkeypatch.undo()
+
+    assert response.status_code == 409
+    assert "OperationalError" in response.get_json()["error"]
+    assert SyncReceipt.query.filter_by(client_id="phone-4:1").count() == 0
+    assert client.post("/sync", json={"device_id": "phone-1", "changes": batch}).get_json()["applied"] == 1
+
+
+def test_client_ids_are_scoped_per_entity(client, herd):
+    batch = [
+        {"entity": "treatments", "op": "create", "client_id": "local-1",
+         "data": {"animal_id": herd, "treatment_type": "Deworming"}},
+        {"entity": "expenses", "op": "create", "client_id": "local-1",
+         "data": {"expense_type": "Feed", "amount": 12}},
+        {"entity": "expenses", "op": "create", "client_id": "local-1",
+         "data": {"expense_type": "Feed", "amount": 12}},
+    ]
+    body = client.post("/sync", json={"device_id": "phone-1", "changes": batch}).get_json()
+    assert [result["status"] for result in body["results"]] == ["applied", "applied", "duplicate"]
+    treatment_id, expense_id = body["results"][0]["id"], body["results"][1]["id"]
+    assert body["results"][2]["id"] == expense_id
+
+    retry = client.post("/sync", json={"device_id": "phone-1", "changes": batch[:2]}).get_json()
+    assert [(result["status"], result["id"]) for result in retry["results"]] == [
+        ("duplicate", treatment_id), ("duplicate", expense_id)
+    ]
+
+
+def test_devices_reusing_local_ids_both_apply(client, herd):
+    """
+    GIVEN two devices that number their offline rows the same way
+    WHEN both push a create with client_id "local-7"
+    THEN both rows are written, and each device's retry maps to its own row
+    """
+    def create(device_id, amount):
+        change = {"entity": "expenses", "op": "create", "client_id": "local-7",
+                  "data": {"expense_type": "Feed", "amount": amount}}
+        return client.post("/sync", json={"device_id": device_id, "changes": [change]}).get_json()["results"][0]
+
+    first, second = create("tablet-a", 31), create("tablet-b", 32)
+    assert first["status"] == second["status"] == "applied"
+    assert first["id"] != second["id"]
+    assert db.session.get(Expense, second["id"]).amount == 32
+
+    retry = create("tablet-b", 32)
+    assert retry["status"] == "duplicate" and retry["id"] == second["id"]
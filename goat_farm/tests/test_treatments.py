@@ -0,0 +1,49 @@
+import pytest
+from app.extensions import db
+from app.models import Animal, Treatment, Expense, AnimalCostTotal
+
+
+def test_bulk_treatment_campaign_inserts_treatments_and_expenses(client):
+    """
+    GIVEN three active Boer does, one sold Boer doe and a Saanen doe
+    WHEN a vaccination campaign is posted to '/treatments/bulk' for Boer does
+    THEN each active Boer doe gets a treatment, an expense and an updated cost ledger
+    """
+    herd = [Animal(tag_id=f"CAMP{i}", breed="Boer", sex="Doe", category="Doe") for i in range(3)]
+    herd.append(Animal(tag_id="CAMPSOLD", breed="Boer", sex="Doe", category="Doe", status="Sold"))
+    herd.append(Animal(tag_id="CAMPSAAN", breed="Saanen", sex="Doe", category="Doe"))
+    db.session.add_all(herd)
+    db.session.commit()
+
+    response = client.post('/treatments/bulk', json={
+        "filter": {"breed": "Boer", "category": "Doe"},
+        "treatment": {"treatment_type": "Vaccination", "medication": "CDT", "cost": 150,
+                      "treatment_date": "2026-03-01", "next_due_date": "2027-03-01"}
+    })
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data["treatments_created"] == 3
+    assert data["expenses_created"] == 3
+
+    for animal in herd[:3]:
+        assert Treatment.query.filter_by(animal_id=animal.id, treatment_type="Vaccination").count() == 1
+        assert Expense.query.filter_by(animal_id=animal.id, notes="Vaccination (CDT)").count() == 1
+        assert db.session.get(AnimalCostTotal, animal.id).expense_total == pytest.approx(150)
+    assert Treatment.query.filter_by(animal_id=herd[3].id).count() == 0
+    assert Treatment.query.filter_by(animal_id=herd[4].id).count() == 0
+
+
+def test_bulk_treatment_by_tag_ids_reports_skipped_tags(client):
+    response = client.post('/treatments/bulk', json={
+        "tag_ids": ["CAMP0", "CAMPSOLD", "NOSUCHTAG"],
+        "treatment": {"treatment_type": "Deworming"}
+    })
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data["treatments_created"] == 1
+    assert data["expenses_created"] == 0
+    assert data["skipped_tag_ids"] == ["CAMPSOLD", "NOSUCHTAG"]
+
+    assert client.post('/treatments/bulk', json={
+        "filter": {"status": "Sold"}, "treatment": {"treatment_type": "Deworming"}
+    }).status_code == 400
@@ -0,0 +1,11 @@
+"""
+Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+run.py is the development server (debug, single process). APP_CONFIG picks
+the config class, e.g. APP_CONFIG=app.config.BenchmarkConfig for load tests.
+"""
+import os
+
+from app import create_app
+
+app = create_app(os.environ.get("APP_CONFIG", "app.config.Config"))